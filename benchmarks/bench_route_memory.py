@@ -0,0 +1,97 @@
+"""
+Retained memory per extracted route.
+
+Generates a synthetic FastAPI repo in memory (FILES files x ROUTES_PER_FILE routes),
+extracts it with the current chunker, and compares the bytes still allocated per
+route with the previous layout: a dict-backed frozen dataclass rebuilt once per
+route to attach the file path.
+
+    PYTHONPATH=src python benchmarks/bench_route_memory.py [--routes 200000] [--per-file 100]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import tracemalloc
+from dataclasses import dataclass
+
+from sydes.extractors.fastapi.chunker import extract_facts_from_source
+
+
+@dataclass(frozen=True)
+class _LegacyRouteDecl:
+    method: str
+    path: str
+    handler_name: str
+    start_line: int
+    end_line: int
+    decorator_line: int
+    file_path: str = ""
+
+
+def _source(file_idx: int, per_file: int) -> str:
+    lines = ["from fastapi import APIRouter", "router = APIRouter()", ""]
+    for i in range(per_file):
+        lines += [
+            f'@router.get("/svc{file_idx}/items/{i}/{{item_id}}")',
+            f"def get_item_{i}(item_id: int):",
+            "    return {}",
+            "",
+        ]
+    return "\n".join(lines)
+
+
+def _file_path(file_idx: int) -> str:
+    return f"/repo/services/svc{file_idx}/api/routes.py"
+
+
+def _measure(build) -> tuple[int, int]:
+    gc.collect()
+    tracemalloc.start()
+    kept = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, sum(len(r) for r in kept)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--routes", type=int, default=200_000)
+    ap.add_argument("--per-file", type=int, default=100)
+    args = ap.parse_args()
+
+    files = max(1, args.routes // args.per_file)
+    sources = [_source(i, args.per_file) for i in range(files)]
+
+    def build_current():
+        return [
+            extract_facts_from_source(src, file_path=_file_path(i)).routes
+            for i, src in enumerate(sources)
+        ]
+
+    def build_legacy():
+        out = []
+        for i, src in enumerate(sources):
+            abs_path = _file_path(i)
+            routes = [
+                _LegacyRouteDecl(
+                    r.method, r.path, r.handler_name, r.start_line, r.end_line, r.decorator_line
+                )
+                for r in extract_facts_from_source(src).routes
+            ]
+            out.append(
+                [_LegacyRouteDecl(**{**r.__dict__, "file_path": abs_path}) for r in routes]
+            )
+        return out
+
+    print(f"python {sys.version.split()[0]}, {files} files x {args.per_file} routes")
+    for name, build in (("legacy (dict-backed)", build_legacy), ("current (slots)", build_current)):
+        nbytes, nroutes = _measure(build)
+        print(f"{name:<22} {nroutes:>8} routes  {nbytes / nroutes:8.1f} bytes/route")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Store throughput with SQLite's default connection settings vs the tuned StoreConfig.
+
+Builds (once, at --db) a store with FILES x ROUTES_PER_FILE routes and SCANS scan
+snapshots, then times on a fresh store per configuration:
+
+  list_routes     filtered queries (file / path substring) and one full listing
+  replace (auto)  replace_routes_for_file, one commit per file
+  replace (sess)  replace_routes_for_file inside a session (batched commits)
+
+    PYTHONPATH=src python benchmarks/bench_store_pragmas.py [--routes 500000] [--scans 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from sydes.store.sqlite_store import StoreConfig, SydesSQLiteStore
+
+DEFAULTS = StoreConfig(
+    synchronous="",
+    cache_size_kib=0,
+    mmap_size_bytes=0,
+    temp_store="",
+    busy_timeout_ms=0,
+    optimize_on_close=False,
+)
+
+
+@dataclass
+class _Route:
+    method: str
+    path: str
+    handler_name: str
+    start_line: int
+    end_line: int
+    decorator_line: int
+
+
+def _routes(file_idx: int, per_file: int, gen: int = 0) -> list[_Route]:
+    return [
+        _Route("GET", f"/svc{file_idx}/items/{i}/v{gen}", f"get_{i}", 4 * i + 1, 4 * i + 3, 4 * i)
+        for i in range(per_file)
+    ]
+
+
+def _build(db: Path, files: int, per_file: int, scans: int, scan_endpoints: int) -> None:
+    store = SydesSQLiteStore(db, repo_root=db.parent)
+    with store, store.session():
+        for i in range(files):
+            store.replace_routes_for_file(f"services/svc{i}/api.py", _routes(i, per_file), source="ast")
+        con = store._session_con
+        for s in range(scans):
+            # distinct content per scan, so every scan stores its own snapshot set
+            scan_id = store.create_scan(git_commit=f"{s:040x}")
+            set_id = con.execute(
+                "INSERT INTO snapshot_sets(content_hash, endpoints, created_at) VALUES(?, ?, 0)",
+                (f"bench:{s}", scan_endpoints),
+            ).lastrowid
+            con.execute("UPDATE scans SET set_id=? WHERE scan_id=?", (set_id, scan_id))
+            con.executemany(
+                """
+                INSERT INTO snapshot_endpoints(
+                    set_id, endpoint_id, method, http_path, rel_path, handler_name, decl_line, source
+                ) VALUES(?,?,?,?,?,?,?,?)
+                """,
+                [
+                    (set_id, f"{s}-{e}", "GET", f"/svc{e % files}/items/{e}", "api.py", "h", e, "ast")
+                    for e in range(scan_endpoints)
+                ],
+            )
+            store.unit_done()
+
+
+def _measure(db: Path, config: StoreConfig, files: int, per_file: int, rounds: int) -> dict[str, float]:
+    out: dict[str, float] = {}
+    with SydesSQLiteStore(db, repo_root=db.parent, config=config) as store:
+        t0 = time.perf_counter()
+        rows = 0
+        for i in range(rounds):
+            rows += len(store.list_routes(file_contains=f"svc{i * 37 % files}/", limit=200))
+            rows += len(store.list_routes(path_contains=f"/items/{i % per_file}/", limit=200))
+        rows += len(store.list_routes(limit=1_000_000))
+        out["list_routes rows"] = rows / (time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        for i in range(rounds):
+            store.replace_routes_for_file(f"services/svc{i}/api.py", _routes(i, per_file, 1), source="ast")
+        out["replace (auto) files"] = rounds / (time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        with store.session():
+            for i in range(rounds):
+                store.replace_routes_for_file(f"services/svc{i}/api.py", _routes(i, per_file, 2), source="ast")
+                store.unit_done()
+        out["replace (sess) files"] = rounds / (time.perf_counter() - t0)
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--routes", type=int, default=500_000)
+    ap.add_argument("--per-file", type=int, default=100)
+    ap.add_argument("--scans", type=int, default=2000)
+    ap.add_argument("--scan-endpoints", type=int, default=500)
+    ap.add_argument("--rounds", type=int, default=200)
+    ap.add_argument("--db", type=str, default=None, help="Reuse/build the seed DB here")
+    args = ap.parse_args()
+
+    files = max(1, args.routes // args.per_file)
+    seed = Path(args.db) if args.db else Path(tempfile.gettempdir()) / "sydes-bench" / "seed.db"
+    if not seed.exists():
+        seed.parent.mkdir(parents=True, exist_ok=True)
+        t0 = time.perf_counter()
+        _build(seed, files, args.per_file, args.scans, args.scan_endpoints)
+        print(f"built {seed} in {time.perf_counter() - t0:.1f}s")
+
+    print(
+        f"python {sys.version.split()[0]}, {files * args.per_file} routes, "
+        f"{args.scans} scans, {seed.stat().st_size / 1e6:.0f} MB"
+    )
+    results = {}
+    for name, config in (("sqlite defaults", DEFAULTS), ("StoreConfig()", StoreConfig())):
+        work = seed.with_name(f"work-{name.split()[0]}.db")
+        shutil.copyfile(seed, work)
+        results[name] = _measure(work, config, files, args.per_file, args.rounds)
+        for leftover in (work, Path(f"{work}-wal"), Path(f"{work}-shm")):
+            leftover.unlink(missing_ok=True)
+
+    metrics = list(next(iter(results.values())))
+    print(f"{'':<22}" + "".join(f"{name:>18}" for name in results))
+    for m in metrics:
+        print(f"{m:<22}" + "".join(f"{r[m]:>16,.0f}/s" for r in results.values()))
+
+
+if __name__ == "__main__":
+    main()
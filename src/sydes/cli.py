@@ -10,8 +10,11 @@ from rich.console import Console
 from rich.table import Table
 from rich.text import Text
 
+from sydes.domain.errors import SchemaVersionError
 from sydes.orchestrator.pipeline import run_analyze
-from sydes.store.sqlite_store import SydesSQLiteStore
+from sydes.orchestrator.profile import Tracer
+from sydes.store.extract_cache import default_cache_dir
+from sydes.store.sqlite_store import ScanDiff, SydesSQLiteStore
 from sydes.graph.builder import build_endpoint_graph
 
 
@@ -53,8 +56,40 @@ def analyze(
     repo: str = typer.Argument(..., help="Path to the repo to analyze"),
     max_files: Optional[int] = typer.Option(None, help="Limit scanned files (debug)"),
     git: bool = typer.Option(False, help="Only scan files changed in git"),
-    git_base: str = typer.Option("HEAD~1", help="Git base revision (used with --git)"),
+    git_base: Optional[str] = typer.Option(
+        None, help="Git base revision (used with --git; default: commit of the last stored scan)"
+    ),
     git_to: str = typer.Option("HEAD", help="Git target revision (used with --git)"),
+    trust_stat: bool = typer.Option(
+        True, help="Skip hashing files whose mtime/size/inode are unchanged since last scan"
+    ),
+    paranoid: int = typer.Option(
+        0, help="With --trust-stat, re-hash a rotating 1/N sample of unchanged files (0=off)"
+    ),
+    workers: int = typer.Option(1, help="Parse changed files on N worker processes"),
+    scan_workers: int = typer.Option(8, help="Threads used to walk the repository"),
+    read_workers: int = typer.Option(4, help="Threads reading/fingerprinting changed files"),
+    git_index: bool = typer.Option(
+        False, help="List files from the git index and fingerprint them by git blob id"
+    ),
+    cache: bool = typer.Option(
+        True, help="Reuse extraction results for identical file contents across repos/branches"
+    ),
+    cache_dir: Optional[str] = typer.Option(
+        None, help="Extraction cache directory (default: $SYDES_CACHE_DIR or ~/.cache/sydes)"
+    ),
+    cache_max_mb: int = typer.Option(512, help="Evict least-recently-used cache entries beyond this size"),
+    timings: bool = typer.Option(False, help="Print wall/CPU time, bytes and files per stage"),
+    profile: Optional[str] = typer.Option(
+        None, help="Write per-file, per-stage spans to this file (Chrome trace / speedscope JSON)"
+    ),
+    profile_top: int = typer.Option(10, help="With --profile, list the N slowest files"),
+    max_file_kb: int = typer.Option(
+        2000, help="Skip (and record) changed files larger than this instead of parsing them"
+    ),
+    file_timeout: float = typer.Option(
+        30.0, help="Per-file parse time budget in seconds, enforced in killable workers (0=off)"
+    ),
 ) -> None:
 
     repo_path = Path(repo).expanduser().resolve()
@@ -63,12 +98,26 @@ def analyze(
     if not repo_path.is_dir():
         raise typer.BadParameter(f"Repo path is not a directory: {repo_path}")
 
+    tracer = Tracer(root=repo_path) if profile else None
+
     result = run_analyze(
         repo_path,
         max_files=max_files,
         git_mode=git,
         git_base=git_base,
         git_to=git_to,
+        trust_stat=trust_stat,
+        paranoid_every=paranoid,
+        workers=workers,
+        scan_workers=scan_workers,
+        read_workers=read_workers,
+        use_git_index=git_index,
+        cache_dir=(Path(cache_dir).expanduser() if cache_dir else default_cache_dir()) if cache else None,
+        cache_max_bytes=cache_max_mb * 1024 * 1024,
+        tracer=tracer,
+        max_file_bytes=max_file_kb * 1000,
+        file_timeout_s=file_timeout or None,
+        route_limit=50,
     )
 
 
@@ -76,20 +125,38 @@ def analyze(
     console.print(
         f"Detected framework: [bold]{result.framework}[/bold] (confidence={result.confidence:.2f})"
     )
+    if result.mode == "git":
+        console.print(f"Mode: git (changes since {result.git_base})")
+    elif git:
+        console.print("[yellow]Mode: full (no reachable commit recorded for a git-mode baseline)[/yellow]")
     console.print(f"Python files scanned: {result.files_scanned}")
     console.print(f"Candidate API files: {len(result.candidate_files)}")
+    if result.generated_files:
+        console.print(f"Generated files excluded: {result.generated_files}")
 
     console.print("")
-    console.print(f"Routes found (changed files only): [bold]{len(result.routes)}[/bold]")
-    for r in result.routes[:50]:
+    console.print(f"Routes found (changed files only): [bold]{result.routes_found}[/bold]")
+    for r in result.routes:
         console.print(f"  {r.method:<6} {r.path:<35} -> {r.handler_name}")
-    if len(result.routes) > 50:
-        console.print(f"  … and {len(result.routes) - 50} more")
+    if result.routes_found > len(result.routes):
+        console.print(f"  … and {result.routes_found - len(result.routes)} more")
     console.print("")
     console.print(f"DB: {result.db_path}")
     console.print(f"Changed files: {result.changed_files}")
     console.print(f"Inserted routes: {result.inserted_routes}")
     console.print(f"Removed files: {result.removed_files}")
+    console.print(f"Bytes read: {result.bytes_read} ({result.files_read} files)")
+    if result.cache_hits:
+        console.print(f"Extraction cache hits: {result.cache_hits}")
+    if result.skipped_files:
+        print_skipped_files(repo_path, result)
+    if timings:
+        print_timings(result)
+    if tracer is not None:
+        profile_path = Path(profile).expanduser()
+        tracer.write(profile_path)
+        print_slowest_files(tracer, profile_top)
+        console.print(f"Profile written: {profile_path} (open in chrome://tracing, Perfetto or speedscope)")
     if result.scan_id is not None:
         console.print(f"Scan saved: {result.scan_id}")
         console.print("Tip: run [bold]sydes diff <repo> --last[/bold] to see changes.")
@@ -97,6 +164,96 @@ def analyze(
         console.print("[yellow]Scan snapshot failed (analyze still succeeded).[/yellow]")
 
 
+def print_skipped_files(repo_path: Path, result, limit: int = 10) -> None:
+    store = SydesSQLiteStore(Path(result.db_path), repo_root=repo_path, read_only=True)
+    skipped = store.list_skipped_files(limit=limit)
+    console.print(f"[yellow]Skipped files: {result.skipped_files}[/yellow] (no routes extracted)")
+    for row in skipped:
+        console.print(f"  {row['rel_path']}: {row['skip_reason']}")
+    console.print("  (retried once their content changes)")
+
+
+def print_timings(result) -> None:
+    stages = {st.name: st for st in result.stages}
+
+    table = Table(show_header=True, header_style="bold")
+    table.add_column("STAGE", no_wrap=True)
+    table.add_column("WALL s", justify="right")
+    table.add_column("CPU s", justify="right")
+    table.add_column("BYTES", justify="right")
+    table.add_column("FILES", justify="right")
+    table.add_column("UTIL", justify="right")
+    table.add_column("QUEUE max/avg", justify="right")
+
+    for t in result.timings:
+        st = stages.get(t.name)
+        # read/parse/write run concurrently inside "pipeline": busy time, indented
+        name = f"  {t.name}" if st is not None else t.name
+        util = f"{st.utilization(result.pipeline_wall_s):.0%} x{st.workers}" if st else ""
+        queue = f"{st.max_depth}/{st.mean_depth:.1f}" if st else ""
+        table.add_row(
+            name,
+            f"{t.wall_s:.3f}",
+            f"{t.cpu_s:.3f}",
+            str(t.bytes_read),
+            str(t.files),
+            util,
+            queue,
+        )
+
+    console.print("")
+    console.print(table)
+
+
+def print_slowest_files(tracer: Tracer, n: int) -> None:
+    slowest = tracer.slowest_files(n)
+    if not slowest:
+        return
+    stage_names = ["sniff", "fingerprint", "parse", "store"]
+
+    table = Table(show_header=True, header_style="bold", title=f"Slowest {len(slowest)} files")
+    table.add_column("FILE", overflow="fold")
+    table.add_column("TOTAL ms", justify="right")
+    for name in stage_names:
+        table.add_column(f"{name} ms", justify="right")
+    for c in slowest:
+        table.add_row(
+            c.path,
+            f"{c.total_s * 1000:.1f}",
+            *(f"{c.stages[name] * 1000:.1f}" if name in c.stages else "-" for name in stage_names),
+        )
+
+    console.print("")
+    console.print(table)
+
+
+def print_no_analysis(repo: str, repo_path: Path) -> None:
+    console.print(
+        Text("No analysis found for repository: ", style="red")
+        + Text(str(repo_path))
+    )
+    console.print("")
+    console.print("Run this first:")
+    console.print(Text(f"  sydes analyze {repo}", style="bold"))
+
+
+def open_store_read_only(repo: str, repo_path: Path, db_path: Path) -> SydesSQLiteStore:
+    """
+    Store for commands that only query: no schema setup or migration. A database
+    that needs an upgrade is reported (run `sydes analyze`) instead of read.
+    """
+    if not db_path.exists():
+        print_no_analysis(repo, repo_path)
+        raise typer.Exit(code=2)
+    store = SydesSQLiteStore(db_path, repo_root=repo_path, read_only=True)
+    try:
+        store.check_schema()
+    except SchemaVersionError as e:
+        console.print(Text(str(e), style="red"))
+        raise typer.Exit(code=2) from None
+    return store
+
+
 @endpoints_app.command("list", help="List API endpoints with optional filters")
 def endpoints_list(
     repo: str = typer.Argument(..., help="Path to the repo"),
@@ -110,7 +267,7 @@ def endpoints_list(
 ) -> None:
     repo_path = Path(repo).expanduser().resolve()
     db_path = SydesSQLiteStore.db_path_for_repo(repo_path)
-    store = SydesSQLiteStore(db_path, repo_root=repo_path)
+    store = open_store_read_only(repo, repo_path, db_path)
 
     rows = store.list_routes(
         method=method,
@@ -155,7 +312,7 @@ def scans_list(
 ) -> None:
     repo_path = Path(repo).expanduser().resolve()
     db_path = SydesSQLiteStore.db_path_for_repo(repo_path)
-    store = SydesSQLiteStore(db_path, repo_root=repo_path)
+    store = open_store_read_only(repo, repo_path, db_path)
 
     scans = store.list_scans(limit=limit)
 
@@ -182,10 +339,11 @@ def diff(
     to_scan: Optional[int] = typer.Option(None, help="To scan_id"),
     format: str = typer.Option("table", help="Output format: table|json"),
     limit: int = typer.Option(50, help="Max rows per section to print"),
+    count_only: bool = typer.Option(False, help="Only print the number of rows per section"),
 ) -> None:
     repo_path = Path(repo).expanduser().resolve()
     db_path = SydesSQLiteStore.db_path_for_repo(repo_path)
-    store = SydesSQLiteStore(db_path, repo_root=repo_path)
+    store = open_store_read_only(repo, repo_path, db_path)
 
     if last:
         scans = store.list_scans(limit=2)
@@ -206,9 +364,18 @@ def diff(
         from_id = int(from_scan)
         to_id = int(to_scan)
 
-    d = store.diff_scans(from_id, to_id)
+    if count_only:
+        counts = store.count_scan_diff(from_id, to_id)
+        if format.lower() == "json":
+            console.print(json.dumps({"from": from_id, "to": to_id, **counts}, indent=2))
+            return
+        console.print(f"[bold]Diff[/bold] from scan {from_id} -> {to_id}")
+        for kind, n in counts.items():
+            console.print(f"{kind}: {n}")
+        return
 
     if format.lower() == "json":
+        d = store.diff_scans(from_id, to_id)
         console.print(json.dumps({"from": from_id, "to": to_id, **d}, indent=2))
         return
 
@@ -216,38 +383,48 @@ def diff(
     console.print(f"[bold]Diff[/bold] from scan {from_id} -> {to_id}")
     console.print("")
 
-    def _print_section(title: str, rows: list[dict], cols: list[str]) -> None:
-        console.print(f"[bold]{title}:[/bold] {len(rows)}")
+    def _print_section(d: ScanDiff, title: str, kind: str, cols: list[str]) -> None:
+        # rows stream from the diff query: only the first `limit` are kept
         t = Table(show_header=True, header_style="bold")
         for c in cols:
             t.add_column(c)
-        for r in rows[:limit]:
-            t.add_row(*[str(r.get(c, "")) for c in cols])
+        total = 0
+        for r in d.iter(kind):
+            if total < limit:
+                t.add_row(*[str(r.get(c, "")) for c in cols])
+            total += 1
+        console.print(f"[bold]{title}:[/bold] {total}")
         console.print(t)
-        if len(rows) > limit:
-            console.print(f"  … and {len(rows) - limit} more")
+        if total > limit:
+            console.print(f"  … and {total - limit} more")
         console.print("")
 
-    _print_section(
-        "Added",
-        d["added"],
-        ["method", "http_path", "rel_path", "handler_name"],
-    )
-    _print_section(
-        "Removed",
-        d["removed"],
-        ["method", "http_path", "rel_path", "handler_name"],
-    )
-    _print_section(
-        "Moved",
-        d["moved"],
-        ["method", "http_path", "from_rel_path", "to_rel_path", "from_handler", "to_handler"],
-    )
-    _print_section(
-        "Handler changed",
-        d["handler_changed"],
-        ["method", "http_path", "rel_path", "from_handler", "to_handler"],
-    )
+    # both scans' sets are rebuilt once, for all four sections
+    with store.scan_diff(from_id, to_id) as d:
+        _print_section(
+            d,
+            "Added",
+            "added",
+            ["method", "http_path", "rel_path", "handler_name"],
+        )
+        _print_section(
+            d,
+            "Removed",
+            "removed",
+            ["method", "http_path", "rel_path", "handler_name"],
+        )
+        _print_section(
+            d,
+            "Moved",
+            "moved",
+            ["method", "http_path", "from_rel_path", "to_rel_path", "from_handler", "to_handler"],
+        )
+        _print_section(
+            d,
+            "Handler changed",
+            "handler_changed",
+            ["method", "http_path", "rel_path", "from_handler", "to_handler"],
+        )
 
 
 # graph commands you already have (unchanged from Phase 2.2)
@@ -258,17 +435,11 @@ def graph_stats(
 ) -> None:
     repo_path = Path(repo).expanduser().resolve()
     db_path = SydesSQLiteStore.db_path_for_repo(repo_path)
-    store = SydesSQLiteStore(db_path, repo_root=repo_path)
+    store = open_store_read_only(repo, repo_path, db_path)
 
     rows = store.list_routes(limit=100_000)
     if not rows:
-        console.print(
-            Text("No analysis found for repository: ", style="red")
-            + Text(str(repo_path))
-        )
-        console.print("")
-        console.print("Run this first:")
-        console.print(Text(f"  sydes analyze {repo}", style="bold"))
+        print_no_analysis(repo, repo_path)
         raise typer.Exit(code=2)
     result = build_endpoint_graph(rows)
     g = result.graph
@@ -296,18 +467,12 @@ def structure_export(
 ) -> None:
     repo_path = Path(repo).expanduser().resolve()
     db_path = SydesSQLiteStore.db_path_for_repo(repo_path)
-    store = SydesSQLiteStore(db_path, repo_root=repo_path)
+    store = open_store_read_only(repo, repo_path, db_path)
 
     rows = store.list_routes(limit=100_000)
     # Guard: require at least one analyzed route
     if not rows:
-        console.print(
-            Text("No analysis found for repository: ", style="red")
-            + Text(str(repo_path))
-        )
-        console.print("")
-        console.print("Run this first:")
-        console.print(Text(f"  sydes analyze {repo}", style="bold"))
+        print_no_analysis(repo, repo_path)
         raise typer.Exit(code=2)
 
     result = build_endpoint_graph(rows)
@@ -349,6 +514,48 @@ def structure_export(
 
     console.print(table)
 
+
+@structure_app.command(
+    "summary",
+    help="Show include_router edges and Depends usages recorded by the last analyze"
+)
+def structure_summary(
+    repo: str = typer.Argument(..., help="Path to the repo"),
+    format: str = typer.Option("table", help="Output format: table|json"),
+) -> None:
+    repo_path = Path(repo).expanduser().resolve()
+    db_path = SydesSQLiteStore.db_path_for_repo(repo_path)
+    store = open_store_read_only(repo, repo_path, db_path)
+
+    if not store.list_tracked_files():
+        print_no_analysis(repo, repo_path)
+        raise typer.Exit(code=2)
+
+    structure = store.get_structure()
+
+    console.print(f"[bold]DB:[/bold] {db_path}")
+
+    if format.lower() == "json":
+        console.print(json.dumps(structure, indent=2))
+        return
+
+    inc_table = Table(show_header=True, header_style="bold", title="include_router")
+    inc_table.add_column("FROM", no_wrap=True)
+    inc_table.add_column("ROUTER")
+    inc_table.add_column("PREFIX")
+    inc_table.add_column("FILE:LINE", no_wrap=True)
+    for r in structure["includes"]:
+        inc_table.add_row(r["from"], r["router"], r["prefix"] or "-", f"{r['rel_path']}:{r['line']}")
+    console.print(inc_table)
+
+    dep_table = Table(show_header=True, header_style="bold", title="Depends")
+    dep_table.add_column("NAME")
+    dep_table.add_column("FILE:LINE", no_wrap=True)
+    for d in structure["depends"]:
+        dep_table.add_row(d["name"], f"{d['rel_path']}:{d['line']}")
+    console.print(dep_table)
+
+
 def pretty_node_name(n) -> str:
     name = str(getattr(n, "name", n.id))
     # strip common prefixes
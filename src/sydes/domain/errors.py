@@ -1,2 +1,6 @@
 class SydesError(Exception):
     """Base error for sydes."""
+
+
+class SchemaVersionError(SydesError):
+    """The database was written with a schema this read-only open cannot use."""
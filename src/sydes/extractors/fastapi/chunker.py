@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 import ast
+import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Optional
 
 _HTTP_METHOD_ATTRS = {
     "get": "GET",
@@ -16,7 +17,12 @@ _HTTP_METHOD_ATTRS = {
 }
 
 
-@dataclass(frozen=True)
+# Bump whenever extraction output can change for the same input bytes: cached
+# results (sydes.store.extract_cache) are keyed by it.
+EXTRACTOR_VERSION = "fastapi-facts-1"
+
+
+@dataclass(frozen=True, slots=True)
 class RouteDecl:
     method: str
     path: str
@@ -27,77 +33,225 @@ class RouteDecl:
     file_path: str = ""
 
 
-def extract_routes_from_source(source: str) -> list[RouteDecl]:
+@dataclass(frozen=True, slots=True)
+class IncludeRouterDecl:
+    from_expr: str  # receiver of .include_router(...), e.g. "app"
+    router: str  # first positional arg, e.g. "users.router" ("-" if missing)
+    prefix: str
+    line: int
+
+
+@dataclass(frozen=True, slots=True)
+class DependsDecl:
+    name: str  # dependency callable, e.g. "get_db" ("Depends" if bare)
+    line: int
+
+
+@dataclass(frozen=True, slots=True)
+class AppDecl:
+    kind: str  # "FastAPI" | "APIRouter"
+    target: str  # assigned name, e.g. "app" / "router"
+    prefix: str
+    line: int
+
+
+@dataclass(frozen=True, slots=True)
+class FastAPIFacts:
+    routes: list[RouteDecl]
+    includes: list[IncludeRouterDecl]
+    depends: list[DependsDecl]
+    apps: list[AppDecl]
+
+
+_EMPTY_FACTS = FastAPIFacts(routes=[], includes=[], depends=[], apps=[])
+
+
+def extract_facts_from_source(source: str, file_path: str = "") -> FastAPIFacts:
     """
-    Parse Python source and extract FastAPI routes declared via decorators like:
-      @app.get("/path")
-      @router.post("/path")
+    Parse once and collect every FastAPI fact in a single traversal:
+      - routes from @<x>.<method>(...) decorators and <x>.add_api_route(...) calls
+      - <x>.include_router(...) calls
+      - Depends(...) references
+      - FastAPI(...) / APIRouter(...) instantiations assigned to a name
     Uses ast only; does not import/execute code.
+
+    `file_path` is interned and set on every route as it is built, so all routes of
+    a file share one string and none is rebuilt to attach it.
     """
     try:
         tree = ast.parse(source)
     except SyntaxError:
-        return []
+        return _EMPTY_FACTS
+
+    decorated: list[RouteDecl] = []
+    programmatic: list[RouteDecl] = []
+    includes: list[IncludeRouterDecl] = []
+    depends: list[DependsDecl] = []
+    apps: list[AppDecl] = []
+    file_path = sys.intern(file_path)
 
-    routes: list[RouteDecl] = []
-
-    for node in _iter_function_defs(tree):
-        handler_name = node.name
-        start_line = getattr(node, "lineno", 1) or 1
-        end_line = getattr(node, "end_lineno", start_line) or start_line
-
-        for dec in node.decorator_list:
-            maybe = _parse_fastapi_route_decorator(dec)
-            if maybe is None:
-                continue
-
-            method, path, decorator_line = maybe
-            routes.append(
-                RouteDecl(
-                    method=method,
-                    path=path,
-                    handler_name=handler_name,
-                    start_line=start_line,
-                    end_line=end_line,
-                    decorator_line=decorator_line,
-                )
-            )
-    # Also extract programmatic routes: app.add_api_route(...)
     for node in ast.walk(tree):
-        for (method, path, handler_name, line) in _parse_add_api_route_call(node):
-            # We don't know function span from this call; keep best-effort lines as the call line.
-            routes.append(
-                RouteDecl(
-                    method=method,
-                    path=path,
-                    handler_name=handler_name,
-                    start_line=line,
-                    end_line=line,
-                    decorator_line=line,
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            decorated.extend(_routes_from_function(node, file_path))
+        elif isinstance(node, ast.Call):
+            for (method, path, handler_name, line) in _parse_add_api_route_call(node):
+                # We don't know function span from this call; keep best-effort lines as the call line.
+                programmatic.append(
+                    RouteDecl(
+                        method=method,
+                        path=path,
+                        handler_name=handler_name,
+                        start_line=line,
+                        end_line=line,
+                        decorator_line=line,
+                        file_path=file_path,
+                    )
                 )
-            )
-
-
+            inc = _parse_include_router_call(node)
+            if inc is not None:
+                includes.append(inc)
+            dep = _parse_depends_call(node)
+            if dep is not None:
+                depends.append(dep)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            app = _parse_app_assignment(node)
+            if app is not None:
+                apps.append(app)
+
+    routes = decorated + programmatic
     # stable ordering: by decorator line, then handler name
     routes.sort(key=lambda r: (r.decorator_line, r.handler_name))
-    return routes
+    return FastAPIFacts(routes=routes, includes=includes, depends=depends, apps=apps)
 
 
-def extract_routes_from_file(path: Path, max_bytes: int = 500_000) -> list[RouteDecl]:
+def extract_routes_from_source(source: str) -> list[RouteDecl]:
+    """
+    Parse Python source and extract FastAPI routes declared via decorators like:
+      @app.get("/path")
+      @router.post("/path")
+    or programmatically via app.add_api_route(...).
+    """
+    return extract_facts_from_source(source).routes
+
+
+def _routes_from_function(node: ast.AST, file_path: str) -> list[RouteDecl]:
+    handler_name = node.name
+    start_line = getattr(node, "lineno", 1) or 1
+    end_line = getattr(node, "end_lineno", start_line) or start_line
+
+    out: list[RouteDecl] = []
+    for dec in node.decorator_list:
+        maybe = _parse_fastapi_route_decorator(dec)
+        if maybe is None:
+            continue
+
+        method, path, decorator_line = maybe
+        out.append(
+            RouteDecl(
+                method=method,
+                path=path,
+                handler_name=handler_name,
+                start_line=start_line,
+                end_line=end_line,
+                decorator_line=decorator_line,
+                file_path=file_path,
+            )
+        )
+    return out
+
+
+def extract_facts_from_file(
+    path: Path,
+    max_bytes: int = 500_000,
+    data: Optional[bytes] = None,
+) -> FastAPIFacts:
+    """
+    Extract all FastAPI facts from a file (routes carry `file_path`). Pass `data` when
+    the bytes were already read (e.g. from the pipeline's blob cache) to avoid opening
+    the file again.
+    """
     try:
-        data = path.read_bytes()[:max_bytes]
+        if data is None:
+            data = path.read_bytes()
+        data = data[:max_bytes]
         source = data.decode("utf-8", errors="ignore")
     except Exception:
-        return []
-    routes = extract_routes_from_source(source)
-    abs_path = str(path.resolve())
-    return [RouteDecl(**{**r.__dict__, "file_path": abs_path}) for r in routes]
+        return _EMPTY_FACTS
+    return extract_facts_from_source(source, file_path=str(path.resolve()))
 
 
-def _iter_function_defs(tree: ast.AST) -> Iterable[ast.AST]:
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            yield node
+def extract_routes_from_file(
+    path: Path,
+    max_bytes: int = 500_000,
+    data: Optional[bytes] = None,
+) -> list[RouteDecl]:
+    """
+    Extract routes from a file. Pass `data` when the bytes were already read
+    (e.g. from the pipeline's blob cache) to avoid opening the file again.
+    """
+    return extract_facts_from_file(path, max_bytes=max_bytes, data=data).routes
+
+
+def name_of_expr(node: ast.AST) -> str:
+    # best-effort stringify for common cases
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return f"{name_of_expr(node.value)}.{node.attr}"
+    if isinstance(node, ast.Call):
+        return name_of_expr(node.func)
+    if isinstance(node, ast.Subscript):
+        return name_of_expr(node.value)
+    return node.__class__.__name__
+
+
+def _parse_include_router_call(node: ast.Call) -> Optional[IncludeRouterDecl]:
+    # include_router: <something>.include_router(<router_expr>, prefix="...")
+    if not isinstance(node.func, ast.Attribute) or node.func.attr != "include_router":
+        return None
+    frm = name_of_expr(node.func.value)
+    router_expr = name_of_expr(node.args[0]) if node.args else ""
+    prefix = None
+    for kw in node.keywords:
+        if kw.arg == "prefix":
+            if isinstance(kw.value, ast.Constant) and isinstance(kw.value.value, str):
+                prefix = kw.value.value
+            else:
+                prefix = name_of_expr(kw.value)
+    return IncludeRouterDecl(
+        from_expr=frm,
+        router=router_expr or "-",
+        prefix=prefix or "",
+        line=getattr(node, "lineno", 1) or 1,
+    )
+
+
+def _parse_depends_call(node: ast.Call) -> Optional[DependsDecl]:
+    # Depends: Depends(x) or fastapi.Depends(x)
+    fn = name_of_expr(node.func)
+    if not fn.endswith("Depends"):
+        return None
+    name = name_of_expr(node.args[0]) if node.args else ""
+    return DependsDecl(name=name or "Depends", line=getattr(node, "lineno", 1) or 1)
+
+
+def _parse_app_assignment(node: ast.AST) -> Optional[AppDecl]:
+    # app = FastAPI(...) / router: APIRouter = fastapi.APIRouter(prefix="/x")
+    value = node.value
+    if not isinstance(value, ast.Call):
+        return None
+    kind = name_of_expr(value.func).rsplit(".", 1)[-1]
+    if kind not in ("FastAPI", "APIRouter"):
+        return None
+
+    targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+    target = name_of_expr(targets[0]) if targets else ""
+
+    prefix = ""
+    for kw in value.keywords:
+        if kw.arg == "prefix":
+            prefix = _const_str(kw.value) or name_of_expr(kw.value)
+    return AppDecl(kind=kind, target=target, prefix=prefix, line=getattr(node, "lineno", 1) or 1)
 
 
 def _parse_fastapi_route_decorator(dec: ast.AST) -> Optional[tuple[str, str, int]]:
@@ -161,13 +315,13 @@ def _const_str_list(node: ast.AST) -> Optional[list[str]]:
             s = _const_str(elt)
             if s is None:
                 return None
-            out.append(s.strip().upper())
+            out.append(sys.intern(s.strip().upper()))
         return out
 
     # methods="GET"
     s = _const_str(node)
     if s is not None:
-        return [s.strip().upper()]
+        return [sys.intern(s.strip().upper())]
 
     return None
 
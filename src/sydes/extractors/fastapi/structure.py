@@ -1,39 +1,34 @@
 from __future__ import annotations
 
-import ast
 import os
 from pathlib import Path
 from typing import Any
 
-
-def _iter_py_files(repo_root: Path) -> list[Path]:
-    out: list[Path] = []
-    for p in repo_root.rglob("*.py"):
-        # skip common junk
-        if any(part in (".venv", "venv", "__pycache__", ".git", ".sydes") for part in p.parts):
-            continue
-        out.append(p)
-    return out
+from sydes.extractors.fastapi.chunker import FastAPIFacts, extract_facts_from_source
+from sydes.repo.config import load_repo_config
+from sydes.repo.ignore import IgnoreMatcher
+from sydes.repo.scanner import scan_repo_files
 
 
-def _safe_parse(path: Path) -> ast.AST | None:
+def _iter_py_files(repo_root: Path) -> list[Path]:
+    # Same pruned walk as analyze (DEFAULT_IGNORES, .gitignore, [tool.sydes] ignore).
+    cfg = load_repo_config(repo_root)
+    ignore = IgnoreMatcher.for_repo(
+        repo_root, extra_globs=cfg.ignore, respect_gitignore=cfg.respect_gitignore
+    )
+    return [
+        Path(f.abs_path)
+        for f in scan_repo_files(repo_root, ignore=ignore)
+        if ".sydes" not in Path(f.rel_path).parts
+    ]
+
+
+def _safe_facts(path: Path) -> FastAPIFacts | None:
     try:
-        return ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+        source = path.read_text(encoding="utf-8")
     except Exception:
         return None
-
-
-def _name_of_expr(node: ast.AST) -> str:
-    # best-effort stringify for common cases
-    if isinstance(node, ast.Name):
-        return node.id
-    if isinstance(node, ast.Attribute):
-        return f"{_name_of_expr(node.value)}.{node.attr}"
-    if isinstance(node, ast.Call):
-        return _name_of_expr(node.func)
-    if isinstance(node, ast.Subscript):
-        return _name_of_expr(node.value)
-    return node.__class__.__name__
+    return extract_facts_from_source(source)
 
 
 def extract_fastapi_structure(repo_root: Path) -> dict[str, Any]:
@@ -41,6 +36,9 @@ def extract_fastapi_structure(repo_root: Path) -> dict[str, Any]:
     Deterministic structural signals:
       - include_router(...) edges
       - Depends(...) names
+
+    Parses the whole repo; `sydes analyze` keeps the same facts per file in the
+    store (see SydesSQLiteStore.get_structure), which is what the CLI reads.
     """
     repo_root = repo_root.resolve()
 
@@ -48,42 +46,22 @@ def extract_fastapi_structure(repo_root: Path) -> dict[str, Any]:
     depends: list[dict[str, str]] = []
 
     for f in _iter_py_files(repo_root):
-        tree = _safe_parse(f)
-        if tree is None:
+        facts = _safe_facts(f)
+        if facts is None:
             continue
 
         rel_path = os.path.relpath(str(f), str(repo_root))
-
-        for node in ast.walk(tree):
-            # include_router: <something>.include_router(<router_expr>, prefix="...")
-            if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
-                if node.func.attr == "include_router":
-                    frm = _name_of_expr(node.func.value)
-                    router_expr = _name_of_expr(node.args[0]) if node.args else ""
-                    prefix = None
-                    for kw in node.keywords:
-                        if kw.arg == "prefix":
-                            if isinstance(kw.value, ast.Constant) and isinstance(kw.value.value, str):
-                                prefix = kw.value.value
-                            else:
-                                prefix = _name_of_expr(kw.value)
-                    includes.append(
-                        {
-                            "from": frm,
-                            "router": router_expr or "-",
-                            "prefix": prefix or "",
-                            "rel_path": rel_path,
-                        }
-                    )
-
-            # Depends: Depends(x) or fastapi.Depends(x)
-            if isinstance(node, ast.Call):
-                fn = _name_of_expr(node.func)
-                if fn.endswith("Depends"):
-                    name = ""
-                    if node.args:
-                        name = _name_of_expr(node.args[0])
-                    depends.append({"name": name or "Depends", "rel_path": rel_path})
+        for inc in facts.includes:
+            includes.append(
+                {
+                    "from": inc.from_expr,
+                    "router": inc.router,
+                    "prefix": inc.prefix,
+                    "rel_path": rel_path,
+                }
+            )
+        for dep in facts.depends:
+            depends.append({"name": dep.name, "rel_path": rel_path})
 
     # de-dupe
     inc_seen = set()
@@ -1,15 +1,38 @@
 from __future__ import annotations
 
+import importlib
+import json
+import multiprocessing
 import os
 import subprocess
-from dataclasses import dataclass
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Iterable, Optional
-
-from sydes.extractors.fastapi.chunker import RouteDecl, extract_routes_from_file
+from typing import Generator, Iterable, Optional
+
+from sydes.extractors.fastapi.chunker import FastAPIFacts, RouteDecl, extract_facts_from_file
+from sydes.orchestrator.profile import Tracer
+from sydes.orchestrator.stages import PhaseClock, PhaseTiming, StageStats
+from sydes.orchestrator.workers import KillablePool, TaskTimeout
+from sydes.repo.blobs import BlobCache, FileBlob
+from sydes.repo.config import load_repo_config
 from sydes.repo.framework_detector import detect_python_framework
-from sydes.repo.scanner import scan_python_files, select_candidate_api_files
-from sydes.store.sqlite_store import FileStatus, SydesSQLiteStore, _now_ts
+from sydes.repo.generated import GeneratedFileDetector
+from sydes.repo.git_index import git_blob_id, git_blob_id_of_file, git_fingerprint
+from sydes.repo.ignore import IgnoreMatcher
+from sydes.repo.needles import STRUCTURE_GROUP, NeedleSniffer
+from sydes.repo.scanner import (
+    ScannedFile,
+    scan_git_files,
+    scan_repo_files,
+    select_candidate_api_files,
+)
+from sydes.store.extract_cache import DEFAULT_CACHE_MAX_BYTES, ExtractionCache
+from sydes.store.sqlite_store import FileStatus, SniffedFile, SydesSQLiteStore, _now_ts
 
 
 @dataclass(frozen=True)
@@ -25,6 +48,31 @@ class AnalyzeResult:
     db_path: str
     scan_id: int | None
     mode: str  # "full" | "git"
+    bytes_read: int = 0
+    files_read: int = 0
+    git_base: str | None = None  # base revision actually diffed in git mode
+    cache_hits: int = 0  # changed files whose facts came from the extraction cache
+    routes_found: int = 0  # routes extracted from changed files (`routes` may be truncated)
+    stages: tuple[StageStats, ...] = ()  # read / parse / write pipeline counters
+    pipeline_wall_s: float = 0.0  # wall time of the read -> parse -> write pipeline
+    # walk, detect, index, select, read, parse, write, pipeline, snapshot, total
+    timings: tuple[PhaseTiming, ...] = ()
+    skipped_files: int = 0  # changed files not extracted: over the byte/time budget or failed
+    generated_files: int = 0  # sniffed files excluded from candidates as generated code
+
+
+@dataclass(frozen=True)
+class FileEvent:
+    """
+    One processed file, as streamed by iter_analyze():
+      status="changed": re-extracted; `routes` is what is now stored for it
+      status="skipped": over the byte/time budget or failed to parse; stored with no routes
+      status="removed": no longer tracked (deleted, ignored, or no longer a candidate)
+    """
+
+    rel_path: str
+    routes: list[RouteDecl]
+    status: str
 
 
 def _best_effort_git_commit(repo_path: Path) -> str | None:
@@ -86,122 +134,808 @@ def _best_effort_git_changes(repo_path: Path, base_ref: str, to_ref: str) -> tup
         return set(), set()
 
 
-def run_analyze(
-    repo_path: Path,
-    max_files: int | None = None,
-    git_mode: bool = False,
-    git_base: str = "HEAD~1",
-    git_to: str = "HEAD",
-) -> AnalyzeResult:
-    repo_path = repo_path.resolve()
-    store = SydesSQLiteStore(SydesSQLiteStore.db_path_for_repo(repo_path), repo_root=repo_path)
-
-    py_files = scan_python_files(repo_path, max_files=max_files)
-    framework, confidence = detect_python_framework(py_files)
-    candidates = select_candidate_api_files(py_files, framework_hint=framework)
+def _git_commit_reachable(repo_path: Path, commit: str) -> bool:
+    try:
+        return (
+            subprocess.run(
+                ["git", "-C", str(repo_path), "cat-file", "-e", f"{commit}^{{commit}}"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            ).returncode
+            == 0
+        )
+    except Exception:
+        return False
 
-    changed_files = 0
-    inserted_routes = 0
-    removed_files = 0
-    mode = "git" if git_mode else "full"
 
-    # FULL mode: candidate set is the whole world, so we can remove stale tracked files safely.
-    if not git_mode:
-        disk_set = {os.path.relpath(str(Path(p).resolve()), str(repo_path)) for p in candidates}
-        tracked_files = set(store.list_tracked_files())
+def _best_effort_git_status(repo_path: Path) -> tuple[set[str], set[str]] | None:
+    """
+    Working-tree and staged changes vs HEAD, from `git status --porcelain -z`.
+    Returns (changed_files, deleted_files) as rel paths, or None if git is unavailable.
+    """
+    try:
+        if not (repo_path / ".git").exists():
+            return None
+        out = subprocess.check_output(
+            ["git", "-C", str(repo_path), "status", "--porcelain", "-z", "--untracked-files=all"],
+            stderr=subprocess.DEVNULL,
+        ).decode("utf-8", errors="surrogateescape")
+    except Exception:
+        return None
 
-        for stale_rel in tracked_files - disk_set:
-            store.remove_file(stale_rel)
-            removed_files += 1
+    changed: set[str] = set()
+    deleted: set[str] = set()
+    tokens = out.split("\0")
+    i = 0
+    while i < len(tokens):
+        entry = tokens[i]
+        i += 1
+        if len(entry) < 4:
+            continue
+        xy, path = entry[:2], entry[3:].replace("/", os.sep)
+        if "R" in xy or "C" in xy:
+            # "-z" renames/copies: "XY new\0old\0"
+            orig = tokens[i].replace("/", os.sep) if i < len(tokens) else ""
+            i += 1
+            if "R" in xy and orig:
+                deleted.add(orig)
+        if "D" in xy:
+            deleted.add(path)
+        else:
+            changed.add(path)
+    return changed, deleted
+
+
+# Per-file byte budget: larger changed files are recorded as skipped, not parsed.
+DEFAULT_MAX_FILE_BYTES = 2_000_000
+
+# Reporting order of AnalyzeResult.timings; read/parse/write are the concurrent
+# stages inside "pipeline".
+_TIMING_ORDER = (
+    "walk",
+    "detect",
+    "index",
+    "select",
+    "read",
+    "parse",
+    "write",
+    "pipeline",
+    "snapshot",
+    "total",
+)
+
+# meta key: paths that were dirty in the work tree when the last scan was taken
+_META_GIT_DIRTY = "git_dirty_paths"
+# meta key: generated-code rules the tracked files were last classified with ("" = off)
+_META_GENERATED_RULES = "generated_rules"
+# meta key: needle and generated-code rules the sniffed_files hits were computed with
+_META_SNIFF_RULES = "sniff_rules"
+
+
+@dataclass
+class _ReadResult:
+    kind: str  # "changed" | "skipped" (over budget) | "refresh" (same content, new stat) | "same" | "gone"
+    status: FileStatus | None = None
+    facts: FastAPIFacts | None = None  # extraction cache hit
+    parse: Future | None = None  # -> _ParseOutcome
 
-        candidates_to_process = candidates
 
-    else:
-        # GIT mode: only process changed candidates; do NOT delete "stale" files because
-        # they might just be unchanged. Only handle deletions explicitly from git.
-        changed_rel, deleted_rel = _best_effort_git_changes(repo_path, git_base, git_to)
+@dataclass(frozen=True)
+class _ParseOutcome:
+    facts: FastAPIFacts
+    start: float  # time.perf_counter() in the worker (system-wide monotonic clock)
+    end: float
+    cpu_s: float
+    pid: int
+    tid: int
+
+
+def _extract_facts_job(job: tuple[str, bytes]) -> _ParseOutcome:
+    # Top-level so it can be pickled into worker processes. One parse, one traversal
+    # per file: routes and the structural facts come back together, with when and where
+    # the parse ran so the parse stage can be reported and profiled.
+    path, data = job
+    t0, c0 = time.perf_counter(), time.thread_time()
+    # the byte budget was enforced upstream: parse everything that was handed over
+    facts = extract_facts_from_file(Path(path), max_bytes=len(data), data=data)
+    return _ParseOutcome(
+        facts=facts,
+        start=t0,
+        end=time.perf_counter(),
+        cpu_s=time.thread_time() - c0,
+        pid=os.getpid(),
+        tid=threading.get_ident(),
+    )
 
-        # remove deleted files if they were tracked
-        for d in deleted_rel:
-            store.remove_file(d)
-            removed_files += 1
 
-        # process only changed files that are in candidates
-        cand_rel = {os.path.relpath(str(Path(p).resolve()), str(repo_path)) for p in candidates}
-        changed_candidates_rel = sorted(changed_rel & cand_rel)
+def _describe(e: BaseException) -> str:
+    text = str(e) or type(e).__name__
+    return text if len(text) <= 200 else text[:197] + "..."
 
-        candidates_to_process = [str((repo_path / rel).resolve()) for rel in changed_candidates_rel]
 
-    collected_routes: list[RouteDecl] = []
+def _dedup_routes(routes: list[RouteDecl]) -> list[RouteDecl]:
+    # Dedup per file
+    seen = set()
+    deduped = []
+    for r in routes:
+        key = (r.method, r.path, r.handler_name, r.decorator_line)
+        if key in seen:
+            continue
+        seen.add(key)
+        deduped.append(r)
+    return deduped
+
+
+def _git_file_fingerprint(f: ScannedFile, blob: FileBlob) -> tuple[str, int, int]:
+    # Same shape as compute_file_fingerprint, keyed by git blob id: taken from the index
+    # when the file is clean, otherwise computed over the full working-tree content.
+    oid = f.git_oid
+    if not oid:
+        if len(blob.data) == blob.size_bytes:
+            oid = git_blob_id(blob.data)
+        else:
+            oid = git_blob_id_of_file(Path(f.abs_path))
+    return git_fingerprint(oid), blob.mtime_ns, blob.size_bytes
+
+
+def _stat_unchanged(
+    prev: FileStatus | SniffedFile, mtime_ns: int, size_bytes: int, inode: int
+) -> bool:
+    """
+    Trust an unchanged (mtime_ns, size, inode) triple, except for "racy" entries:
+    a file whose mtime is not older than the second we last hashed it could have been
+    rewritten within the same timestamp tick, so it is always re-hashed.
+    """
+    if not prev.stat_matches(mtime_ns, size_bytes, inode):
+        return False
+    return mtime_ns // 1_000_000_000 < prev.last_scanned_at
 
-    for p in candidates_to_process:
-        fpath = Path(p).resolve()
-        rel_path = os.path.relpath(str(fpath), str(repo_path))
 
-        if not fpath.exists() or not fpath.is_file():
-            # If file disappeared outside git detection, remove and continue
-            store.remove_file(rel_path)
-            removed_files += 1
-            continue
+def _in_paranoid_sample(rel_path: str, paranoid_every: int, run_seq: int) -> bool:
+    # Rotating sample: each run re-hashes ~1/N of stat-unchanged files, so every file
+    # is re-verified at least once every N runs.
+    if paranoid_every <= 0:
+        return False
+    return zlib.crc32(rel_path.encode("utf-8")) % paranoid_every == run_seq % paranoid_every
 
-        sha, mtime_ns, size_bytes = store.compute_file_fingerprint(fpath)
-        prev = store.get_file_status(rel_path)
-        if prev and prev.sha256 == sha:
-            continue
 
-        changed_files += 1
+def iter_analyze(
+    repo_path: Path,
+    max_files: int | None = None,
+    git_mode: bool = False,
+    git_base: str | None = None,
+    git_to: str = "HEAD",
+    trust_stat: bool = True,
+    paranoid_every: int = 0,
+    workers: int = 1,
+    scan_workers: int = 8,
+    read_workers: int = 4,
+    use_git_index: bool = False,
+    cache_dir: Path | None = None,
+    cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+    tracer: Tracer | None = None,
+    max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+    file_timeout_s: float | None = None,
+) -> Generator[FileEvent, None, AnalyzeResult]:
+    """
+    Scan the repo, extract routes from changed candidate files and snapshot a scan,
+    yielding a FileEvent as each file is written to the store. Nothing is accumulated
+    per route, and file buffers kept from sniffing until the read stage are capped
+    (see BlobCache), so memory stays bounded on cold scans too. The generator's return
+    value (StopIteration.value) is the run summary, with `routes` left empty.
+
+    git_mode: only process files changed in git. The base defaults to the commit of the
+        last stored scan (plus files that were dirty then); working-tree and staged
+        changes are included when git_to is HEAD. Falls back to a full scan if there is
+        no usable recorded commit.
+
+    trust_stat: skip reading/hashing tracked files whose stored (mtime_ns, size, inode)
+        still matches the filesystem, and reuse the stored needle hits of any walked
+        file (candidate or not) whose triple matches instead of reading it.
+    paranoid_every: with trust_stat, still re-hash a rotating 1/N sample of those files
+        on every run (0 disables).
+    workers: parse/extract changed files on a process pool of this size (1 = one
+        background thread, so parsing still overlaps reading and writing).
+    read_workers: threads reading and fingerprinting changed files ahead of the parser.
+    scan_workers: threads used to list directories concurrently during the walk.
+    use_git_index: enumerate files from `git ls-files` and fingerprint them by git blob id
+        (clean tracked files need no read at all); falls back to a walk outside git.
+    cache_dir: directory of the content-addressed extraction cache shared across repos,
+        branches and worktrees (see sydes.store.extract_cache); None disables it.
+    cache_max_bytes: LRU-evict cache entries beyond this total payload size.
+    tracer: record per-file / per-stage spans for `--profile` (see orchestrator.profile).
+    max_file_bytes: changed files larger than this are not parsed; they are stored as
+        skipped (with their full-content fingerprint) until their content changes.
+    file_timeout_s: per-file parse time budget. Parsing then runs in killable worker
+        processes; a file over budget is stored as skipped. None disables the budget.
+    """
+    repo_path = repo_path.resolve()
+    store = SydesSQLiteStore(SydesSQLiteStore.db_path_for_repo(repo_path), repo_root=repo_path)
 
-        routes: list[RouteDecl] = []
-        source = "unknown"
-        if framework == "fastapi":
-            routes = extract_routes_from_file(fpath)
-            source = "ast"
+    # Every file is opened at most once per run; all stages share the cached bytes.
+    blobs = BlobCache()
+    clock = PhaseClock(blobs, tracer)
+    run_w0, run_c0 = time.perf_counter(), time.process_time()
+
+    # One connection for the whole run (closed with PRAGMA optimize at the end);
+    # per-file writes are batched into a few large transactions instead of one
+    # commit (and WAL fsync) per statement.
+    with store, store.session():
+        config = load_repo_config(repo_path)
+        ignore = IgnoreMatcher.for_repo(
+            repo_path, extra_globs=config.ignore, respect_gitignore=config.respect_gitignore
+        )
 
-        # Dedup per file
-        seen = set()
-        deduped = []
-        for r in routes:
-            key = (r.method, r.path, r.handler_name, r.decorator_line)
-            if key in seen:
-                continue
-            seen.add(key)
-            deduped.append(r)
-        routes = deduped
-
-        inserted_routes += store.replace_routes_for_file(rel_path, routes, source=source)
-        store.upsert_file_status(
-            FileStatus(
-                rel_path=rel_path,
-                sha256=sha,
-                mtime_ns=mtime_ns,
-                size_bytes=size_bytes,
-                last_scanned_at=_now_ts(),
+        # Work-tree state now; recorded with this scan so the next git-mode run can
+        # re-check files that were dirty at this point.
+        worktree = _best_effort_git_status(repo_path)
+        prev_dirty: set[str] = set()
+        if git_mode and git_base is None:
+            git_base = store.last_scan_commit()
+            if git_base is None or not _git_commit_reachable(repo_path, git_base):
+                # no trustworthy baseline: only a full scan is safe
+                git_mode = False
+                git_base = None
+            else:
+                prev_dirty = set(json.loads(store.get_meta(_META_GIT_DIRTY) or "[]"))
+        with clock.phase("walk") as timing:
+            scanned = None
+            if use_git_index:
+                # git already applied .gitignore; only user globs and DEFAULT_IGNORES remain
+                scanned = scan_git_files(
+                    repo_path,
+                    max_files=max_files,
+                    ignore=IgnoreMatcher.for_repo(
+                        repo_path, extra_globs=config.ignore, respect_gitignore=False
+                    ),
+                )
+            if scanned is None:
+                use_git_index = False
+                scanned = scan_repo_files(
+                    repo_path,
+                    max_files=max_files,
+                    workers=scan_workers,
+                    ignore=ignore,
+                    tracer=tracer,
+                )
+            py_files = [f.abs_path for f in scanned]
+            timing.files = len(scanned)
+
+        detector: GeneratedFileDetector | None = None
+        generated_rules = ""
+        if config.detect_generated:
+            detector = GeneratedFileDetector(
+                markers=config.generated_markers,
+                patterns=config.generated_patterns,
+                max_line_length=config.generated_max_line_length,
+            )
+            generated_rules = json.dumps(
+                [
+                    config.generated_markers,
+                    config.generated_patterns,
+                    detector.head_bytes,
+                    config.generated_max_line_length,
+                ]
+            )
+        run_seq = 0
+        if trust_stat or use_git_index:
+            latest = store.list_scans(limit=1)
+            run_seq = latest[0].scan_id + 1 if latest else 0
+
+        with clock.phase("detect"):
+            # One multi-needle pass per file, shared by detection and candidate selection.
+            sniffer = NeedleSniffer(blobs, tracer=tracer)
+            # Hits persisted for stat-unchanged files stand in for reading them, as long
+            # as the needles (and generated-code rules) they were computed with still hold.
+            sniff_rules = json.dumps(
+                [sniffer.matcher.groups, sniffer.max_bytes, generated_rules], sort_keys=True
+            )
+            sniff_index: dict[str, SniffedFile] = {}
+            seeded: dict[str, SniffedFile] = {}
+            if trust_stat:
+                sniff_index = store.load_sniffed_files()
+                if store.get_meta(_META_SNIFF_RULES) == sniff_rules:
+                    for f in scanned:
+                        e = sniff_index.get(f.rel_path)
+                        if (
+                            e is not None
+                            and not _in_paranoid_sample(f.rel_path, paranoid_every, run_seq)
+                            and _stat_unchanged(e, f.mtime_ns, f.size_bytes, f.inode)
+                        ):
+                            sniffer.seed(f.abs_path, e.hits)
+                            seeded[f.abs_path] = e
+            framework, confidence = detect_python_framework(py_files, sniffer=sniffer)
+
+        with clock.phase("index") as timing:
+            # One read of the files table; every per-file status lookup below is in memory.
+            file_index = store.load_file_index()
+
+            # Known-unchanged: tracked candidates whose git blob id or stat triple still
+            # matches keep their stored fingerprint and candidate status without being read,
+            # sniffed or hashed.
+            unchanged: set[str] = set()
+            to_sniff: list[str] = py_files
+            if trust_stat or use_git_index:
+                to_sniff = []
+                for f in scanned:
+                    prev = file_index.get(f.rel_path)
+                    if prev is not None and (
+                        (f.git_oid and prev.sha256 == git_fingerprint(f.git_oid))
+                        or (
+                            trust_stat
+                            and not _in_paranoid_sample(f.rel_path, paranoid_every, run_seq)
+                            and _stat_unchanged(prev, f.mtime_ns, f.size_bytes, f.inode)
+                        )
+                    ):
+                        unchanged.add(f.abs_path)
+                        blobs.discard(f.abs_path)
+                        continue
+                    to_sniff.append(f.abs_path)
+
+            timing.files = len(scanned)
+
+        with clock.phase("select") as timing:
+            # Files with include_router / Depends are candidates whatever the framework,
+            # so their structural facts are stored (hits are cached from detection).
+            structure = {p for p in to_sniff if sniffer.hits(p)[STRUCTURE_GROUP]}
+            sniffed = structure | set(
+                select_candidate_api_files(
+                    [p for p in to_sniff if p not in structure],
+                    framework_hint=framework,
+                    blobs=blobs,
+                    sniffer=sniffer,
+                )
+            )
+            # Machine-written modules (protobuf/gRPC stubs, generated clients, migrations)
+            # often mention routers; classify them from name and head bytes (still
+            # cached from the sniff) and keep them away from the parser.
+            generated: set[str] = set()
+            checked = set(sniffed)
+            if detector is not None:
+                for p in sorted(sniffed):
+                    e = seeded.get(p)
+                    if e is not None and e.generated is not None:
+                        is_generated = e.generated
+                    else:
+                        is_generated = bool(detector.reason(p, blobs.read(p)))
+                    if is_generated:
+                        generated.add(p)
+                        blobs.discard(p)
+                # Tracked candidates skipped the sniff. Their content was classified when
+                # it was last read, so only the (free) name check runs, unless the rules
+                # changed since: then their heads are read again, once.
+                recheck = store.get_meta(_META_GENERATED_RULES) != generated_rules
+                for p in sorted(unchanged):
+                    if detector.reason(p, None) or (recheck and detector.reason_for_file(p)):
+                        generated.add(p)
+                sniffed -= generated
+                unchanged -= generated
+            generated_files = len(generated)
+            generated_rel = {f.rel_path for f in scanned if f.abs_path in generated}
+            candidates = [f for f in scanned if f.abs_path in unchanged or f.abs_path in sniffed]
+
+            if trust_stat:
+                # Record what was sniffed from disk this run; seeded entries stay as they
+                # are (their stat still matches), unless they just got their content checked.
+                now = _now_ts()
+                upsert: list[SniffedFile] = []
+                for f in scanned:
+                    p = f.abs_path
+                    gen: bool | None = None
+                    if detector is not None and p in checked:
+                        gen = p in generated
+                    e = seeded.get(p)
+                    if e is not None:
+                        if e.generated is None and gen is not None:
+                            upsert.append(replace(e, generated=gen))
+                        continue
+                    h = sniffer.known(p)
+                    if h is None:  # tracked and unchanged, outside the detection sample
+                        continue
+                    upsert.append(
+                        SniffedFile(
+                            rel_path=f.rel_path,
+                            mtime_ns=f.mtime_ns,
+                            size_bytes=f.size_bytes,
+                            inode=f.inode,
+                            hits={g: n for g, n in h.items() if n},
+                            generated=gen,
+                            last_scanned_at=now,
+                        )
+                    )
+                if store.get_meta(_META_SNIFF_RULES) == sniff_rules:
+                    drop = sniff_index.keys() - {f.rel_path for f in scanned}
+                else:
+                    drop = set(sniff_index)
+                store.update_sniffed_files(upsert, drop)
+
+            timing.files = len(to_sniff)
+
+        changed_files = 0
+        inserted_routes = 0
+        removed_files = 0
+        mode = "git" if git_mode else "full"
+
+        # FULL mode: candidate set is the whole world, so we can remove stale tracked files safely.
+        if not git_mode:
+            disk_set = {f.rel_path for f in candidates}
+            for stale_rel in sorted(file_index.keys() - disk_set):
+                store.remove_file(stale_rel)
+                removed_files += 1
+                yield FileEvent(rel_path=stale_rel, routes=[], status="removed")
+
+            candidates_to_process = candidates
+
+        else:
+            # GIT mode: only process changed candidates; do NOT delete "stale" files because
+            # they might just be unchanged. Only handle deletions explicitly from git.
+            changed_rel, deleted_rel = _best_effort_git_changes(repo_path, git_base, git_to)
+            if git_to == "HEAD" and worktree is not None:
+                changed_rel |= worktree[0]
+                deleted_rel |= worktree[1]
+            changed_rel |= prev_dirty
+            # a path can be both (e.g. deleted in a commit, re-created in the work tree):
+            # the disk decides
+            deleted_rel = {d for d in deleted_rel if not (repo_path / d).exists()}
+
+            # remove deleted and now-generated files if they were tracked
+            for d in sorted(deleted_rel | generated_rel):
+                if d in file_index:
+                    store.remove_file(d)
+                    removed_files += 1
+                    yield FileEvent(rel_path=d, routes=[], status="removed")
+
+            # process only changed files that are in candidates
+            candidates_to_process = [f for f in candidates if f.rel_path in changed_rel]
+
+            # unchanged candidates will not be fingerprinted; release their buffers
+            for f in candidates:
+                if f.rel_path not in changed_rel:
+                    blobs.discard(f.abs_path)
+
+        routes_found = 0
+        skipped_files = 0
+
+        # Changed files flow through three concurrent stages:
+        #   read:  `read_workers` threads read, fingerprint and compare each file, look it
+        #          up in the extraction cache and hand misses straight to the parse pool
+        #   parse: a process pool (`workers` > 1) or one background thread
+        #   write: this generator, the only thread that touches the store
+        # At most `queue_size` files are in flight between the first and the last stage
+        # (backpressure), and results are written in candidate order, so output matches
+        # a serial run exactly. Disk I/O, parsing and SQLite writes overlap, and a cold
+        # full scan is bounded by the slowest stage rather than their sum.
+        queue_size = max(64, workers * 16)
+        read_stats = StageStats("read", workers=read_workers)
+        parse_stats = StageStats("parse", workers=workers if workers > 1 else 1)
+        write_stats = StageStats("write", workers=1)
+        parse_inflight = 0
+        inflight_lock = threading.Lock()
+
+        parse_pool: Executor | None = None
+        cache: ExtractionCache | None = None
+        if framework == "fastapi" or structure:
+            if file_timeout_s:
+                # killable workers: a file that blows its time budget costs its worker,
+                # never the run
+                parse_pool = KillablePool(
+                    workers=max(1, workers),
+                    timeout_s=file_timeout_s,
+                    # import the parser before the worker reports ready, so start-up
+                    # is not charged to the first file's budget
+                    initializer=importlib.import_module,
+                    initargs=(__name__,),
+                )
+            elif workers > 1:
+                # workers start lazily from reader threads, next to an open SQLite
+                # connection: fork is unsafe there (see KillablePool)
+                parse_pool = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                parse_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sydes-parse")
+            if cache_dir is not None:
+                cache = ExtractionCache(cache_dir, max_bytes=cache_max_bytes)
+        read_pool = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="sydes-read")
+
+        def _parse_done(_fut: Future) -> None:
+            nonlocal parse_inflight
+            with inflight_lock:
+                parse_inflight -= 1
+
+        def _read(f: ScannedFile) -> _ReadResult:
+            nonlocal parse_inflight
+            t0, c0 = time.perf_counter(), time.thread_time()
+            nbytes = 0
+            try:
+                blob = blobs.get(f.abs_path)
+                if blob is None:
+                    # file disappeared (or became unreadable) since the walk
+                    return _ReadResult(kind="gone")
+                blobs.discard(blob.path)
+                nbytes = len(blob.data)
+
+                if use_git_index:
+                    sha, mtime_ns, size_bytes = _git_file_fingerprint(f, blob)
+                else:
+                    sha, mtime_ns, size_bytes = store.compute_file_fingerprint(
+                        Path(f.abs_path), blob=blob
+                    )
+                status = FileStatus(
+                    rel_path=f.rel_path,
+                    sha256=sha,
+                    mtime_ns=mtime_ns,
+                    size_bytes=size_bytes,
+                    last_scanned_at=_now_ts(),
+                    inode=blob.inode,
+                )
+                prev = file_index.get(f.rel_path)
+                if prev and prev.sha256 == sha:
+                    if not _stat_unchanged(prev, mtime_ns, size_bytes, blob.inode):
+                        # content unchanged (touched, checked out again, or racy): refresh
+                        # the stat triple so the next run can take the fast path
+                        return _ReadResult(kind="refresh", status=status)
+                    return _ReadResult(kind="same")
+
+                res = _ReadResult(kind="changed", status=status)
+                # outside FastAPI repos only files with structural facts are parsed
+                parse = parse_pool is not None and (
+                    framework == "fastapi" or f.abs_path in structure
+                )
+                if parse and size_bytes > max_file_bytes:
+                    res.kind = "skipped"
+                    res.status = replace(
+                        status, skip_reason=f"too large: {size_bytes} bytes > {max_file_bytes}"
+                    )
+                elif parse:
+                    # identical bytes were already parsed somewhere (another branch,
+                    # worktree, repo, or a rename): reuse the cached facts
+                    if cache is not None:
+                        res.facts = cache.get(sha, file_path=f.abs_path)
+                    if res.facts is None:
+                        with inflight_lock:
+                            parse_inflight += 1
+                        data = blob.data
+                        if len(data) < size_bytes:
+                            # within budget but larger than the shared read buffer
+                            data = Path(f.abs_path).read_bytes()
+                        res.parse = parse_pool.submit(_extract_facts_job, (f.abs_path, data))
+                        res.parse.add_done_callback(_parse_done)
+                return res
+            finally:
+                end = time.perf_counter()
+                read_stats.record(end - t0, time.thread_time() - c0, nbytes)
+                if tracer is not None:
+                    tracer.add("fingerprint", "file", t0, end, path=f.abs_path)
+
+        pending: deque[tuple[ScannedFile, Future]] = deque()
+        todo = iter([f for f in candidates_to_process if f.abs_path not in unchanged])
+        started = time.perf_counter()
+        pipeline_c0, pipeline_b0 = time.process_time(), blobs.bytes_read
+
+        try:
+            while True:
+                while len(pending) < queue_size:
+                    f = next(todo, None)
+                    if f is None:
+                        break
+                    pending.append((f, read_pool.submit(_read, f)))
+                if not pending:
+                    break
+
+                read_stats.sample_depth(sum(1 for _, fut in pending if not fut.done()))
+                parse_stats.sample_depth(parse_inflight)
+                write_stats.sample_depth(len(pending))
+
+                f, fut = pending.popleft()
+                res: _ReadResult = fut.result()
+                facts = res.facts
+                outcome: _ParseOutcome | None = None
+                if res.parse is not None:
+                    try:
+                        outcome = res.parse.result()
+                    except TaskTimeout:
+                        res.kind = "skipped"
+                        res.status = replace(
+                            res.status, skip_reason=f"timed out: > {file_timeout_s:g}s"
+                        )
+                    except Exception as e:
+                        # one bad file (RecursionError on deeply nested code, a crashed
+                        # worker, ...) is recorded and skipped instead of failing the run
+                        res.kind = "skipped"
+                        res.status = replace(res.status, skip_reason=f"failed: {_describe(e)}")
+                if outcome is not None:
+                    facts = outcome.facts
+                    parse_stats.record(outcome.end - outcome.start, outcome.cpu_s)
+                    if tracer is not None:
+                        tracer.add(
+                            "parse",
+                            "file",
+                            outcome.start,
+                            outcome.end,
+                            pid=outcome.pid,
+                            tid=outcome.tid,
+                            lane="sydes-parse",
+                            path=f.abs_path,
+                        )
+                    if cache is not None:
+                        cache.put(res.status.sha256, facts)
+
+                t0, c0 = time.perf_counter(), time.thread_time()
+                event: FileEvent | None = None
+                if res.kind == "gone":
+                    if f.rel_path in file_index:
+                        store.remove_file(f.rel_path)
+                        removed_files += 1
+                        event = FileEvent(rel_path=f.rel_path, routes=[], status="removed")
+                elif res.kind == "refresh":
+                    store.upsert_file_status(res.status)
+                    store.unit_done()
+                elif res.kind == "changed":
+                    changed_files += 1
+                    routes = (
+                        _dedup_routes(facts.routes)
+                        if facts is not None and framework == "fastapi"
+                        else []
+                    )
+                    inserted_routes += store.replace_routes_for_file(
+                        f.rel_path, routes, source="ast" if framework == "fastapi" else "unknown"
+                    )
+                    store.replace_structure_for_file(
+                        f.rel_path,
+                        facts.includes if facts is not None else [],
+                        facts.depends if facts is not None else [],
+                    )
+                    store.upsert_file_status(res.status)
+                    store.unit_done()
+                    routes_found += len(routes)
+                    event = FileEvent(rel_path=f.rel_path, routes=routes, status="changed")
+                elif res.kind == "skipped":
+                    # recorded with its fingerprint: not retried until the content changes
+                    changed_files += 1
+                    skipped_files += 1
+                    store.replace_routes_for_file(f.rel_path, [], source="ast")
+                    store.replace_structure_for_file(f.rel_path, [], [])
+                    store.upsert_file_status(res.status)
+                    store.unit_done()
+                    event = FileEvent(rel_path=f.rel_path, routes=[], status="skipped")
+                end = time.perf_counter()
+                write_stats.record(end - t0, time.thread_time() - c0)
+                if tracer is not None:
+                    tracer.add("store", "file", t0, end, path=f.abs_path)
+
+                if event is not None:
+                    yield event
+        finally:
+            for _, fut in pending:
+                fut.cancel()
+            read_pool.shutdown(wait=True, cancel_futures=True)
+            if parse_pool is not None:
+                parse_pool.shutdown(wait=True, cancel_futures=True)
+            if cache is not None:
+                cache.close()
+        pipeline_wall_s = time.perf_counter() - started
+        if tracer is not None:
+            tracer.add("pipeline", "phase", started, started + pipeline_wall_s)
+        # includes the time the consumer of iter_analyze holds each event
+        clock.phases.append(
+            PhaseTiming(
+                "pipeline",
+                wall_s=pipeline_wall_s,
+                cpu_s=time.process_time() - pipeline_c0,
+                bytes_read=blobs.bytes_read - pipeline_b0,
+                files=read_stats.items,
             )
         )
-        collected_routes.extend(routes)
-
-    rel_candidates = [
-        os.path.relpath(str(Path(p).resolve()), str(repo_path)) for p in candidates
-    ]
 
-    scan_id: int | None = None
-    git_commit = _best_effort_git_commit(repo_path)
-    try:
-        scan_id = store.create_scan(git_commit=git_commit)
-        store.snapshot_current_endpoints(scan_id)
-    except Exception:
-        scan_id = None
+        rel_candidates = [f.rel_path for f in candidates]
+
+        store.set_meta(_META_GENERATED_RULES, generated_rules)
+        if trust_stat:
+            store.set_meta(_META_SNIFF_RULES, sniff_rules)
+        if worktree is not None:
+            store.set_meta(_META_GIT_DIRTY, json.dumps(sorted(worktree[0] | worktree[1])))
+
+        scan_id: int | None = None
+        with clock.phase("snapshot"):
+            git_commit = _best_effort_git_commit(repo_path)
+            try:
+                scan_id = store.create_scan(git_commit=git_commit)
+                store.snapshot_current_endpoints(scan_id)
+            except Exception:
+                scan_id = None
+
+        phases = {t.name: t for t in clock.phases}
+        for st in (read_stats, parse_stats, write_stats):
+            phases[st.name] = st.timing()
+        phases["total"] = PhaseTiming(
+            "total",
+            wall_s=time.perf_counter() - run_w0,
+            cpu_s=time.process_time() - run_c0,
+            bytes_read=blobs.bytes_read,
+            files=len(py_files),
+        )
+        timings = tuple(phases[name] for name in _TIMING_ORDER if name in phases)
+        if scan_id is not None:
+            # stored with the scan so performance can be charted from the DB itself
+            store.set_scan_timings(scan_id, [t.to_dict() for t in timings])
 
     return AnalyzeResult(
         framework=framework,
         confidence=confidence,
         files_scanned=len(py_files),
         candidate_files=rel_candidates,
-        routes=collected_routes,
+        routes=[],
         changed_files=changed_files,
         inserted_routes=inserted_routes,
         removed_files=removed_files,
         db_path=str(store.db_path),
         scan_id=scan_id,
         mode=mode,
+        bytes_read=blobs.bytes_read,
+        files_read=blobs.files_read,
+        git_base=git_base if git_mode else None,
+        cache_hits=cache.hits if cache is not None else 0,
+        routes_found=routes_found,
+        stages=(read_stats, parse_stats, write_stats),
+        pipeline_wall_s=pipeline_wall_s,
+        timings=timings,
+        skipped_files=skipped_files,
+        generated_files=generated_files,
+    )
+
+
+def run_analyze(
+    repo_path: Path,
+    max_files: int | None = None,
+    git_mode: bool = False,
+    git_base: str | None = None,
+    git_to: str = "HEAD",
+    trust_stat: bool = True,
+    paranoid_every: int = 0,
+    workers: int = 1,
+    scan_workers: int = 8,
+    read_workers: int = 4,
+    use_git_index: bool = False,
+    cache_dir: Path | None = None,
+    cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+    tracer: Tracer | None = None,
+    max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+    file_timeout_s: float | None = None,
+    route_limit: int | None = None,
+) -> AnalyzeResult:
+    """
+    Run iter_analyze() to completion and return its summary, with the routes of changed
+    files collected into `routes` (at most `route_limit` of them; None keeps all).
+    See iter_analyze() for the other parameters.
+    """
+    events = iter_analyze(
+        repo_path,
+        max_files=max_files,
+        git_mode=git_mode,
+        git_base=git_base,
+        git_to=git_to,
+        trust_stat=trust_stat,
+        paranoid_every=paranoid_every,
+        workers=workers,
+        scan_workers=scan_workers,
+        read_workers=read_workers,
+        use_git_index=use_git_index,
+        cache_dir=cache_dir,
+        cache_max_bytes=cache_max_bytes,
+        tracer=tracer,
+        max_file_bytes=max_file_bytes,
+        file_timeout_s=file_timeout_s,
     )
+    routes: list[RouteDecl] = []
+    while True:
+        try:
+            event = next(events)
+        except StopIteration as done:
+            result: AnalyzeResult = done.value
+            break
+        if route_limit is None:
+            routes.extend(event.routes)
+        elif len(routes) < route_limit:
+            routes.extend(event.routes[: route_limit - len(routes)])
+    return replace(result, routes=routes)
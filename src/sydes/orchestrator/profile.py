@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+@dataclass
+class FileCost:
+    path: str
+    total_s: float = 0.0
+    stages: dict[str, float] = field(default_factory=dict)  # stage -> seconds
+
+
+class Tracer:
+    """
+    Collects spans for `sydes analyze --profile` in Chrome trace event format
+    (loadable in chrome://tracing, Perfetto and speedscope).
+
+    Spans carry the pid/tid they ran on, so reader threads, the writer and parse
+    worker processes each get their own lane. Per-file spans use cat="file" and a
+    `path` arg; slowest_files() ranks files by their summed span time.
+    Timestamps come from time.perf_counter(), a system-wide monotonic clock, so
+    spans measured inside worker processes line up with the parent's.
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self._t0 = time.perf_counter()
+        self._root = str(root) + os.sep if root is not None else ""
+        self._events: list[dict] = []
+        self._lanes: dict[tuple[int, int], str] = {}
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        name: str,
+        cat: str,
+        start: float,
+        end: float,
+        pid: Optional[int] = None,
+        tid: Optional[int] = None,
+        lane: Optional[str] = None,
+        **args: object,
+    ) -> None:
+        if pid is None:
+            pid = os.getpid()
+        if tid is None:
+            tid = threading.get_ident()
+            lane = lane or threading.current_thread().name
+        path = args.get("path")
+        if isinstance(path, str) and self._root and path.startswith(self._root):
+            args["path"] = path[len(self._root):]
+        ev = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": (start - self._t0) * 1e6,
+            "dur": max(0.0, end - start) * 1e6,
+            "pid": pid,
+            "tid": tid,
+        }
+        if args:
+            ev["args"] = args
+        with self._lock:
+            self._events.append(ev)
+            if lane and (pid, tid) not in self._lanes:
+                self._lanes[(pid, tid)] = lane
+
+    @contextmanager
+    def span(self, name: str, cat: str = "file", **args: object) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, cat, start, time.perf_counter(), **args)
+
+    def slowest_files(self, n: int = 10) -> list[FileCost]:
+        costs: dict[str, FileCost] = {}
+        with self._lock:
+            events = list(self._events)
+        for ev in events:
+            if ev["cat"] != "file":
+                continue
+            path = ev["args"]["path"]
+            c = costs.get(path)
+            if c is None:
+                c = costs[path] = FileCost(path)
+            secs = ev["dur"] / 1e6
+            c.total_s += secs
+            c.stages[ev["name"]] = c.stages.get(ev["name"], 0.0) + secs
+        return sorted(costs.values(), key=lambda c: (-c.total_s, c.path))[:n]
+
+    def to_chrome(self) -> dict[str, object]:
+        main_pid = os.getpid()
+        with self._lock:
+            events = list(self._events)
+            lanes = dict(self._lanes)
+        meta: list[dict] = []
+        for pid in sorted({ev["pid"] for ev in events} | {main_pid}):
+            meta.append(
+                {
+                    "name": "process_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": 0,
+                    "args": {"name": "sydes" if pid == main_pid else f"sydes parse worker {pid}"},
+                }
+            )
+        for (pid, tid), lane in sorted(lanes.items()):
+            meta.append(
+                {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": lane}}
+            )
+        events.sort(key=lambda ev: ev["ts"])
+        return {"traceEvents": meta + events, "displayTimeUnit": "ms"}
+
+    def write(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_chrome()), encoding="utf-8")
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from sydes.orchestrator.profile import Tracer
+from sydes.repo.blobs import BlobCache
+
+
+@dataclass
+class PhaseTiming:
+    """
+    Cost of one part of an analyze run.
+
+    Sequential phases (walk, detect, index, select, pipeline, snapshot) report
+    elapsed wall time, process CPU time, bytes read from disk and files touched.
+    The concurrent pipeline stages (read, parse, write) report busy time summed
+    over their workers instead, with the CPU time of those workers (including
+    parse worker processes) and the bytes they handled.
+    """
+
+    name: str
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    bytes_read: int = 0
+    files: int = 0
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            "name": self.name,
+            "wall_s": round(self.wall_s, 6),
+            "cpu_s": round(self.cpu_s, 6),
+            "bytes_read": self.bytes_read,
+            "files": self.files,
+        }
+
+
+class PhaseClock:
+    """
+    with clock.phase("walk") as t:
+        ...
+        t.files = len(scanned)   # defaults to files read through `blobs` meanwhile
+    """
+
+    def __init__(self, blobs: BlobCache, tracer: Optional[Tracer] = None):
+        self.blobs = blobs
+        self.tracer = tracer
+        self.phases: list[PhaseTiming] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[PhaseTiming]:
+        t = PhaseTiming(name)
+        w0 = time.perf_counter()
+        c0 = time.process_time()
+        b0 = self.blobs.bytes_read
+        f0 = self.blobs.files_read
+        try:
+            yield t
+        finally:
+            end = time.perf_counter()
+            t.wall_s = end - w0
+            t.cpu_s = time.process_time() - c0
+            t.bytes_read = self.blobs.bytes_read - b0
+            if not t.files:
+                t.files = self.blobs.files_read - f0
+            self.phases.append(t)
+            if self.tracer is not None:
+                self.tracer.add(name, "phase", w0, end)
+
+
+@dataclass
+class StageStats:
+    """
+    Counters for one analyze pipeline stage (read / parse / write).
+
+    `busy_s` is the summed time the stage's workers spent on items, so
+    utilization = busy_s / (wall_s * workers): near 1.0 means the stage is the
+    bottleneck, low values mean it mostly waited on its neighbours. Queue depth is
+    sampled by the writer each time it takes the next item.
+    """
+
+    name: str
+    workers: int
+    items: int = 0
+    busy_s: float = 0.0
+    cpu_s: float = 0.0
+    bytes_read: int = 0
+    max_depth: int = 0
+    depth_total: int = 0
+    depth_samples: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record(self, elapsed_s: float, cpu_s: float = 0.0, nbytes: int = 0) -> None:
+        with self._lock:
+            self.items += 1
+            self.busy_s += elapsed_s
+            self.cpu_s += cpu_s
+            self.bytes_read += nbytes
+
+    def sample_depth(self, depth: int) -> None:
+        with self._lock:
+            self.depth_total += depth
+            self.depth_samples += 1
+            if depth > self.max_depth:
+                self.max_depth = depth
+
+    @property
+    def mean_depth(self) -> float:
+        return self.depth_total / self.depth_samples if self.depth_samples else 0.0
+
+    def utilization(self, wall_s: float) -> float:
+        if wall_s <= 0 or self.workers <= 0:
+            return 0.0
+        return min(1.0, self.busy_s / (wall_s * self.workers))
+
+    def timing(self) -> PhaseTiming:
+        return PhaseTiming(
+            self.name,
+            wall_s=self.busy_s,
+            cpu_s=self.cpu_s,
+            bytes_read=self.bytes_read,
+            files=self.items,
+        )
+
+    def to_dict(self, wall_s: float) -> dict[str, object]:
+        return {
+            "name": self.name,
+            "workers": self.workers,
+            "items": self.items,
+            "busy_s": round(self.busy_s, 6),
+            "cpu_s": round(self.cpu_s, 6),
+            "bytes_read": self.bytes_read,
+            "utilization": round(self.utilization(wall_s), 4),
+            "max_depth": self.max_depth,
+            "mean_depth": round(self.mean_depth, 2),
+        }
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Optional
+
+
+class TaskTimeout(TimeoutError):
+    """A task exceeded the pool's per-task time budget; its worker was killed."""
+
+
+class WorkerCrashed(RuntimeError):
+    """The worker process died while running a task (e.g. killed by the OS)."""
+
+
+class TaskFailed(RuntimeError):
+    """The task raised inside the worker; the message names the original exception."""
+
+
+# How long a fresh worker may take to start (interpreter boot, imports, initializer)
+# before it counts as crashed. Start-up is never charged to a task's time budget.
+_BOOT_TIMEOUT_S = 120.0
+
+
+def _worker_main(conn: Any, initializer: Optional[Callable[..., Any]], initargs: tuple) -> None:
+    try:
+        if initializer is not None:
+            initializer(*initargs)
+        conn.send(True)  # ready: the parent starts task deadlines from here
+    except BaseException:
+        return
+    while True:
+        try:
+            item = conn.recv()
+        except (EOFError, OSError):
+            return
+        if item is None:
+            return
+        fn, args = item
+        try:
+            result = (True, fn(*args))
+        except BaseException as e:  # report, don't die: the worker stays reusable
+            result = (False, f"{type(e).__name__}: {e}")
+        try:
+            conn.send(result)
+        except (OSError, ValueError):
+            return
+
+
+class KillablePool(Executor):
+    """
+    Process pool with a per-task time budget.
+
+    Each of the `workers` slots owns one worker process and runs one task at a time;
+    a task that has not answered within `timeout_s` gets its process killed (and
+    replaced on the next task) and its future fails with TaskTimeout, so one
+    pathological input can never stall the run. A worker that dies fails its future
+    with WorkerCrashed; an exception raised by the task becomes TaskFailed.
+
+    The budget only covers the task: a (re)started worker first boots, imports and
+    runs `initializer(*initargs)`, and reports ready before its first task is sent.
+    Pass an initializer that imports the task's module so that cost is paid there.
+
+    `fn` and its arguments must be picklable. Workers use the "spawn" start method:
+    they may be (re)started while the caller has other threads running, where fork
+    is unsafe.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        timeout_s: float,
+        mp_context: Optional[Any] = None,
+        thread_name_prefix: str = "sydes-parse",
+        initializer: Optional[Callable[..., Any]] = None,
+        initargs: tuple = (),
+    ):
+        self.timeout_s = timeout_s
+        self._initializer = initializer
+        self._initargs = initargs
+        self._ctx = mp_context if mp_context is not None else multiprocessing.get_context("spawn")
+        self._tasks: queue.Queue = queue.Queue()
+        self._shutdown = False
+        self._slots = [
+            threading.Thread(target=self._run_slot, name=f"{thread_name_prefix}-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for t in self._slots:
+            t.start()
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        if kwargs:
+            raise TypeError("KillablePool.submit does not take keyword arguments")
+        if self._shutdown:
+            raise RuntimeError("cannot submit after shutdown")
+        fut: Future = Future()
+        self._tasks.put((fn, args, fut))
+        return fut
+
+    def _spawn(self) -> tuple[Any, Any]:
+        parent, child = self._ctx.Pipe()
+        proc = self._ctx.Process(
+            target=_worker_main, args=(child, self._initializer, self._initargs), daemon=True
+        )
+        proc.start()
+        child.close()
+        try:
+            if parent.poll(_BOOT_TIMEOUT_S) and parent.recv() is True:
+                return proc, parent
+        except (EOFError, OSError):
+            pass
+        self._kill(proc, parent)
+        raise WorkerCrashed(f"worker process did not start (exit code {proc.exitcode})")
+
+    @staticmethod
+    def _kill(proc: Any, conn: Any) -> None:
+        try:
+            proc.kill()
+            proc.join()
+        finally:
+            conn.close()
+
+    def _run_slot(self) -> None:
+        proc = conn = None
+        try:
+            while True:
+                item = self._tasks.get()
+                if item is None:
+                    return
+                fn, args, fut = item
+                if not fut.set_running_or_notify_cancel():
+                    continue
+                try:
+                    if proc is None:
+                        proc, conn = self._spawn()
+                except WorkerCrashed as e:
+                    fut.set_exception(e)
+                    continue
+
+                try:
+                    conn.send((fn, args))
+                    if conn.poll(self.timeout_s):
+                        ok, value = conn.recv()
+                        if ok:
+                            fut.set_result(value)
+                        else:
+                            fut.set_exception(TaskFailed(value))
+                        continue
+                    err: BaseException = TaskTimeout(f"no result within {self.timeout_s:g}s")
+                except (EOFError, OSError):
+                    err = WorkerCrashed(f"worker process exited with code {proc.exitcode}")
+
+                self._kill(proc, conn)
+                proc = conn = None
+                fut.set_exception(err)
+        finally:
+            if proc is not None:
+                try:
+                    conn.send(None)
+                    proc.join(timeout=1)
+                except (OSError, ValueError):
+                    pass
+                if proc.is_alive():
+                    self._kill(proc, conn)
+                else:
+                    conn.close()
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        self._shutdown = True
+        if cancel_futures:
+            while True:
+                try:
+                    item = self._tasks.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[2].cancel()
+        for _ in self._slots:
+            self._tasks.put(None)
+        if wait:
+            for t in self._slots:
+                t.join()
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+# Largest prefix any consumer looks at (fingerprint). Sniffing and extraction
+# slice smaller prefixes out of the same buffer.
+DEFAULT_BLOB_MAX_BYTES = 2_000_000
+
+# Total bytes kept between reads. Candidates are sniffed long before the read stage
+# gets to them; past this budget their buffers are not kept and the next ask
+# re-reads the file, so a cold scan of a huge repo does not hold every candidate.
+DEFAULT_BLOB_HOLD_BYTES = 128 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class FileBlob:
+    path: str
+    data: bytes
+    mtime_ns: int
+    size_bytes: int
+    inode: int = 0
+
+
+class BlobCache:
+    """
+    Read-once file buffer shared by the analyze stages.
+
+    The framework detector, the candidate needle filter, the fingerprint and the
+    AST extractor all ask this cache for a file; the first ask opens and reads it,
+    the rest reuse the same bytes. Callers drop entries they no longer need so the
+    cache only holds what is still in flight; once `hold_bytes` are held, further
+    files are returned without being kept (and read again when asked again). Safe
+    to share between reader threads.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_BLOB_MAX_BYTES,
+        hold_bytes: int = DEFAULT_BLOB_HOLD_BYTES,
+    ):
+        self.max_bytes = max_bytes
+        self.hold_bytes = hold_bytes
+        self.held_bytes = 0
+        self.bytes_read = 0
+        self.files_read = 0
+        self._blobs: dict[str, FileBlob] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Optional[FileBlob]:
+        blob = self._blobs.get(path)
+        if blob is not None:
+            return blob
+        try:
+            with open(path, "rb") as f:
+                st = os.fstat(f.fileno())
+                data = f.read(self.max_bytes)
+        except OSError:
+            return None
+
+        blob = FileBlob(
+            path=path,
+            data=data,
+            mtime_ns=int(st.st_mtime_ns),
+            size_bytes=int(st.st_size),
+            inode=int(st.st_ino),
+        )
+        with self._lock:
+            self.bytes_read += len(data)
+            self.files_read += 1
+            if path not in self._blobs and self.held_bytes + len(data) <= self.hold_bytes:
+                self._blobs[path] = blob
+                self.held_bytes += len(data)
+        return blob
+
+    def read(self, path: str) -> Optional[bytes]:
+        blob = self.get(path)
+        return blob.data if blob is not None else None
+
+    def discard(self, path: str) -> None:
+        with self._lock:
+            blob = self._blobs.pop(path, None)
+            if blob is not None:
+                self.held_bytes -= len(blob.data)
+
+    def __len__(self) -> int:
+        return len(self._blobs)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import tomllib
+from dataclasses import dataclass
+from pathlib import Path
+
+from sydes.repo.generated import (
+    DEFAULT_GENERATED_MARKERS,
+    DEFAULT_GENERATED_MAX_LINE_LENGTH,
+    DEFAULT_GENERATED_PATTERNS,
+)
+
+
+@dataclass(frozen=True)
+class SydesConfig:
+    """
+    Per-repo settings read from `[tool.sydes]` in the analyzed repo's pyproject.toml:
+
+        [tool.sydes]
+        ignore = ["generated/**", "vendor/", "*_pb2.py"]   # gitignore syntax, repo-relative
+        respect_gitignore = true
+
+        # generated-code detection (see repo.generated); lists replace the defaults
+        detect_generated = true
+        generated_markers = ["@generated", "generated by django"]
+        generated_patterns = ["*_pb2.py", "*_pb2_grpc.py"]
+        generated_max_line_length = 1000   # 0 = off
+    """
+
+    ignore: tuple[str, ...] = ()
+    respect_gitignore: bool = True
+    detect_generated: bool = True
+    generated_markers: tuple[str, ...] = DEFAULT_GENERATED_MARKERS
+    generated_patterns: tuple[str, ...] = DEFAULT_GENERATED_PATTERNS
+    generated_max_line_length: int = DEFAULT_GENERATED_MAX_LINE_LENGTH
+    source: str = ""  # path of the file the settings came from ("" = defaults)
+
+
+def load_repo_config(repo_root: Path) -> SydesConfig:
+    """
+    Best-effort: a missing or unparsable pyproject.toml yields defaults.
+    """
+    pyproject = repo_root / "pyproject.toml"
+    try:
+        with open(pyproject, "rb") as f:
+            data = tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError):
+        return SydesConfig()
+
+    section = data.get("tool", {}).get("sydes", {})
+    if not isinstance(section, dict):
+        return SydesConfig()
+
+    try:
+        max_line = int(section.get("generated_max_line_length", DEFAULT_GENERATED_MAX_LINE_LENGTH))
+    except (TypeError, ValueError):
+        max_line = DEFAULT_GENERATED_MAX_LINE_LENGTH
+
+    return SydesConfig(
+        ignore=_str_tuple(section.get("ignore", [])),
+        respect_gitignore=bool(section.get("respect_gitignore", True)),
+        detect_generated=bool(section.get("detect_generated", True)),
+        generated_markers=_str_tuple(section.get("generated_markers", DEFAULT_GENERATED_MARKERS)),
+        generated_patterns=_str_tuple(section.get("generated_patterns", DEFAULT_GENERATED_PATTERNS)),
+        generated_max_line_length=max_line,
+        source=str(pyproject),
+    )
+
+
+def _str_tuple(value: object) -> tuple[str, ...]:
+    if isinstance(value, str):
+        return (value,)
+    if isinstance(value, (list, tuple)):
+        return tuple(str(v) for v in value)
+    return ()
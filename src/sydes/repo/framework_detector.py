@@ -1,25 +1,38 @@
 from __future__ import annotations
 
 from collections import Counter
+from typing import Optional
 
-from sydes.repo.scanner import _file_contains_any
+from sydes.repo.blobs import BlobCache
+from sydes.repo.needles import NeedleSniffer, detect_group
 
+# Score added per sampled file that mentions the framework.
+_WEIGHTS = {"fastapi": 3, "flask": 2, "django": 2}
 
-def detect_python_framework(py_files: list[str], sample_limit: int = 200) -> tuple[str, float]:
+
+def detect_python_framework(
+    py_files: list[str],
+    sample_limit: int = 200,
+    blobs: Optional[BlobCache] = None,
+    sniffer: Optional[NeedleSniffer] = None,
+) -> tuple[str, float]:
     """
     Heuristic detection. v0: deterministic, fast, no LLM.
     Returns (framework, confidence).
+
+    Pass the same `sniffer` to select_candidate_api_files so each sampled file is
+    matched once for all frameworks.
     """
+    if sniffer is None:
+        sniffer = NeedleSniffer(blobs)
     sample = py_files[:sample_limit]
     scores = Counter()
 
     for p in sample:
-        if _file_contains_any(p, ["from fastapi import", "FastAPI(", "APIRouter"]):
-            scores["fastapi"] += 3
-        if _file_contains_any(p, ["from flask import", "Flask(", "@app.route", "Blueprint("]):
-            scores["flask"] += 2
-        if _file_contains_any(p, ["from django.urls", "urlpatterns", "path(", "re_path("]):
-            scores["django"] += 2
+        hits = sniffer.hits(p)
+        for fw, weight in _WEIGHTS.items():
+            if hits[detect_group(fw)]:
+                scores[fw] += weight
 
     if not scores:
         return ("unknown", 0.2)
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from sydes.repo.ignore import DEFAULT_IGNORES, IgnoreMatcher
+
+# Regular files only (skip symlinks 120000 and submodules 160000).
+_REGULAR_MODES = {"100644", "100755"}
+
+
+@dataclass(frozen=True)
+class GitIndexEntry:
+    rel_path: str  # os.sep separated, relative to the directory git was run in
+    oid: str  # blob id from the index; "" if the working tree differs (or untracked)
+
+
+def git_fingerprint(oid: str) -> str:
+    # Stored in files.sha256; prefixed so it never compares equal to a sha256 digest.
+    return f"git:{oid}"
+
+
+def git_blob_id(data: bytes) -> str:
+    """Object id git would assign to `data` (same as `git hash-object`)."""
+    h = hashlib.sha1()
+    h.update(b"blob %d\0" % len(data))
+    h.update(data)
+    return h.hexdigest()
+
+
+def git_blob_id_of_file(path: Path, chunk_size: int = 1 << 20) -> str:
+    size = path.stat().st_size
+    h = hashlib.sha1()
+    h.update(b"blob %d\0" % size)
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _git_z(repo_root: Path, *args: str) -> Optional[list[str]]:
+    try:
+        out = subprocess.run(
+            ["git", "-C", str(repo_root), *args],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return [p for p in out.decode("utf-8", errors="surrogateescape").split("\0") if p]
+
+
+def list_git_files(
+    repo_root: Path,
+    suffix: str = ".py",
+    include_untracked: bool = True,
+    ignore: Optional[IgnoreMatcher] = None,
+) -> Optional[list[GitIndexEntry]]:
+    """
+    Enumerate files from the git index instead of walking the tree:
+      git ls-files -z --stage       -> path + blob id for tracked files
+      git ls-files -z -m            -> modified-but-unstaged paths (index blob id is stale)
+      git ls-files -z -o --exclude-standard  -> untracked, not ignored (optional)
+
+    Returns None if repo_root is not inside a git work tree (callers fall back to a walk).
+    DEFAULT_IGNORES and user override globs from `ignore` still apply; .gitignore rules
+    do not matter here because git already applied them.
+    """
+    staged = _git_z(repo_root, "ls-files", "-z", "--stage")
+    if staged is None:
+        return None
+    modified = set(_git_z(repo_root, "ls-files", "-z", "-m") or [])
+    untracked = (
+        _git_z(repo_root, "ls-files", "-z", "-o", "--exclude-standard") or []
+        if include_untracked
+        else []
+    )
+
+    entries: dict[str, str] = {}
+    for rec in staged:
+        # "<mode> <oid> <stage>\t<path>"
+        meta, _, path = rec.partition("\t")
+        parts = meta.split(" ")
+        if len(parts) != 3 or parts[0] not in _REGULAR_MODES or not path.endswith(suffix):
+            continue
+        if parts[2] not in ("0", "2"):
+            # unmerged: keep one row ("ours"); the content is hashed from the work tree
+            continue
+        entries[path] = "" if path in modified or parts[2] != "0" else parts[1]
+    for path in untracked:
+        if path.endswith(suffix):
+            entries.setdefault(path, "")
+
+    dir_ok: dict[str, bool] = {}
+
+    def _dir_allowed(d: str) -> bool:
+        if not d:
+            return True
+        ok = dir_ok.get(d)
+        if ok is None:
+            parent, _, name = d.rpartition("/")
+            ok = (
+                name not in DEFAULT_IGNORES
+                and not (ignore is not None and ignore.is_ignored(d, is_dir=True))
+                and _dir_allowed(parent)
+            )
+            dir_ok[d] = ok
+        return ok
+
+    out: list[GitIndexEntry] = []
+    for path, oid in entries.items():
+        parent = path.rpartition("/")[0]
+        if not _dir_allowed(parent):
+            continue
+        if ignore is not None and ignore.is_ignored(path, is_dir=False):
+            continue
+        out.append(GitIndexEntry(rel_path=path.replace("/", os.sep), oid=oid))
+    return out
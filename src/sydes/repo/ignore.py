@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import re
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterable, Optional
 
 DEFAULT_IGNORES = {
     ".git",
@@ -18,3 +21,161 @@ DEFAULT_IGNORES = {
 
 def should_ignore_dir(dir_path: Path) -> bool:
     return dir_path.name in DEFAULT_IGNORES
+
+
+# -------------------- gitignore-style rules --------------------
+
+
+@dataclass(frozen=True)
+class IgnoreRule:
+    base: str  # posix dir (relative to repo root) the rule was declared in; "" = root
+    regex: re.Pattern[str]
+    negate: bool
+    dir_only: bool
+
+    def matches(self, rel_posix: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        if self.base:
+            prefix = self.base + "/"
+            if not rel_posix.startswith(prefix):
+                return False
+            rel_posix = rel_posix[len(prefix):]
+        return self.regex.match(rel_posix) is not None
+
+
+def _glob_to_regex(pat: str) -> str:
+    out: list[str] = []
+    i = 0
+    n = len(pat)
+    while i < n:
+        c = pat[i]
+        if c == "*":
+            if pat.startswith("**", i):
+                at_start = i == 0 or pat[i - 1] == "/"
+                at_end = i + 2 == n or pat[i + 2] == "/"
+                if at_start and at_end:
+                    if i + 2 == n:
+                        out.append(".*")  # "a/**": everything inside
+                        i += 2
+                    else:
+                        out.append("(?:.*/)?")  # "**/" : zero or more directories
+                        i += 3
+                    continue
+            out.append("[^/]*")
+            i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[":
+            j = pat.find("]", i + 1)
+            if j == -1:
+                out.append(re.escape(c))
+                i += 1
+                continue
+            body = pat[i + 1 : j]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append(f"[{body}]")
+            i = j + 1
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pat[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return "".join(out)
+
+
+def parse_ignore_rule(line: str, base: str = "") -> Optional[IgnoreRule]:
+    """
+    Compile one .gitignore line (git's pattern format) declared in directory `base`.
+    Returns None for blanks and comments.
+    """
+    line = line.rstrip("\n").rstrip("\r")
+    if not line.endswith("\\ "):
+        line = line.rstrip(" ")
+    if not line or line.startswith("#"):
+        return None
+
+    negate = False
+    if line.startswith("!"):
+        negate = True
+        line = line[1:]
+    elif line.startswith("\\!") or line.startswith("\\#"):
+        line = line[1:]
+
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    # A slash at the start or in the middle anchors the pattern to `base`;
+    # otherwise it matches a name at any depth below it.
+    anchored = "/" in line
+    line = line.lstrip("/")
+    body = _glob_to_regex(line)
+    if not anchored:
+        body = "(?:.*/)?" + body
+    return IgnoreRule(base=base, regex=re.compile(body + r"\Z"), negate=negate, dir_only=dir_only)
+
+
+class IgnoreMatcher:
+    """
+    Ordered gitignore-style rules; the last matching rule wins (so `!pattern` can
+    re-include). `overrides` (user globs from config) are consulted before any git
+    rule, so a .gitignore negation cannot re-include what the user excluded.
+
+    Matchers are immutable: `with_rules` returns an extended copy, which lets a
+    directory walk derive each child's matcher from its parent's once per directory
+    and prune whole ignored subtrees before descending.
+    """
+
+    def __init__(
+        self,
+        rules: Iterable[IgnoreRule] = (),
+        overrides: Iterable[IgnoreRule] = (),
+        respect_gitignore: bool = True,
+    ):
+        self.rules: tuple[IgnoreRule, ...] = tuple(rules)
+        self.overrides: tuple[IgnoreRule, ...] = tuple(overrides)
+        self.respect_gitignore = respect_gitignore
+
+    def with_rules(self, lines: Iterable[str], base: str = "") -> "IgnoreMatcher":
+        new = [r for r in (parse_ignore_rule(line, base) for line in lines) if r is not None]
+        if not new:
+            return self
+        return IgnoreMatcher(self.rules + tuple(new), self.overrides, self.respect_gitignore)
+
+    def with_gitignore_file(self, path: Path, base: str = "") -> "IgnoreMatcher":
+        try:
+            text = path.read_text(encoding="utf-8", errors="ignore")
+        except OSError:
+            return self
+        return self.with_rules(text.splitlines(), base)
+
+    def is_ignored(self, rel_posix: str, is_dir: bool) -> bool:
+        for rule in reversed(self.overrides):
+            if rule.matches(rel_posix, is_dir):
+                return not rule.negate
+        for rule in reversed(self.rules):
+            if rule.matches(rel_posix, is_dir):
+                return not rule.negate
+        return False
+
+    @classmethod
+    def for_repo(
+        cls,
+        repo_root: Path,
+        extra_globs: Iterable[str] = (),
+        respect_gitignore: bool = True,
+    ) -> "IgnoreMatcher":
+        """
+        Root matcher: user globs as overrides, plus .git/info/exclude when honouring git.
+        Per-directory .gitignore files are layered on by the walker as it descends.
+        """
+        overrides = [r for r in (parse_ignore_rule(g) for g in extra_globs) if r is not None]
+        m = cls(overrides=overrides, respect_gitignore=respect_gitignore)
+        if respect_gitignore:
+            m = m.with_gitignore_file(repo_root / ".git" / "info" / "exclude")
+        return m
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING, Mapping, Optional
+
+from sydes.repo.blobs import BlobCache
+
+if TYPE_CHECKING:
+    from sydes.orchestrator.profile import Tracer
+
+# Needles used to score which framework a repo uses.
+DETECT_NEEDLES: dict[str, list[str]] = {
+    "fastapi": ["from fastapi import", "FastAPI(", "APIRouter"],
+    "flask": ["from flask import", "Flask(", "@app.route", "Blueprint("],
+    "django": ["from django.urls", "urlpatterns", "path(", "re_path("],
+}
+
+# Needles that mark a file as a likely API entrypoint, per framework hint.
+CANDIDATE_NEEDLES: dict[str, list[str]] = {
+    "fastapi": ["from fastapi import", "FastAPI(", "APIRouter", "@app.", "@router.", "add_api_route"],
+    "flask": ["from flask import", "Flask(", "@app.route", "Blueprint("],
+    "django": ["from django.urls", "path(", "re_path(", "urlpatterns", "django.http"],
+    "unknown": ["@app.", "route", "FastAPI(", "Flask(", "django.urls"],
+}
+
+# Structural facts (include_router edges, Depends usages) are stored for every file
+# that mentions them, whichever framework was detected and whether or not the file
+# declares routes: routers are often wired from modules that only `import fastapi`.
+STRUCTURE_GROUP = "structure"
+STRUCTURE_NEEDLES: list[str] = ["include_router", "Depends"]
+
+
+def detect_group(framework: str) -> str:
+    return f"detect:{framework}"
+
+
+def candidate_group(framework: str) -> str:
+    return f"candidate:{framework}"
+
+
+class NeedleMatcher:
+    """
+    Match every needle of every group in one pass over raw bytes.
+
+    All needles are compiled into a single bytes regex (longest alternative first),
+    so the scan runs in the C regex engine rather than once per needle over decoded
+    text. After each hit the search resumes one byte later, so overlapping needles
+    are still seen; shorter needles contained in a hit are credited with it.
+
+    `hits(data)` returns, per group, how many distinct needles of that group occur.
+    """
+
+    def __init__(self, groups: Mapping[str, list[str]]):
+        self._groups_of: dict[bytes, list[str]] = {}
+        for group, needles in groups.items():
+            for n in needles:
+                self._groups_of.setdefault(n.encode("utf-8"), []).append(group)
+
+        needles_b = sorted(self._groups_of, key=lambda n: (-len(n), n))
+        self._re = re.compile(b"|".join(re.escape(n) for n in needles_b))
+        # needle -> every needle it contains (itself included)
+        self._contains: dict[bytes, list[bytes]] = {
+            n: [m for m in needles_b if m in n] for n in needles_b
+        }
+        self._groups = list(groups)
+        # the rules hit counts depend on, e.g. to key persisted hits
+        self.groups: dict[str, list[str]] = {g: list(n) for g, n in groups.items()}
+        self._all = len(needles_b)
+
+    @classmethod
+    def for_frameworks(cls) -> "NeedleMatcher":
+        groups: dict[str, list[str]] = {}
+        for fw, needles in DETECT_NEEDLES.items():
+            groups[detect_group(fw)] = needles
+        for fw, needles in CANDIDATE_NEEDLES.items():
+            groups[candidate_group(fw)] = needles
+        groups[STRUCTURE_GROUP] = STRUCTURE_NEEDLES
+        return cls(groups)
+
+    def found(self, data: bytes, endpos: Optional[int] = None) -> set[bytes]:
+        out: set[bytes] = set()
+        search = self._re.search
+        end = len(data) if endpos is None else min(endpos, len(data))
+        pos = 0
+        while len(out) < self._all:
+            m = search(data, pos, end)
+            if m is None:
+                break
+            out.update(self._contains[m.group()])
+            pos = m.start() + 1
+        return out
+
+    def empty(self) -> dict[str, int]:
+        return dict.fromkeys(self._groups, 0)
+
+    def hits(self, data: bytes, endpos: Optional[int] = None) -> dict[str, int]:
+        counts = self.empty()
+        for n in self.found(data, endpos):
+            for g in self._groups_of[n]:
+                counts[g] += 1
+        return counts
+
+
+_DEFAULT_MATCHER: Optional[NeedleMatcher] = None
+
+
+def default_matcher() -> NeedleMatcher:
+    global _DEFAULT_MATCHER
+    if _DEFAULT_MATCHER is None:
+        _DEFAULT_MATCHER = NeedleMatcher.for_frameworks()
+    return _DEFAULT_MATCHER
+
+
+class NeedleSniffer:
+    """
+    Per-file needle hit counts, computed once per file and shared by framework
+    detection and candidate selection.
+    """
+
+    def __init__(
+        self,
+        blobs: Optional[BlobCache] = None,
+        matcher: Optional[NeedleMatcher] = None,
+        max_bytes: int = 200_000,
+        tracer: Optional["Tracer"] = None,
+    ):
+        # Without a shared cache, read privately and drop each buffer once sniffed.
+        self._owns_blobs = blobs is None
+        self.blobs = blobs if blobs is not None else BlobCache(max_bytes=max_bytes)
+        self.matcher = matcher if matcher is not None else default_matcher()
+        self.max_bytes = max_bytes
+        self.tracer = tracer
+        self._hits: dict[str, dict[str, int]] = {}
+
+    def hits(self, path: str) -> dict[str, int]:
+        h = self._hits.get(path)
+        if h is not None:
+            return h
+        if self.tracer is not None:
+            with self.tracer.span("sniff", path=path):
+                return self._sniff(path)
+        return self._sniff(path)
+
+    def known(self, path: str) -> Optional[dict[str, int]]:
+        """Hits already computed (or seeded) for `path`, without reading it."""
+        return self._hits.get(path)
+
+    def seed(self, path: str, hits: Mapping[str, int]) -> None:
+        """Use `hits` (e.g. persisted for an unchanged file) instead of reading `path`."""
+        h = self.matcher.empty()
+        h.update((g, n) for g, n in hits.items() if g in h)
+        self._hits[path] = h
+
+    def _sniff(self, path: str) -> dict[str, int]:
+        data = self.blobs.read(path)
+        if data is None:
+            h = self.matcher.empty()
+        else:
+            h = self.matcher.hits(data, self.max_bytes)
+        if self._owns_blobs:
+            self.blobs.discard(path)
+        self._hits[path] = h
+        return h
@@ -1,57 +1,226 @@
 from __future__ import annotations
 
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from itertools import islice
 from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Optional
 
-from sydes.repo.ignore import should_ignore_dir
+from sydes.repo.blobs import BlobCache
+from sydes.repo.git_index import list_git_files
+from sydes.repo.ignore import IgnoreMatcher, should_ignore_dir
+from sydes.repo.needles import CANDIDATE_NEEDLES, NeedleSniffer, candidate_group
 
+if TYPE_CHECKING:
+    from sydes.orchestrator.profile import Tracer
 
-def scan_python_files(repo_path: Path, max_files: int | None = None) -> list[str]:
+
+@dataclass(frozen=True, slots=True)
+class ScannedFile:
+    rel_path: str  # relative to the repo root, os.sep separated
+    abs_path: str
+    mtime_ns: int
+    size_bytes: int
+    inode: int
+    git_oid: str = ""  # blob id from the git index when known (see scan_git_files)
+
+
+def _sort_key(rel_path: str) -> list[str]:
+    # Component-wise order, i.e. the order of a name-sorted depth-first walk.
+    return rel_path.split(os.sep)
+
+
+_DirScan = tuple[list[ScannedFile], list[str], Optional[IgnoreMatcher]]
+
+
+def _scan_dir(
+    root: str,
+    rel_dir: str,
+    suffix: str,
+    ignore: Optional[IgnoreMatcher] = None,
+    tracer: Optional["Tracer"] = None,
+) -> _DirScan:
     """
-    Return a list of absolute file paths (as strings) for .py files under repo_path.
-    Lightweight, deterministic. v0 intentionally simple.
+    List one directory with os.scandir.
+    Returns (matching files, subdirs to descend into, ignore matcher for those subdirs).
+
+    The stat taken here is kept on ScannedFile so later stages do not stat again.
+    Ignore rules (including this directory's own .gitignore) are evaluated once per
+    entry here, so ignored subtrees are never listed.
     """
-    out: list[str] = []
-    for root, dirs, files in _walk(repo_path):
-        root_p = Path(root)
+    if tracer is not None:
+        with tracer.span("walk", cat="dir", path=rel_dir or "."):
+            return _scan_dir(root, rel_dir, suffix, ignore)
+
+    files: list[ScannedFile] = []
+    subdirs: list[str] = []
+    abs_dir = os.path.join(root, rel_dir) if rel_dir else root
+    try:
+        with os.scandir(abs_dir) as it:
+            entries = list(it)
+    except OSError:
+        return files, subdirs, ignore
+
+    if ignore is not None and ignore.respect_gitignore:
+        if any(e.name == ".gitignore" for e in entries):
+            base = rel_dir.replace(os.sep, "/")
+            ignore = ignore.with_gitignore_file(Path(abs_dir) / ".gitignore", base=base)
 
-        # prune ignored dirs
-        dirs[:] = [d for d in dirs if not should_ignore_dir(root_p / d)]
+    for entry in entries:
+        rel = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+        try:
+            is_dir = entry.is_dir()
+            if is_dir:
+                # like os.walk(followlinks=False): list symlinked dirs, don't descend
+                if entry.is_symlink() or should_ignore_dir(Path(entry.path)):
+                    continue
+            elif not entry.name.endswith(suffix) or not entry.is_file():
+                continue
+            if ignore is not None and ignore.is_ignored(rel.replace(os.sep, "/"), is_dir):
+                continue
+            if is_dir:
+                subdirs.append(rel)
+                continue
+            st = entry.stat()
+        except OSError:
+            continue
+        files.append(
+            ScannedFile(
+                rel_path=rel,
+                abs_path=entry.path,
+                mtime_ns=int(st.st_mtime_ns),
+                size_bytes=int(st.st_size),
+                inode=int(st.st_ino),
+            )
+        )
+    return files, subdirs, ignore
 
-        for f in files:
-            if f.endswith(".py"):
-                out.append(str((root_p / f).resolve()))
-                if max_files is not None and len(out) >= max_files:
-                    return out
+
+def _iter_sorted(
+    root: str,
+    rel_dir: str,
+    suffix: str,
+    ignore: Optional[IgnoreMatcher],
+    tracer: Optional["Tracer"] = None,
+) -> Iterator[ScannedFile]:
+    # Serial depth-first walk, entries visited in name order.
+    files, subdirs, ignore = _scan_dir(root, rel_dir, suffix, ignore, tracer)
+    items: list[tuple[str, ScannedFile | str]] = [(os.path.basename(f.rel_path), f) for f in files]
+    items += [(os.path.basename(d), d) for d in subdirs]
+    items.sort(key=lambda e: e[0])
+    for _, item in items:
+        if isinstance(item, ScannedFile):
+            yield item
+        else:
+            yield from _iter_sorted(root, item, suffix, ignore, tracer)
+
+
+def scan_repo_files(
+    repo_path: Path,
+    max_files: int | None = None,
+    workers: int = 8,
+    suffix: str = ".py",
+    ignore: Optional[IgnoreMatcher] = None,
+    tracer: Optional["Tracer"] = None,
+) -> list[ScannedFile]:
+    """
+    Walk repo_path and return ScannedFile records (repo-relative path + stat) for files
+    ending in `suffix`, sorted component-wise by rel_path.
+
+    Directories are listed concurrently on a thread pool (listing latency dominates on
+    network filesystems). With max_files the walk is serial and stops early, yielding
+    the same prefix the full walk would.
+
+    `ignore` adds gitignore-style pruning (nested .gitignore files are picked up as
+    directories are listed) on top of DEFAULT_IGNORES. With a `tracer`, each
+    directory listing is recorded as a "walk" span (see `sydes analyze --profile`).
+    """
+    root = str(repo_path.resolve())
+
+    if max_files is not None or workers <= 1:
+        return list(islice(_iter_sorted(root, "", suffix, ignore, tracer), max_files))
+
+    out: list[ScannedFile] = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_scan_dir, root, "", suffix, ignore, tracer)}
+        while futures:
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for fut in done:
+                files, subdirs, child_ignore = fut.result()
+                out.extend(files)
+                for d in subdirs:
+                    futures.add(pool.submit(_scan_dir, root, d, suffix, child_ignore, tracer))
+
+    out.sort(key=lambda f: _sort_key(f.rel_path))
     return out
 
 
-def _walk(repo_path: Path):
-    # Separate helper to make unit testing easier (can be mocked)
-    return __import__("os").walk(repo_path)
+def scan_git_files(
+    repo_path: Path,
+    max_files: int | None = None,
+    ignore: Optional[IgnoreMatcher] = None,
+    include_untracked: bool = True,
+    suffix: str = ".py",
+) -> Optional[list[ScannedFile]]:
+    """
+    Enumerate files from the git index (no directory walk). Clean tracked files carry
+    their blob id in `git_oid`, so they can be fingerprinted without being read; stat
+    fields are left at 0 because nothing is stat'ed. Returns None outside a git work tree.
+    """
+    root = str(repo_path.resolve())
+    entries = list_git_files(
+        Path(root), suffix=suffix, include_untracked=include_untracked, ignore=ignore
+    )
+    if entries is None:
+        return None
 
+    out = [
+        ScannedFile(
+            rel_path=e.rel_path,
+            abs_path=os.path.join(root, e.rel_path),
+            mtime_ns=0,
+            size_bytes=0,
+            inode=0,
+            git_oid=e.oid,
+        )
+        for e in entries
+    ]
+    out.sort(key=lambda f: _sort_key(f.rel_path))
+    return out[:max_files] if max_files is not None else out
 
-def _file_contains_any(path: str, needles: list[str], max_bytes: int = 200_000) -> bool:
-    try:
-        with open(path, "rb") as f:
-            data = f.read(max_bytes)
-        text = data.decode("utf-8", errors="ignore")
-        return any(n in text for n in needles)
-    except Exception:
-        return False
 
+def scan_python_files(repo_path: Path, max_files: int | None = None) -> list[str]:
+    """
+    Return a list of absolute file paths (as strings) for .py files under repo_path.
+    Lightweight, deterministic.
+    """
+    return [f.abs_path for f in scan_repo_files(repo_path, max_files=max_files)]
 
-def select_candidate_api_files(py_files: list[str], framework_hint: str) -> list[str]:
+
+def select_candidate_api_files(
+    py_files: list[str],
+    framework_hint: str,
+    blobs: Optional[BlobCache] = None,
+    sniffer: Optional[NeedleSniffer] = None,
+) -> list[str]:
     """
     Given a list of python files, select likely web/API entrypoints.
     For v0: heuristics only. Later: framework-specific chunkers.
+
+    With `blobs`, file bytes come from the shared read-once cache and
+    non-candidates are dropped from it as soon as they are rejected.
+    Needle hits come from `sniffer` (one multi-needle pass per file), which can be
+    shared with detect_python_framework.
     """
-    if framework_hint == "fastapi":
-        needles = ["from fastapi import", "FastAPI(", "APIRouter", "@app.", "@router.", "add_api_route"]
-    elif framework_hint == "flask":
-        needles = ["from flask import", "Flask(", "@app.route", "Blueprint("]
-    elif framework_hint == "django":
-        needles = ["from django.urls", "path(", "re_path(", "urlpatterns", "django.http"]
-    else:
-        needles = ["@app.", "route", "FastAPI(", "Flask(", "django.urls"]
+    if sniffer is None:
+        sniffer = NeedleSniffer(blobs)
+    group = candidate_group(framework_hint if framework_hint in CANDIDATE_NEEDLES else "unknown")
 
-    return [p for p in py_files if _file_contains_any(p, needles)]
+    out: list[str] = []
+    for p in py_files:
+        if sniffer.hits(p)[group]:
+            out.append(p)
+        elif blobs is not None:
+            blobs.discard(p)
+    return out
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import astuple
+from pathlib import Path
+from typing import Callable, Optional
+
+from sydes.extractors.fastapi.chunker import (
+    EXTRACTOR_VERSION,
+    AppDecl,
+    DependsDecl,
+    FastAPIFacts,
+    IncludeRouterDecl,
+    RouteDecl,
+)
+
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# How long a cache write waits for another process's write before it is dropped.
+# Writes are single short transactions, so contention clears within milliseconds.
+_BUSY_TIMEOUT_MS = 50
+
+
+def default_cache_dir() -> Path:
+    """
+    $SYDES_CACHE_DIR, else $XDG_CACHE_HOME/sydes, else ~/.cache/sydes.
+    """
+    explicit = os.environ.get("SYDES_CACHE_DIR")
+    if explicit:
+        return Path(explicit).expanduser()
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg).expanduser() if xdg else Path.home() / ".cache"
+    return base / "sydes"
+
+
+def _encode(facts: FastAPIFacts) -> bytes:
+    # file_path is per checkout, not per content: never cached
+    payload = {
+        "routes": [astuple(r)[:-1] for r in facts.routes],
+        "includes": [astuple(i) for i in facts.includes],
+        "depends": [astuple(d) for d in facts.depends],
+        "apps": [astuple(a) for a in facts.apps],
+    }
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def _decode(data: bytes, file_path: str) -> FastAPIFacts:
+    payload = json.loads(data)
+    file_path = sys.intern(file_path)
+    return FastAPIFacts(
+        routes=[
+            RouteDecl(sys.intern(method), *rest, file_path=file_path)
+            for (method, *rest) in payload["routes"]
+        ],
+        includes=[IncludeRouterDecl(*i) for i in payload["includes"]],
+        depends=[DependsDecl(*d) for d in payload["depends"]],
+        apps=[AppDecl(*a) for a in payload["apps"]],
+    )
+
+
+class ExtractionCache:
+    """
+    Content-addressed store of extraction results, shared by every repo, branch and
+    worktree analyzed by this user: (content fingerprint, extractor version) -> facts.
+
+    Keys are the fingerprints the pipeline already computes (sha256 of the content,
+    or "git:<blob id>"), so identical bytes hit no matter which path they live at.
+    Entries are evicted least-recently-used once the payload total exceeds
+    `max_bytes`.
+
+    Several analyses (CI jobs, branches) may share one cache directory: every write
+    is its own short transaction with a short busy timeout, and a write that finds
+    the database locked is dropped rather than waited for. Reads use a separate
+    connection, so `get` (called from the pipeline's reader threads) never waits
+    behind a `put`. A cache that cannot be opened or written is simply skipped.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.path = cache_dir / "extract-cache.db"
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.dropped_writes = 0
+        self._touched: set[str] = set()
+        self._con: Optional[sqlite3.Connection] = None  # reads
+        self._wcon: Optional[sqlite3.Connection] = None  # writes
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            self._wcon = self._connect()
+            self._wcon.execute("PRAGMA journal_mode=WAL;")
+            self._wcon.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    payload BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used INTEGER NOT NULL
+                );
+                """
+            )
+            self._wcon.execute(
+                "CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries(last_used);"
+            )
+            self._con = self._connect()
+            for con in (self._con, self._wcon):
+                con.execute(f"PRAGMA busy_timeout={_BUSY_TIMEOUT_MS};")
+        except sqlite3.Error:
+            self._close_connections()
+
+    def _connect(self) -> sqlite3.Connection:
+        # autocommit: no implicit transaction stays open between statements.
+        # The generous connect timeout only covers schema setup; see _BUSY_TIMEOUT_MS.
+        con = sqlite3.connect(
+            str(self.path), timeout=5, isolation_level=None, check_same_thread=False
+        )
+        # a lost cache write only costs a re-parse: skip the fsync per commit
+        con.execute("PRAGMA synchronous=NORMAL;")
+        return con
+
+    def _close_connections(self) -> None:
+        for con in (self._con, self._wcon):
+            if con is not None:
+                con.close()
+        self._con = self._wcon = None
+
+    @staticmethod
+    def key(fingerprint: str) -> str:
+        return f"{EXTRACTOR_VERSION}|{fingerprint}"
+
+    def get(self, fingerprint: str, file_path: str = "") -> Optional[FastAPIFacts]:
+        """
+        Cached facts for these bytes, with `file_path` set on the routes (or None).
+        """
+        if self._con is None:
+            return None
+        k = self.key(fingerprint)
+        with self._lock:
+            try:
+                row = self._con.execute("SELECT payload FROM entries WHERE key=?", (k,)).fetchone()
+            except sqlite3.Error:
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched.add(k)
+        return _decode(row[0], file_path)
+
+    def _write(self, fn: Callable[[sqlite3.Connection], object]) -> bool:
+        """
+        Run `fn(con)` in one short IMMEDIATE transaction on the write connection.
+        Returns False (and writes nothing) if the database is locked or failing.
+        """
+        if self._wcon is None:
+            return False
+        with self._write_lock:
+            con = self._wcon
+            try:
+                con.execute("BEGIN IMMEDIATE")
+            except sqlite3.Error:
+                # another process is writing: drop this write instead of waiting
+                self.dropped_writes += 1
+                return False
+            try:
+                fn(con)
+                con.execute("COMMIT")
+                return True
+            except sqlite3.Error:
+                con.execute("ROLLBACK")
+                self.dropped_writes += 1
+                return False
+
+    def put(self, fingerprint: str, facts: FastAPIFacts) -> None:
+        if self._wcon is None:
+            return
+        data = _encode(facts)
+        k = self.key(fingerprint)
+        row = (k, data, len(data), int(time.time()))
+        if self._write(
+            lambda con: con.execute(
+                "INSERT OR REPLACE INTO entries(key, payload, size, last_used) VALUES(?,?,?,?)",
+                row,
+            )
+        ):
+            with self._lock:
+                self._touched.discard(k)
+
+    def evict(self, con: Optional[sqlite3.Connection] = None) -> int:
+        """
+        Drop least-recently-used entries until the payload total fits `max_bytes`.
+        """
+        con = con if con is not None else self._wcon
+        if con is None:
+            return 0
+        total = con.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        removed = 0
+        doomed: list[str] = []
+        for key, size in con.execute("SELECT key, size FROM entries ORDER BY last_used, key"):
+            if total <= self.max_bytes:
+                break
+            doomed.append(key)
+            total -= size
+            removed += 1
+        con.executemany("DELETE FROM entries WHERE key=?", [(k,) for k in doomed])
+        return removed
+
+    def close(self) -> None:
+        if self._wcon is None:
+            return
+        with self._lock:
+            touched, self._touched = self._touched, set()
+
+        def _finish(con: sqlite3.Connection) -> None:
+            if touched:
+                now = int(time.time())
+                con.executemany(
+                    "UPDATE entries SET last_used=? WHERE key=?", [(now, k) for k in touched]
+                )
+            self.evict(con)
+
+        try:
+            self._write(_finish)  # recency and eviction are best effort, like puts
+        finally:
+            self._close_connections()
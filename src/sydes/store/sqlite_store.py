@@ -1,11 +1,18 @@
 from __future__ import annotations
 
 import hashlib
+import json
+import os
 import sqlite3
 import time
+from contextlib import contextmanager
 from dataclasses import dataclass
+from itertools import pairwise
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Callable, Iterable, Iterator, Optional
+
+from sydes.domain.errors import SchemaVersionError
+from sydes.repo.blobs import FileBlob
 
 
 def _now_ts() -> int:
@@ -21,13 +28,201 @@ def _endpoint_id(method: str, http_path: str) -> str:
     return hashlib.sha1(base.encode("utf-8")).hexdigest()
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FileStatus:
     rel_path: str
     sha256: str
     mtime_ns: int
     size_bytes: int
     last_scanned_at: int
+    inode: int = 0
+    # why the file was not extracted ("" = extracted); kept until its content changes
+    skip_reason: str = ""
+
+    def stat_matches(self, mtime_ns: int, size_bytes: int, inode: int) -> bool:
+        """True if the stored (mtime_ns, size, inode) triple equals the given one."""
+        return (
+            self.mtime_ns == mtime_ns
+            and self.size_bytes == size_bytes
+            and self.inode == inode
+        )
+
+
+@dataclass(frozen=True)
+class SniffedFile:
+    """
+    Needle hits (non-zero groups only) of a walked file at the stat triple it had when
+    it was sniffed, and whether its content was classified as generated code (None: it
+    was not a candidate, so it was not checked).
+    """
+
+    rel_path: str
+    mtime_ns: int
+    size_bytes: int
+    inode: int
+    hits: dict[str, int]
+    generated: Optional[bool]
+    last_scanned_at: int
+
+    def stat_matches(self, mtime_ns: int, size_bytes: int, inode: int) -> bool:
+        return (
+            self.mtime_ns == mtime_ns
+            and self.size_bytes == size_bytes
+            and self.inode == inode
+        )
+
+
+# Rows of one snapshot set. A set is stored either as a keyframe (all its rows)
+# or as a delta on a base set ('+' = added or changed row, '-' = removed endpoint);
+# chains end at a keyframe after at most SNAPSHOT_KEYFRAME_EVERY - 1 deltas.
+# Walking the chain newest-first, the first record of each endpoint wins and
+# '-' records drop out, so the cost is one keyframe plus a few small deltas.
+_SET_ROWS_SQL = """
+    WITH RECURSIVE chain(set_id, base_set_id, pos) AS (
+        SELECT set_id, base_set_id, 0 FROM snapshot_sets WHERE set_id = :set_id
+        UNION ALL
+        SELECT s.set_id, s.base_set_id, chain.pos + 1
+        FROM snapshot_sets s JOIN chain ON s.set_id = chain.base_set_id
+    )
+    SELECT endpoint_id, method, http_path, rel_path, handler_name, decl_line, source
+    FROM (
+        SELECT e.*, ROW_NUMBER() OVER (PARTITION BY e.endpoint_id ORDER BY chain.pos) AS rn
+        FROM snapshot_endpoints e JOIN chain ON e.set_id = chain.set_id
+    )
+    WHERE rn = 1 AND op = '+'
+"""
+
+_SNAPSHOT_COLUMNS = "endpoint_id, method, http_path, rel_path, handler_name, decl_line, source"
+
+# Snapshot rows of the current routes table: one per METHOD+PATH, duplicates keep
+# the first by file+decl_line.
+_CURRENT_ENDPOINTS_SQL = """
+    SELECT sydes_endpoint_id(method, http_path), method, http_path,
+           rel_path, handler_name, decl_line, source
+    FROM (
+        SELECT *, ROW_NUMBER() OVER (
+            PARTITION BY method, http_path ORDER BY rel_path, decl_line
+        ) AS rn
+        FROM routes
+    )
+    WHERE rn = 1
+"""
+
+# Sections of a scan diff, each one indexed (anti-)join over two sets
+# materialized into temp tables keyed by endpoint_id: {a} = the from scan's set,
+# {b} = the to scan's (for "removed", `b` aliases the from set so every section
+# orders by b.endpoint_id).
+SCAN_DIFF_KINDS = ("added", "removed", "moved", "handler_changed")
+
+_SCAN_DIFF_SQL: dict[str, str] = {
+    "added": """
+        SELECT b.endpoint_id, b.method, b.http_path, b.rel_path, b.handler_name,
+               b.decl_line, b.source
+        FROM {b} b
+        WHERE NOT EXISTS (SELECT 1 FROM {a} a WHERE a.endpoint_id = b.endpoint_id)
+    """,
+    "removed": """
+        SELECT b.endpoint_id, b.method, b.http_path, b.rel_path, b.handler_name,
+               b.decl_line, b.source
+        FROM {a} b
+        WHERE NOT EXISTS (SELECT 1 FROM {b} a WHERE a.endpoint_id = b.endpoint_id)
+    """,
+    "moved": """
+        SELECT b.endpoint_id, b.method, b.http_path,
+               a.rel_path AS from_rel_path, b.rel_path AS to_rel_path,
+               a.handler_name AS from_handler, b.handler_name AS to_handler
+        FROM {b} b JOIN {a} a ON a.endpoint_id = b.endpoint_id
+        WHERE a.rel_path != b.rel_path
+    """,
+    "handler_changed": """
+        SELECT b.endpoint_id, b.method, b.http_path, b.rel_path,
+               a.handler_name AS from_handler, b.handler_name AS to_handler
+        FROM {b} b JOIN {a} a ON a.endpoint_id = b.endpoint_id
+        WHERE a.rel_path = b.rel_path AND a.handler_name != b.handler_name
+    """,
+}
+
+
+def _check_diff_kind(kind: str) -> None:
+    if kind not in _SCAN_DIFF_SQL:
+        raise ValueError(f"Unknown diff kind: {kind!r} (expected one of {SCAN_DIFF_KINDS})")
+
+
+class ScanDiff:
+    """
+    Sections of one scan diff, queried against the two sets materialized by
+    SydesSQLiteStore.scan_diff(); only valid inside that block.
+    """
+
+    def __init__(self, con: sqlite3.Connection, a: Optional[str], b: Optional[str]):
+        self._con = con
+        self._a = a
+        self._b = b
+
+    def _sql(self, kind: str) -> str:
+        return _SCAN_DIFF_SQL[kind].format(a=self._a, b=self._b)
+
+    def iter(self, kind: str) -> Iterator[dict]:
+        """
+        Stream one section (ordered by endpoint_id) from a cursor. An unknown `kind`
+        raises here, not on the first row.
+        """
+        _check_diff_kind(kind)
+        if self._a is None:
+            return iter(())
+        return self._rows(self._sql(kind) + " ORDER BY b.endpoint_id")
+
+    def _rows(self, sql: str) -> Iterator[dict]:
+        for row in self._con.execute(sql):
+            yield dict(row)
+
+    def count(self, kind: str) -> int:
+        _check_diff_kind(kind)
+        if self._a is None:
+            return 0
+        return self._con.execute(f"SELECT COUNT(*) FROM ({self._sql(kind)})").fetchone()[0]
+
+    def counts(self) -> dict[str, int]:
+        return {kind: self.count(kind) for kind in SCAN_DIFF_KINDS}
+
+
+# Content hash of the current route set, folded incrementally from route_hashes.
+_META_ROUTES_SET_HASH = "routes_set_hash"
+_EMPTY_SET_HASH = "0" * 64
+
+
+def _file_routes_hash(rows: Iterable[tuple]) -> str:
+    """
+    Hash of one file's routes as snapshotted: distinct
+    (method, http_path, handler_name, decl_line, source) tuples, order-independent.
+    """
+    h = hashlib.sha256()
+    for row in sorted(set(rows)):
+        h.update(json.dumps(row, separators=(",", ":")).encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def _rows_digest(rows: list[tuple]) -> str:
+    # content hash of migrated snapshot rows (ordered by endpoint_id)
+    return hashlib.sha256(json.dumps(rows).encode("utf-8")).hexdigest()
+
+
+def _fold_set_hash(set_hash: str, rel_path: str, old: str, new: str) -> str:
+    """
+    The route set hash is the sum (mod 2^256) of sha256(rel_path, file hash) over
+    files with routes, so replacing one file's term needs no other file.
+    """
+    def term(file_hash: str) -> int:
+        digest = hashlib.sha256(f"{rel_path}\0{file_hash}".encode("utf-8")).digest()
+        return int.from_bytes(digest, "big")
+
+    value = int(set_hash, 16)
+    if old:
+        value -= term(old)
+    if new:
+        value += term(new)
+    return f"{value % (1 << 256):064x}"
 
 
 @dataclass(frozen=True)
@@ -37,12 +232,100 @@ class ScanMeta:
     git_commit: Optional[str]
 
 
+@dataclass(frozen=True)
+class StoreConfig:
+    """
+    Connection settings applied to every store connection.
+
+    synchronous=NORMAL is durable against application crashes under WAL; only an
+    OS crash or power loss can drop the last few commits (never corrupt the DB).
+    cache_size_kib / mmap_size_bytes / busy_timeout_ms of 0 keep SQLite's default.
+    """
+
+    synchronous: str = "NORMAL"
+    cache_size_kib: int = 64 * 1024
+    mmap_size_bytes: int = 256 * 1024 * 1024
+    temp_store: str = "MEMORY"
+    busy_timeout_ms: int = 5000
+    optimize_on_close: bool = True
+
+    def pragmas(self, read_only: bool = False) -> list[str]:
+        out = ["PRAGMA foreign_keys=ON;"]
+        if self.busy_timeout_ms:
+            out.append(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)};")
+        if self.cache_size_kib:
+            out.append(f"PRAGMA cache_size={-int(self.cache_size_kib)};")
+        if self.mmap_size_bytes:
+            out.append(f"PRAGMA mmap_size={int(self.mmap_size_bytes)};")
+        if self.temp_store:
+            out.append(f"PRAGMA temp_store={_pragma_word(self.temp_store)};")
+        if self.synchronous and not read_only:
+            out.append(f"PRAGMA synchronous={_pragma_word(self.synchronous)};")
+        return out
+
+
+def _pragma_word(value: str) -> str:
+    if not value.isalnum():
+        raise ValueError(f"invalid PRAGMA value: {value!r}")
+    return value.upper()
+
+
+def _schema_mismatch(db_path: Path, found: Optional[str], expected: str) -> str:
+    if found is None:
+        return f"{db_path} has no sydes schema; run `sydes analyze` to create it"
+
+    def key(v: str) -> tuple[int, ...]:
+        try:
+            return tuple(int(x) for x in v.split("."))
+        except ValueError:
+            return ()
+
+    if key(found) > key(expected):
+        return (
+            f"database schema {found} is newer than {expected}; "
+            "upgrade sydes to read this database"
+        )
+    return f"database schema {found} is older than {expected}; run `sydes analyze` to upgrade"
+
+
 class SydesSQLiteStore:
-    SCHEMA_VERSION = "1.2"
+    SCHEMA_VERSION = "1.9"
+    # a new snapshot set is stored as a keyframe once its delta chain would reach this
+    SNAPSHOT_KEYFRAME_EVERY = 32
+
+    def __init__(
+        self,
+        db_path: Path,
+        repo_root: Path,
+        read_only: bool = False,
+        config: Optional[StoreConfig] = None,
+    ):
+        """
+        The store keeps one connection, opened with `config`'s PRAGMAs, for its whole
+        life; `close()` runs PRAGMA optimize and closes it.
 
-    def __init__(self, db_path: Path, repo_root: Path):
+        read_only: for commands that only query. Nothing is created or migrated: the
+        first query opens a `mode=ro` connection and checks schema_version only; a DB
+        with another schema raises SchemaVersionError (`sydes analyze` upgrades it).
+        """
         self.db_path = db_path
         self.repo_root = repo_root.resolve()
+        self.read_only = read_only
+        self.config = config if config is not None else StoreConfig()
+
+        # the store's connection, opened on first use
+        self._con: Optional[sqlite3.Connection] = None
+        self._temp_seq = 0
+
+        # unit-of-work session state (see begin/commit/session)
+        self._session_con: Optional[sqlite3.Connection] = None
+        self._commit_every = 0
+        self._commit_interval_s = 0.0
+        self._pending_units = 0
+        self._last_commit = 0.0
+
+        if read_only:
+            return
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self._init_db_and_migrate()
 
@@ -51,16 +334,157 @@ class SydesSQLiteStore:
         return repo_root / ".sydes" / "specs.db"
 
     def _connect(self) -> sqlite3.Connection:
-        con = sqlite3.connect(str(self.db_path))
+        if self.read_only:
+            con = sqlite3.connect(
+                self.db_path.resolve().as_uri() + "?mode=ro", uri=True, check_same_thread=False
+            )
+            # autocommit: temp tables (scan diffs) must not leave a read transaction open
+            con.isolation_level = None
+        else:
+            con = sqlite3.connect(str(self.db_path), check_same_thread=False)
         con.row_factory = sqlite3.Row
+        con.create_function("sydes_endpoint_id", 2, _endpoint_id, deterministic=True)
+        for pragma in self.config.pragmas(self.read_only):
+            con.execute(pragma)
         return con
 
+    def _conn(self) -> sqlite3.Connection:
+        if self._con is not None:
+            return self._con
+        if not self.read_only:
+            self._con = self._connect()
+            return self._con
+
+        if not self.db_path.exists():
+            raise FileNotFoundError(f"No sydes database at {self.db_path}")
+        con = self._connect()
+        try:
+            version = self._get_meta(con, "schema_version")
+        except sqlite3.DatabaseError:
+            version = None
+        if version != self.SCHEMA_VERSION:
+            # never migrate from a read path: only `analyze` (a writable open) upgrades
+            con.close()
+            raise SchemaVersionError(_schema_mismatch(self.db_path, version, self.SCHEMA_VERSION))
+        self._con = con
+        return con
+
+    def check_schema(self) -> None:
+        """
+        Open the connection now; raises SchemaVersionError (read-only stores) if the
+        database needs an upgrade first.
+        """
+        self._conn()
+
+    def close(self) -> None:
+        """
+        End any session, let SQLite refresh its planner statistics, close the connection.
+        """
+        if self._con is None:
+            return
+        try:
+            self.end()
+            if self.config.optimize_on_close and not self.read_only:
+                self._con.execute("PRAGMA optimize;")
+        except sqlite3.Error:
+            pass
+        finally:
+            self._con.close()
+            self._con = None
+
+    def __enter__(self) -> "SydesSQLiteStore":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        """
+        Connection for one store operation. Inside a session nothing is committed
+        here; otherwise the operation commits (or rolls back) when the block ends.
+        """
+        if self._session_con is not None:
+            yield self._session_con
+            return
+        con = self._conn()
+        if self.read_only:
+            yield con
+            return
+        with con:
+            yield con
+
+    # -------------------- unit of work --------------------
+
+    def begin(self, commit_every: int = 500, commit_interval_ms: int = 500) -> None:
+        """
+        Start a session: store calls are batched into large transactions on the
+        store's connection. `unit_done()` commits after `commit_every` units or
+        `commit_interval_ms` milliseconds, whichever comes first; `commit()` forces it.
+        """
+        if self._session_con is not None:
+            raise RuntimeError("store session already active")
+        self._session_con = self._conn()
+        self._commit_every = max(1, int(commit_every))
+        self._commit_interval_s = max(0, int(commit_interval_ms)) / 1000.0
+        self._pending_units = 0
+        self._last_commit = time.monotonic()
+
+    def commit(self) -> None:
+        if self._session_con is None:
+            return
+        self._session_con.commit()
+        self._pending_units = 0
+        self._last_commit = time.monotonic()
+
+    def rollback(self) -> None:
+        if self._session_con is None:
+            return
+        self._session_con.rollback()
+        self._pending_units = 0
+
+    def end(self) -> None:
+        """Commit and end the session (the connection stays open)."""
+        if self._session_con is None:
+            return
+        try:
+            self.commit()
+        finally:
+            self._session_con = None
+
+    def unit_done(self) -> None:
+        """Mark one unit of work (e.g. one file) complete; commit if a batch is due."""
+        if self._session_con is None:
+            return
+        self._pending_units += 1
+        if (
+            self._pending_units >= self._commit_every
+            or time.monotonic() - self._last_commit >= self._commit_interval_s
+        ):
+            self.commit()
+
+    @contextmanager
+    def session(
+        self, commit_every: int = 500, commit_interval_ms: int = 500
+    ) -> Iterator["SydesSQLiteStore"]:
+        """
+        with store.session():
+            ...  # one connection, batched commits; rolled back on error
+        """
+        self.begin(commit_every=commit_every, commit_interval_ms=commit_interval_ms)
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        finally:
+            self.end()
+
     # -------------------- schema & migrations --------------------
 
     def _init_db_and_migrate(self) -> None:
-        with self._connect() as con:
+        with self._tx() as con:
             con.execute("PRAGMA journal_mode=WAL;")
-            con.execute("PRAGMA foreign_keys=ON;")
 
             # meta table always exists
             con.execute(
@@ -103,27 +527,69 @@ class SydesSQLiteStore:
                     schema_version = "1.1"
                     self._set_meta(con, "schema_version", schema_version)
                 else:
-                    # Fresh DB: create 1.2 directly
-                    self._create_schema_1_2(con)
+                    # Fresh DB: create latest schema directly
+                    self._create_schema(con)
                     self._set_meta(con, "schema_version", self.SCHEMA_VERSION)
                     return
 
             # If schema is 1.1, migrate to 1.2 (add scans tables)
             if schema_version == "1.1":
                 self._migrate_1_1_to_1_2(con)
-                self._set_meta(con, "schema_version", self.SCHEMA_VERSION)
-                return
+                schema_version = "1.2"
+                self._set_meta(con, "schema_version", schema_version)
 
-            # If schema already 1.2, ensure tables exist (idempotent)
+            # If schema is 1.2, migrate to 1.3 (files.inode for stat-first skip)
             if schema_version == "1.2":
-                self._create_schema_1_2(con)
+                self._migrate_1_2_to_1_3(con)
+                schema_version = "1.3"
+                self._set_meta(con, "schema_version", schema_version)
+
+            # If schema is 1.3, migrate to 1.4 (per-file include_router / Depends facts)
+            if schema_version == "1.3":
+                self._migrate_1_3_to_1_4(con)
+                schema_version = "1.4"
+                self._set_meta(con, "schema_version", schema_version)
+
+            # If schema is 1.4, migrate to 1.5 (scans.timings)
+            if schema_version == "1.4":
+                self._migrate_1_4_to_1_5(con)
+                schema_version = "1.5"
+                self._set_meta(con, "schema_version", schema_version)
+
+            # If schema is 1.5, migrate to 1.6 (files.skip_reason for per-file budgets)
+            if schema_version == "1.5":
+                self._migrate_1_5_to_1_6(con)
+                schema_version = "1.6"
+                self._set_meta(con, "schema_version", schema_version)
+
+            # If schema is 1.6, migrate to 1.7 (content-addressed snapshot sets)
+            if schema_version == "1.6":
+                self._migrate_1_6_to_1_7(con)
+                schema_version = "1.7"
+                self._set_meta(con, "schema_version", schema_version)
+
+            # If schema is 1.7, migrate to 1.8 (keyframe + delta snapshot history)
+            if schema_version == "1.7":
+                self._migrate_1_7_to_1_8(con)
+                schema_version = "1.8"
+                self._set_meta(con, "schema_version", schema_version)
+
+            # If schema is 1.8, migrate to 1.9 (needle hits of every walked file)
+            if schema_version == "1.8":
+                self._create_schema(con)
+                schema_version = "1.9"
+                self._set_meta(con, "schema_version", schema_version)
+
+            # If schema already current, ensure tables exist (idempotent)
+            if schema_version == self.SCHEMA_VERSION:
+                self._create_schema(con)
                 return
 
             # Unknown schema
             raise RuntimeError(f"Unsupported schema_version in DB: {schema_version}")
 
-    def _create_schema_1_2(self, con: sqlite3.Connection) -> None:
-        # Core tables (1.1)
+    def _create_schema(self, con: sqlite3.Connection) -> None:
+        # Core tables (1.1; files.inode since 1.3, files.skip_reason since 1.6)
         con.execute(
             """
             CREATE TABLE IF NOT EXISTS files (
@@ -131,7 +597,9 @@ class SydesSQLiteStore:
                 sha256 TEXT NOT NULL,
                 mtime_ns INTEGER NOT NULL,
                 size_bytes INTEGER NOT NULL,
-                last_scanned_at INTEGER NOT NULL
+                last_scanned_at INTEGER NOT NULL,
+                inode INTEGER NOT NULL DEFAULT 0,
+                skip_reason TEXT NOT NULL DEFAULT ''
             );
             """
         )
@@ -155,13 +623,42 @@ class SydesSQLiteStore:
         con.execute("CREATE INDEX IF NOT EXISTS idx_routes_file ON routes(rel_path);")
         con.execute("CREATE INDEX IF NOT EXISTS idx_routes_mpath ON routes(method, http_path);")
 
-        # Phase 3.0: scans + endpoint snapshots
+        # 1.4: structural facts, maintained per file alongside routes
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS includes (
+                rel_path TEXT NOT NULL,
+                from_expr TEXT NOT NULL,
+                router TEXT NOT NULL,
+                prefix TEXT NOT NULL,
+                line INTEGER NOT NULL,
+                PRIMARY KEY (rel_path, from_expr, router, prefix)
+            );
+            """
+        )
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS depends (
+                rel_path TEXT NOT NULL,
+                name TEXT NOT NULL,
+                line INTEGER NOT NULL,
+                PRIMARY KEY (rel_path, name)
+            );
+            """
+        )
+        con.execute("CREATE INDEX IF NOT EXISTS idx_depends_name ON depends(name);")
+
+        # Phase 3.0: scans; since 1.7 each scan points at a content-addressed
+        # snapshot set, shared by every scan with the same endpoints; since 1.8 sets
+        # are stored as keyframes or as deltas on a base set (see _SET_ROWS_SQL)
         con.execute(
             """
             CREATE TABLE IF NOT EXISTS scans (
                 scan_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 created_at INTEGER NOT NULL,
-                git_commit TEXT
+                git_commit TEXT,
+                timings TEXT,
+                set_id INTEGER
             );
             """
         )
@@ -169,8 +666,20 @@ class SydesSQLiteStore:
 
         con.execute(
             """
-            CREATE TABLE IF NOT EXISTS scan_endpoints (
-                scan_id INTEGER NOT NULL,
+            CREATE TABLE IF NOT EXISTS snapshot_sets (
+                set_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                content_hash TEXT NOT NULL UNIQUE,
+                endpoints INTEGER NOT NULL,
+                created_at INTEGER NOT NULL,
+                base_set_id INTEGER,
+                depth INTEGER NOT NULL DEFAULT 0
+            );
+            """
+        )
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS snapshot_endpoints (
+                set_id INTEGER NOT NULL,
                 endpoint_id TEXT NOT NULL,
                 method TEXT NOT NULL,
                 http_path TEXT NOT NULL,
@@ -178,14 +687,41 @@ class SydesSQLiteStore:
                 handler_name TEXT NOT NULL,
                 decl_line INTEGER NOT NULL,
                 source TEXT NOT NULL,
-                PRIMARY KEY (scan_id, endpoint_id),
-                FOREIGN KEY (scan_id) REFERENCES scans(scan_id) ON DELETE CASCADE
+                op TEXT NOT NULL DEFAULT '+',
+                PRIMARY KEY (set_id, endpoint_id),
+                FOREIGN KEY (set_id) REFERENCES snapshot_sets(set_id) ON DELETE CASCADE
+            );
+            """
+        )
+        con.execute(
+            "CREATE INDEX IF NOT EXISTS idx_snapshot_endpoints_mpath "
+            "ON snapshot_endpoints(method, http_path);"
+        )
+
+        # 1.7: per-file route hashes, folded into meta.routes_set_hash
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS route_hashes (
+                rel_path TEXT PRIMARY KEY,
+                hash TEXT NOT NULL
             );
             """
         )
-        con.execute("CREATE INDEX IF NOT EXISTS idx_scan_endpoints_scan ON scan_endpoints(scan_id);")
+
+        # 1.9: needle hits of every walked file (candidates or not) by stat triple,
+        # so stat-unchanged files are classified without being read
         con.execute(
-            "CREATE INDEX IF NOT EXISTS idx_scan_endpoints_mpath ON scan_endpoints(method, http_path);"
+            """
+            CREATE TABLE IF NOT EXISTS sniffed_files (
+                rel_path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                hits TEXT NOT NULL,
+                generated INTEGER,
+                last_scanned_at INTEGER NOT NULL
+            );
+            """
         )
 
     def _migrate_1_0_to_1_1(self, con: sqlite3.Connection) -> None:
@@ -279,15 +815,142 @@ class SydesSQLiteStore:
 
     def _migrate_1_1_to_1_2(self, con: sqlite3.Connection) -> None:
         # Just ensure 1.2 tables exist (idempotent)
-        self._create_schema_1_2(con)
+        self._create_schema(con)
+
+    def _migrate_1_2_to_1_3(self, con: sqlite3.Connection) -> None:
+        if "inode" not in self._table_columns(con, "files"):
+            con.execute("ALTER TABLE files ADD COLUMN inode INTEGER NOT NULL DEFAULT 0;")
+
+    def _migrate_1_3_to_1_4(self, con: sqlite3.Connection) -> None:
+        self._create_schema(con)
+        # Files analyzed before 1.4 have no structure rows; forget their fingerprint and
+        # stat so the next analyze re-extracts them instead of skipping them as unchanged.
+        con.execute("UPDATE files SET sha256='', mtime_ns=0;")
+
+    def _migrate_1_4_to_1_5(self, con: sqlite3.Connection) -> None:
+        if "timings" not in self._table_columns(con, "scans"):
+            con.execute("ALTER TABLE scans ADD COLUMN timings TEXT;")
+
+    def _migrate_1_5_to_1_6(self, con: sqlite3.Connection) -> None:
+        if "skip_reason" not in self._table_columns(con, "files"):
+            con.execute("ALTER TABLE files ADD COLUMN skip_reason TEXT NOT NULL DEFAULT '';")
+        # Fingerprints now cover the whole file instead of its first 2MB; files larger
+        # than that will simply be re-extracted once.
+
+    def _migrate_1_6_to_1_7(self, con: sqlite3.Connection) -> None:
+        self._create_schema(con)
+        if "set_id" not in self._table_columns(con, "scans"):
+            con.execute("ALTER TABLE scans ADD COLUMN set_id INTEGER;")
+
+        # Fold per-scan copies into shared sets. Their content hash is taken over the
+        # stored rows ("rows:"), since the routes they came from are gone.
+        if self._table_columns(con, "scan_endpoints"):
+            scan_ids = [r[0] for r in con.execute("SELECT scan_id FROM scans ORDER BY scan_id")]
+            for scan_id in scan_ids:
+                rows = [
+                    tuple(r)
+                    for r in con.execute(
+                        """
+                        SELECT endpoint_id, method, http_path, rel_path, handler_name, decl_line, source
+                        FROM scan_endpoints WHERE scan_id=? ORDER BY endpoint_id
+                        """,
+                        (scan_id,),
+                    )
+                ]
+                digest = _rows_digest(rows)
+
+                def fill(set_id: int, rows: list[tuple] = rows) -> int:
+                    con.executemany(
+                        """
+                        INSERT INTO snapshot_endpoints(
+                            set_id, endpoint_id, method, http_path, rel_path, handler_name,
+                            decl_line, source
+                        ) VALUES(?,?,?,?,?,?,?,?)
+                        """,
+                        [(set_id, *r) for r in rows],
+                    )
+                    return len(rows)
+
+                set_id, _ = self._snapshot_set(con, f"rows:{digest}", fill)
+                con.execute("UPDATE scans SET set_id=? WHERE scan_id=?", (set_id, scan_id))
+            con.execute("DROP TABLE scan_endpoints;")
+
+        self._rebuild_route_hashes(con)
+        self._rekey_current_set(con)
+
+    def _rekey_current_set(self, con: sqlite3.Connection) -> None:
+        """
+        Migrated sets are keyed by their rows ("rows:"), new ones by the route set
+        hash ("routes:"). Give the set that matches the current routes its runtime
+        key, so the first scan after an upgrade reuses it instead of storing a copy.
+        """
+        set_hash = self._get_meta(con, _META_ROUTES_SET_HASH) or _EMPTY_SET_HASH
+        key = f"routes:{set_hash}"
+        if con.execute("SELECT 1 FROM snapshot_sets WHERE content_hash=?", (key,)).fetchone():
+            return
+        rows = [tuple(r) for r in con.execute(_CURRENT_ENDPOINTS_SQL + " ORDER BY 1")]
+        con.execute(
+            "UPDATE snapshot_sets SET content_hash=? WHERE content_hash=?",
+            (key, f"rows:{_rows_digest(rows)}"),
+        )
+
+    def _migrate_1_7_to_1_8(self, con: sqlite3.Connection) -> None:
+        if "base_set_id" not in self._table_columns(con, "snapshot_sets"):
+            con.execute("ALTER TABLE snapshot_sets ADD COLUMN base_set_id INTEGER;")
+            con.execute("ALTER TABLE snapshot_sets ADD COLUMN depth INTEGER NOT NULL DEFAULT 0;")
+        if "op" not in self._table_columns(con, "snapshot_endpoints"):
+            con.execute("ALTER TABLE snapshot_endpoints ADD COLUMN op TEXT NOT NULL DEFAULT '+';")
+
+        # Every existing set is a full copy: re-encode the history as deltas on the
+        # previous set wherever that is smaller.
+        set_ids = [r[0] for r in con.execute("SELECT set_id FROM snapshot_sets ORDER BY set_id")]
+        for base, set_id in pairwise(set_ids):
+            full = self._temp_table(con)
+            con.execute(
+                f"INSERT INTO temp.{full} SELECT {_SNAPSHOT_COLUMNS} FROM snapshot_endpoints WHERE set_id=?",
+                (set_id,),
+            )
+            con.execute("DELETE FROM snapshot_endpoints WHERE set_id=?", (set_id,))
+            self._encode_set(con, set_id, full, base)
+            con.execute(f"DROP TABLE temp.{full};")
+        # 1.7 databases migrated by an earlier release still key every set "rows:"
+        self._rekey_current_set(con)
+
+    def _rebuild_route_hashes(self, con: sqlite3.Connection) -> None:
+        con.execute("DELETE FROM route_hashes;")
+        set_hash = _EMPTY_SET_HASH
+        by_file: dict[str, list[tuple]] = {}
+        for r in con.execute(
+            "SELECT rel_path, method, http_path, handler_name, decl_line, source FROM routes"
+        ):
+            by_file.setdefault(r[0], []).append(tuple(r)[1:])
+        for rel_path, rows in by_file.items():
+            file_hash = _file_routes_hash(rows)
+            con.execute("INSERT INTO route_hashes(rel_path, hash) VALUES(?,?)", (rel_path, file_hash))
+            set_hash = _fold_set_hash(set_hash, rel_path, "", file_hash)
+        self._set_meta(con, _META_ROUTES_SET_HASH, set_hash)
+
+    def _update_route_hash(self, con: sqlite3.Connection, rel_path: str, new: str) -> None:
+        row = con.execute("SELECT hash FROM route_hashes WHERE rel_path=?", (rel_path,)).fetchone()
+        old = row[0] if row else ""
+        if old == new:
+            return
+        if new:
+            con.execute(
+                "INSERT OR REPLACE INTO route_hashes(rel_path, hash) VALUES(?,?)", (rel_path, new)
+            )
+        else:
+            con.execute("DELETE FROM route_hashes WHERE rel_path=?", (rel_path,))
+        set_hash = self._get_meta(con, _META_ROUTES_SET_HASH) or _EMPTY_SET_HASH
+        self._set_meta(con, _META_ROUTES_SET_HASH, _fold_set_hash(set_hash, rel_path, old, new))
 
     # -------------------- files & routes (incremental) --------------------
 
     def get_file_status(self, rel_path: str) -> Optional[FileStatus]:
-        with self._connect() as con:
+        with self._tx() as con:
             row = con.execute(
                 """
-                SELECT rel_path, sha256, mtime_ns, size_bytes, last_scanned_at
+                SELECT rel_path, sha256, mtime_ns, size_bytes, last_scanned_at, inode, skip_reason
                 FROM files WHERE rel_path=?
                 """,
                 (rel_path,),
@@ -300,30 +963,121 @@ class SydesSQLiteStore:
                 mtime_ns=row["mtime_ns"],
                 size_bytes=row["size_bytes"],
                 last_scanned_at=row["last_scanned_at"],
+                inode=row["inode"],
+                skip_reason=row["skip_reason"],
             )
 
     def upsert_file_status(self, status: FileStatus) -> None:
-        with self._connect() as con:
+        with self._tx() as con:
             con.execute(
                 """
-                INSERT INTO files(rel_path, sha256, mtime_ns, size_bytes, last_scanned_at)
-                VALUES(?,?,?,?,?)
+                INSERT INTO files(
+                    rel_path, sha256, mtime_ns, size_bytes, last_scanned_at, inode, skip_reason
+                )
+                VALUES(?,?,?,?,?,?,?)
                 ON CONFLICT(rel_path) DO UPDATE SET
                     sha256=excluded.sha256,
                     mtime_ns=excluded.mtime_ns,
                     size_bytes=excluded.size_bytes,
-                    last_scanned_at=excluded.last_scanned_at;
+                    last_scanned_at=excluded.last_scanned_at,
+                    inode=excluded.inode,
+                    skip_reason=excluded.skip_reason;
                 """,
-                (status.rel_path, status.sha256, status.mtime_ns, status.size_bytes, status.last_scanned_at),
+                (
+                    status.rel_path,
+                    status.sha256,
+                    status.mtime_ns,
+                    status.size_bytes,
+                    status.last_scanned_at,
+                    status.inode,
+                    status.skip_reason,
+                ),
             )
 
     def remove_file(self, rel_path: str) -> None:
-        with self._connect() as con:
+        with self._tx() as con:
             con.execute("DELETE FROM routes WHERE rel_path=?", (rel_path,))
+            self._update_route_hash(con, rel_path, "")
+            con.execute("DELETE FROM includes WHERE rel_path=?", (rel_path,))
+            con.execute("DELETE FROM depends WHERE rel_path=?", (rel_path,))
             con.execute("DELETE FROM files WHERE rel_path=?", (rel_path,))
 
+    def load_file_index(self) -> dict[str, FileStatus]:
+        """
+        Load the whole files table in one sequential read, keyed by rel_path.
+        Lets callers diff against the on-disk inventory without a query per file.
+        """
+        with self._tx() as con:
+            cur = con.execute(
+                """
+                SELECT rel_path, sha256, mtime_ns, size_bytes, last_scanned_at, inode, skip_reason
+                FROM files
+                """
+            )
+            cur.row_factory = None  # plain tuples: cheaper than sqlite3.Row for bulk reads
+            return {
+                row[0]: FileStatus(*row) for row in cur
+            }
+
+    def load_sniffed_files(self) -> dict[str, SniffedFile]:
+        """
+        The sniff index in one read, keyed by rel_path.
+        """
+        with self._tx() as con:
+            cur = con.execute(
+                """
+                SELECT rel_path, mtime_ns, size_bytes, inode, hits, generated, last_scanned_at
+                FROM sniffed_files
+                """
+            )
+            cur.row_factory = None
+            out: dict[str, SniffedFile] = {}
+            for rel, mtime_ns, size, inode, hits, gen, ts in cur:
+                generated = None if gen is None else bool(gen)
+                out[rel] = SniffedFile(rel, mtime_ns, size, inode, json.loads(hits), generated, ts)
+            return out
+
+    def update_sniffed_files(self, upsert: Iterable[SniffedFile], drop: Iterable[str]) -> None:
+        with self._tx() as con:
+            con.executemany("DELETE FROM sniffed_files WHERE rel_path=?", [(r,) for r in drop])
+            con.executemany(
+                """
+                INSERT OR REPLACE INTO sniffed_files(
+                    rel_path, mtime_ns, size_bytes, inode, hits, generated, last_scanned_at
+                ) VALUES(?,?,?,?,?,?,?)
+                """,
+                [
+                    (
+                        e.rel_path,
+                        e.mtime_ns,
+                        e.size_bytes,
+                        e.inode,
+                        json.dumps(e.hits, sort_keys=True),
+                        None if e.generated is None else int(e.generated),
+                        e.last_scanned_at,
+                    )
+                    for e in upsert
+                ],
+            )
+
+    def list_skipped_files(self, limit: int = 200) -> list[dict]:
+        """
+        Files whose extraction was skipped (over budget, timed out, failed) and the reason.
+        """
+        with self._tx() as con:
+            rows = con.execute(
+                """
+                SELECT rel_path, skip_reason, size_bytes, last_scanned_at
+                FROM files WHERE skip_reason != ''
+                ORDER BY rel_path
+                LIMIT ?
+                """,
+                (int(limit),),
+            ).fetchall()
+            return [dict(r) for r in rows]
+
     def list_tracked_files(self) -> list[str]:
-        with self._connect() as con:
+        with self._tx() as con:
             rows = con.execute("SELECT rel_path FROM files").fetchall()
             return [r["rel_path"] for r in rows]
 
@@ -354,7 +1108,7 @@ class SydesSQLiteStore:
                 )
             )
 
-        with self._connect() as con:
+        with self._tx() as con:
             con.execute("DELETE FROM routes WHERE rel_path=?", (rel_path,))
             con.executemany(
                 """
@@ -366,6 +1120,11 @@ class SydesSQLiteStore:
                 """,
                 to_insert,
             )
+            self._update_route_hash(
+                con,
+                rel_path,
+                _file_routes_hash((t[2], t[3], t[4], t[7], t[8]) for t in to_insert) if to_insert else "",
+            )
         return len(to_insert)
 
     def list_routes(
@@ -405,30 +1164,110 @@ class SydesSQLiteStore:
         q += " ORDER BY method, http_path, rel_path, decl_line LIMIT ?"
         params.append(int(limit))
 
-        with self._connect() as con:
+        with self._tx() as con:
+            rows = con.execute(q, tuple(params)).fetchall()
+            return [dict(r) for r in rows]
+
+    # -------------------- structure (include_router / Depends) --------------------
+
+    def replace_structure_for_file(
+        self,
+        rel_path: str,
+        includes: Iterable[object],
+        depends: Iterable[object],
+    ) -> None:
+        """
+        Delete old structural facts for file and insert new ones.
+        `includes` objects must have: from_expr, router, prefix, line
+        `depends` objects must have: name, line
+        Duplicates within a file keep the first line.
+        """
+        inc_rows = [
+            (rel_path, str(i.from_expr), str(i.router), str(i.prefix), int(i.line)) for i in includes
+        ]
+        dep_rows = [(rel_path, str(d.name), int(d.line)) for d in depends]
+
+        with self._tx() as con:
+            con.execute("DELETE FROM includes WHERE rel_path=?", (rel_path,))
+            con.execute("DELETE FROM depends WHERE rel_path=?", (rel_path,))
+            con.executemany(
+                """
+                INSERT OR IGNORE INTO includes(rel_path, from_expr, router, prefix, line)
+                VALUES(?,?,?,?,?)
+                """,
+                inc_rows,
+            )
+            con.executemany(
+                "INSERT OR IGNORE INTO depends(rel_path, name, line) VALUES(?,?,?)",
+                dep_rows,
+            )
+
+    def list_includes(self, file_contains: Optional[str] = None) -> list[dict]:
+        q = "SELECT from_expr, router, prefix, rel_path, line FROM includes"
+        params: list[object] = []
+        if file_contains:
+            q += " WHERE rel_path LIKE ?"
+            params.append(f"%{file_contains}%")
+        q += " ORDER BY rel_path, line"
+        with self._tx() as con:
+            rows = con.execute(q, tuple(params)).fetchall()
+            return [
+                {
+                    "from": r["from_expr"],
+                    "router": r["router"],
+                    "prefix": r["prefix"],
+                    "rel_path": r["rel_path"],
+                    "line": r["line"],
+                }
+                for r in rows
+            ]
+
+    def list_depends(self, name: Optional[str] = None) -> list[dict]:
+        q = "SELECT name, rel_path, line FROM depends"
+        params: list[object] = []
+        if name:
+            q += " WHERE name = ?"
+            params.append(name)
+        q += " ORDER BY rel_path, line"
+        with self._tx() as con:
             rows = con.execute(q, tuple(params)).fetchall()
             return [dict(r) for r in rows]
 
+    def get_structure(self) -> dict[str, list[dict]]:
+        """
+        Stored equivalent of extract_fastapi_structure(): indexed reads, no parsing.
+        """
+        return {"includes": self.list_includes(), "depends": self.list_depends()}
+
     # -------------------- incremental hashing --------------------
 
-    def compute_file_fingerprint(self, path: Path, max_bytes: int = 2_000_000) -> tuple[str, int, int]:
+    def compute_file_fingerprint(
+        self,
+        path: Path,
+        blob: Optional[FileBlob] = None,
+        chunk_size: int = 1 << 20,
+    ) -> tuple[str, int, int]:
         """
-        Returns (sha256, mtime_ns, size_bytes)
+        Returns (sha256, mtime_ns, size_bytes) over the whole file content.
+
+        If `blob` is given (read-once cache) and holds the complete file, hash its bytes
+        instead of re-reading; otherwise the file is streamed in chunks, so large files
+        never collide on a shared prefix and are never loaded whole.
         """
-        stat = path.stat()
-        mtime_ns = int(getattr(stat, "st_mtime_ns", int(stat.st_mtime * 1e9)))
-        size_bytes = int(stat.st_size)
+        if blob is not None and len(blob.data) == blob.size_bytes:
+            return _sha256_bytes(blob.data), blob.mtime_ns, blob.size_bytes
 
-        data = path.read_bytes()
-        if len(data) > max_bytes:
-            data = data[:max_bytes]
-        sha = _sha256_bytes(data)
-        return sha, mtime_ns, size_bytes
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            while chunk := f.read(chunk_size):
+                h.update(chunk)
+        return h.hexdigest(), int(stat.st_mtime_ns), int(stat.st_size)
 
     # -------------------- scans & diffs (Phase 3.0) --------------------
 
     def create_scan(self, git_commit: Optional[str] = None) -> int:
-        with self._connect() as con:
+        with self._tx() as con:
             con.execute(
                 "INSERT INTO scans(created_at, git_commit) VALUES(?, ?)",
                 (_now_ts(), git_commit),
@@ -436,8 +1275,40 @@ class SydesSQLiteStore:
             scan_id = con.execute("SELECT last_insert_rowid() AS id").fetchone()["id"]
             return int(scan_id)
 
+    def set_scan_timings(self, scan_id: int, timings: list[dict]) -> None:
+        """
+        Per-stage analyze timings for a scan, stored as JSON on its scans row:
+          [{"name": "walk", "wall_s": ..., "cpu_s": ..., "bytes_read": ..., "files": ...}, ...]
+        Query with json_each / json_extract to chart scan performance over time.
+        """
+        with self._tx() as con:
+            con.execute(
+                "UPDATE scans SET timings=? WHERE scan_id=?",
+                (json.dumps(timings, separators=(",", ":")), int(scan_id)),
+            )
+
+    def get_scan_timings(self, scan_id: int) -> list[dict]:
+        with self._tx() as con:
+            row = con.execute("SELECT timings FROM scans WHERE scan_id=?", (int(scan_id),)).fetchone()
+            if not row or not row["timings"]:
+                return []
+            return json.loads(row["timings"])
+
+    def last_scan_commit(self) -> Optional[str]:
+        """git_commit of the most recent scan that recorded one (None if none did)."""
+        with self._tx() as con:
+            row = con.execute(
+                """
+                SELECT git_commit FROM scans
+                WHERE git_commit IS NOT NULL
+                ORDER BY scan_id DESC
+                LIMIT 1
+                """
+            ).fetchone()
+            return row["git_commit"] if row else None
+
     def list_scans(self, limit: int = 50) -> list[ScanMeta]:
-        with self._connect() as con:
+        with self._tx() as con:
             rows = con.execute(
                 """
                 SELECT scan_id, created_at, git_commit
@@ -458,63 +1329,163 @@ class SydesSQLiteStore:
 
     def snapshot_current_endpoints(self, scan_id: int) -> int:
         """
-        Snapshot the CURRENT routes table into scan_endpoints for this scan_id.
-        Returns number of endpoints snapshotted (distinct METHOD+PATH).
+        Point this scan at the snapshot set of the CURRENT routes table, storing the
+        set only if no earlier scan had the same content (so an analyze that changed
+        nothing adds just its scans row).
+        Returns number of endpoints in the snapshot (distinct METHOD+PATH).
+        """
+        with self._tx() as con:
+            set_hash = self._get_meta(con, _META_ROUTES_SET_HASH) or _EMPTY_SET_HASH
+
+            def fill(set_id: int) -> int:
+                # One row per METHOD+PATH; duplicates keep the first by file+decl_line.
+                full = self._temp_table(con)
+                con.execute(f"INSERT INTO temp.{full} " + _CURRENT_ENDPOINTS_SQL)
+                # delta against the set of the latest earlier scan
+                row = con.execute(
+                    """
+                    SELECT set_id FROM scans
+                    WHERE set_id IS NOT NULL AND scan_id != ?
+                    ORDER BY scan_id DESC LIMIT 1
+                    """,
+                    (int(scan_id),),
+                ).fetchone()
+                try:
+                    return self._encode_set(con, set_id, full, row[0] if row else None)
+                finally:
+                    con.execute(f"DROP TABLE temp.{full};")
+
+            set_id, endpoints = self._snapshot_set(con, f"routes:{set_hash}", fill)
+            con.execute("UPDATE scans SET set_id=? WHERE scan_id=?", (set_id, int(scan_id)))
+            return endpoints
+
+    def _snapshot_set(
+        self, con: sqlite3.Connection, content_hash: str, fill: Callable[[int], int]
+    ) -> tuple[int, int]:
+        """
+        (set_id, endpoints) of the set with this content hash; `fill(set_id)` stores
+        the rows of a new one and returns how many it wrote.
         """
-        rows = self.list_routes(limit=1_000_000)
+        row = con.execute(
+            "SELECT set_id, endpoints FROM snapshot_sets WHERE content_hash=?", (content_hash,)
+        ).fetchone()
+        if row is not None:
+            return int(row[0]), int(row[1])
+        cur = con.execute(
+            "INSERT INTO snapshot_sets(content_hash, endpoints, created_at) VALUES(?, 0, ?)",
+            (content_hash, _now_ts()),
+        )
+        set_id = int(cur.lastrowid)
+        endpoints = fill(set_id)
+        con.execute("UPDATE snapshot_sets SET endpoints=? WHERE set_id=?", (endpoints, set_id))
+        return set_id, endpoints
 
-        # For endpoint-level snapshot, we keep one row per METHOD+PATH.
-        # If duplicates exist, keep the first deterministically (by file+decl_line via SQL ordering already).
-        seen: set[str] = set()
-        inserts: list[tuple[object, ...]] = []
+    def _temp_table(self, con: sqlite3.Connection) -> str:
+        """
+        New temp table holding one set's rows, keyed by endpoint_id.
+        """
+        self._temp_seq += 1
+        name = f"snapshot_rows_{self._temp_seq}"
+        con.execute(
+            f"""
+            CREATE TEMP TABLE {name} (
+                endpoint_id TEXT PRIMARY KEY,
+                method TEXT NOT NULL,
+                http_path TEXT NOT NULL,
+                rel_path TEXT NOT NULL,
+                handler_name TEXT NOT NULL,
+                decl_line INTEGER NOT NULL,
+                source TEXT NOT NULL
+            );
+            """
+        )
+        return name
 
-        for r in rows:
-            method = str(r["method"]).upper()
-            http_path = str(r["http_path"])
-            eid = _endpoint_id(method, http_path)
-            if eid in seen:
-                continue
-            seen.add(eid)
+    def _materialize_set(self, con: sqlite3.Connection, set_id: int) -> str:
+        name = self._temp_table(con)
+        con.execute(f"INSERT INTO temp.{name} " + _SET_ROWS_SQL, {"set_id": int(set_id)})
+        return name
 
-            inserts.append(
-                (
-                    int(scan_id),
-                    eid,
-                    method,
-                    http_path,
-                    str(r["rel_path"]),
-                    str(r["handler_name"]),
-                    int(r["decl_line"]),
-                    str(r["source"]),
-                )
-            )
+    def _encode_set(
+        self, con: sqlite3.Connection, set_id: int, full: str, base_set_id: Optional[int]
+    ) -> int:
+        """
+        Store set `set_id`, whose rows are in temp table `full`: as a delta on
+        `base_set_id` while the chain stays short and the delta small, else as a
+        keyframe. Returns the number of endpoints in the set.
+        """
+        total = con.execute(f"SELECT COUNT(*) FROM temp.{full}").fetchone()[0]
+        base = None
+        if base_set_id is not None:
+            base = con.execute(
+                "SELECT set_id, depth FROM snapshot_sets WHERE set_id=?", (int(base_set_id),)
+            ).fetchone()
 
-        with self._connect() as con:
-            con.executemany(
+        if base is not None and base[1] + 1 < self.SNAPSHOT_KEYFRAME_EVERY:
+            prev = self._materialize_set(con, base[0])
+            try:
+                changed = f"""
+                    SELECT n.* FROM temp.{full} n
+                    LEFT JOIN temp.{prev} p ON p.endpoint_id = n.endpoint_id
+                    WHERE p.endpoint_id IS NULL
+                       OR (n.method, n.http_path, n.rel_path, n.handler_name, n.decl_line, n.source)
+                          IS NOT (p.method, p.http_path, p.rel_path, p.handler_name, p.decl_line, p.source)
                 """
-                INSERT OR REPLACE INTO scan_endpoints(
-                    scan_id, endpoint_id, method, http_path, rel_path, handler_name, decl_line, source
-                ) VALUES(?,?,?,?,?,?,?,?)
-                """,
-                inserts,
-            )
+                gone = f"""
+                    SELECT p.* FROM temp.{prev} p
+                    WHERE NOT EXISTS (SELECT 1 FROM temp.{full} n WHERE n.endpoint_id = p.endpoint_id)
+                """
+                delta = con.execute(
+                    f"SELECT (SELECT COUNT(*) FROM ({changed})) + (SELECT COUNT(*) FROM ({gone}))"
+                ).fetchone()[0]
+                if delta * 2 <= total:
+                    for sql, op in ((changed, "+"), (gone, "-")):
+                        con.execute(
+                            f"""
+                            INSERT INTO snapshot_endpoints(set_id, {_SNAPSHOT_COLUMNS}, op)
+                            SELECT ?, {_SNAPSHOT_COLUMNS}, ? FROM ({sql})
+                            """,
+                            (int(set_id), op),
+                        )
+                    con.execute(
+                        "UPDATE snapshot_sets SET base_set_id=?, depth=? WHERE set_id=?",
+                        (base[0], base[1] + 1, int(set_id)),
+                    )
+                    return total
+            finally:
+                con.execute(f"DROP TABLE temp.{prev};")
 
-        return len(inserts)
+        con.execute(
+            f"""
+            INSERT INTO snapshot_endpoints(set_id, {_SNAPSHOT_COLUMNS}, op)
+            SELECT ?, {_SNAPSHOT_COLUMNS}, '+' FROM temp.{full}
+            """,
+            (int(set_id),),
+        )
+        con.execute(
+            "UPDATE snapshot_sets SET base_set_id=NULL, depth=0 WHERE set_id=?", (int(set_id),)
+        )
+        return total
+
+    def _scan_set_id(self, con: sqlite3.Connection, scan_id: int) -> int:
+        # scans without a snapshot (or unknown ids) read as the empty set
+        row = con.execute("SELECT set_id FROM scans WHERE scan_id=?", (int(scan_id),)).fetchone()
+        return int(row[0]) if row is not None and row[0] is not None else -1
 
     def get_scan_endpoints(self, scan_id: int) -> dict[str, dict]:
         """
         Returns dict endpoint_id -> row dict
         """
-        with self._connect() as con:
-            rows = con.execute(
-                """
-                SELECT endpoint_id, method, http_path, rel_path, handler_name, decl_line, source
-                FROM scan_endpoints
-                WHERE scan_id=?
-                """,
-                (int(scan_id),),
-            ).fetchall()
-            return {str(r["endpoint_id"]): dict(r) for r in rows}
+        return {str(r["endpoint_id"]): r for r in self.iter_scan_endpoints(scan_id)}
+
+    def iter_scan_endpoints(self, scan_id: int) -> Iterator[dict]:
+        """
+        Stream the endpoints of a scan, rebuilt from its set's keyframe and deltas.
+        """
+        with self._tx() as con:
+            params = {"set_id": self._scan_set_id(con, scan_id)}
+            for row in con.execute(_SET_ROWS_SQL + " ORDER BY endpoint_id", params):
+                yield dict(row)
 
     def diff_scans(self, from_scan_id: int, to_scan_id: int) -> dict[str, list[dict]]:
         """
@@ -524,56 +1495,56 @@ class SydesSQLiteStore:
           moved: same endpoint id, but rel_path changed
           handler_changed: same endpoint id+file, but handler_name changed
         """
-        a = self.get_scan_endpoints(from_scan_id)
-        b = self.get_scan_endpoints(to_scan_id)
-
-        a_ids = set(a.keys())
-        b_ids = set(b.keys())
-
-        added = [b[i] for i in sorted(b_ids - a_ids)]
-        removed = [a[i] for i in sorted(a_ids - b_ids)]
-
-        moved: list[dict] = []
-        handler_changed: list[dict] = []
-
-        for i in sorted(a_ids & b_ids):
-            ra = a[i]
-            rb = b[i]
-            if ra["rel_path"] != rb["rel_path"]:
-                moved.append(
-                    {
-                        "endpoint_id": i,
-                        "method": rb["method"],
-                        "http_path": rb["http_path"],
-                        "from_rel_path": ra["rel_path"],
-                        "to_rel_path": rb["rel_path"],
-                        "from_handler": ra["handler_name"],
-                        "to_handler": rb["handler_name"],
-                    }
-                )
-                continue
-
-            if ra["handler_name"] != rb["handler_name"]:
-                handler_changed.append(
-                    {
-                        "endpoint_id": i,
-                        "method": rb["method"],
-                        "http_path": rb["http_path"],
-                        "rel_path": rb["rel_path"],
-                        "from_handler": ra["handler_name"],
-                        "to_handler": rb["handler_name"],
-                    }
-                )
+        with self.scan_diff(from_scan_id, to_scan_id) as d:
+            return {kind: list(d.iter(kind)) for kind in SCAN_DIFF_KINDS}
+
+    @contextmanager
+    def scan_diff(self, from_scan_id: int, to_scan_id: int) -> Iterator[ScanDiff]:
+        """
+        Both scans' sets, rebuilt once into temp tables for as many section queries
+        as the caller runs inside the block (dropped when it ends).
+        """
+        with self._tx() as con:
+            a, b = self._scan_set_id(con, from_scan_id), self._scan_set_id(con, to_scan_id)
+            if a == b:
+                yield ScanDiff(con, None, None)  # same snapshot set: identical endpoints
+                return
+            ta, tb = self._materialize_set(con, a), self._materialize_set(con, b)
+            try:
+                yield ScanDiff(con, f"temp.{ta}", f"temp.{tb}")
+            finally:
+                con.execute(f"DROP TABLE temp.{ta};")
+                con.execute(f"DROP TABLE temp.{tb};")
+
+    def iter_scan_diff(self, from_scan_id: int, to_scan_id: int, kind: str) -> Iterator[dict]:
+        """
+        Stream one section of diff_scans (ordered by endpoint_id) from a cursor.
+        For several sections of the same diff, use scan_diff().
+        """
+        _check_diff_kind(kind)
+        return self._iter_scan_diff(from_scan_id, to_scan_id, kind)
 
-        return {
-            "added": added,
-            "removed": removed,
-            "moved": moved,
-            "handler_changed": handler_changed,
-        }
+    def _iter_scan_diff(self, from_scan_id: int, to_scan_id: int, kind: str) -> Iterator[dict]:
+        with self.scan_diff(from_scan_id, to_scan_id) as d:
+            yield from d.iter(kind)
+
+    def count_scan_diff(self, from_scan_id: int, to_scan_id: int) -> dict[str, int]:
+        """
+        Row counts of every diff_scans section, without materializing any row.
+        """
+        with self.scan_diff(from_scan_id, to_scan_id) as d:
+            return d.counts()
 
     # -------------------- meta helpers --------------------
 
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._tx() as con:
+            return self._get_meta(con, key)
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._tx() as con:
+            self._set_meta(con, key, value)
+
     def _table_columns(self, con: sqlite3.Connection, table: str) -> set[str]:
         rows = con.execute(f"PRAGMA table_info({table});").fetchall()
         return {r[1] for r in rows}
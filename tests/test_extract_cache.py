@@ -0,0 +1,103 @@
+from pathlib import Path
+import sqlite3
+import textwrap
+import time
+
+from sydes.extractors.fastapi.chunker import extract_facts_from_source
+from sydes.orchestrator.pipeline import run_analyze
+from sydes.store.extract_cache import ExtractionCache, default_cache_dir
+from sydes.store.sqlite_store import SydesSQLiteStore
+
+
+def write(p: Path, s: str) -> None:
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(textwrap.dedent(s), encoding="utf-8")
+
+
+APP = """
+from fastapi import APIRouter, Depends, FastAPI
+app = FastAPI()
+
+@app.get("/a")
+def a(db=Depends(get_db)): return {}
+
+app.include_router(users.router, prefix="/users")
+"""
+
+
+def test_identical_content_is_extracted_once_across_repos(tmp_path: Path):
+    cache_dir = tmp_path / "cache"
+    one = tmp_path / "one"
+    two = tmp_path / "two"
+    write(one / "app.py", APP)
+    write(two / "renamed" / "main.py", APP)
+
+    r1 = run_analyze(one, cache_dir=cache_dir)
+    assert r1.cache_hits == 0
+
+    r2 = run_analyze(two, cache_dir=cache_dir)
+    assert r2.cache_hits == 1
+    assert [(r.method, r.path, r.handler_name) for r in r2.routes] == [("GET", "/a", "a")]
+    assert r2.routes[0].file_path == str((two / "renamed" / "main.py").resolve())
+
+    store = SydesSQLiteStore(SydesSQLiteStore.db_path_for_repo(two), repo_root=two)
+    assert [x["rel_path"] for x in store.list_routes()] == [str(Path("renamed/main.py"))]
+    structure = store.get_structure()
+    assert [i["router"] for i in structure["includes"]] == ["users.router"]
+    assert [d["name"] for d in structure["depends"]] == ["get_db"]
+
+
+def test_cache_evicts_least_recently_used(tmp_path: Path):
+    facts = extract_facts_from_source(APP)
+
+    cache = ExtractionCache(tmp_path)
+    cache.put("old", facts)
+    cache.put("new", facts)
+    cache._con.execute("UPDATE entries SET last_used=0 WHERE key=?", (ExtractionCache.key("old"),))
+    entry_size = cache._con.execute("SELECT MAX(size) FROM entries").fetchone()[0]
+    cache.max_bytes = entry_size  # room for exactly one entry
+    cache.close()
+
+    cache = ExtractionCache(tmp_path)
+    assert cache.get("old") is None
+    assert cache.get("new") == facts
+    cache.close()
+
+
+def test_default_cache_dir_honours_env(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("SYDES_CACHE_DIR", str(tmp_path / "explicit"))
+    assert default_cache_dir() == tmp_path / "explicit"
+
+    monkeypatch.delenv("SYDES_CACHE_DIR")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    assert default_cache_dir() == tmp_path / "xdg" / "sydes"
+
+
+def test_concurrent_caches_share_a_directory_without_blocking(tmp_path: Path):
+    facts = extract_facts_from_source(APP)
+    one = ExtractionCache(tmp_path)
+    two = ExtractionCache(tmp_path)
+
+    # each put commits at once: neither cache holds the database between writes
+    one.put("a", facts)
+    t0 = time.perf_counter()
+    two.put("b", facts)
+    assert time.perf_counter() - t0 < 1
+    assert one.get("b") == facts and two.get("a") == facts
+
+    # a writer that does hold the lock makes puts drop, not wait
+    other = sqlite3.connect(str(one.path), isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    t0 = time.perf_counter()
+    two.put("c", facts)
+    assert time.perf_counter() - t0 < 1
+    assert two.dropped_writes == 1
+    assert two.get("a") == facts  # reads are unaffected
+    other.execute("ROLLBACK")
+    other.close()
+
+    one.close()
+    two.close()
+    cache = ExtractionCache(tmp_path)
+    assert cache.get("a") == facts and cache.get("b") == facts and cache.get("c") is None
+    cache.close()
@@ -1,4 +1,4 @@
-from sydes.extractors.fastapi.chunker import extract_routes_from_source
+from sydes.extractors.fastapi.chunker import extract_facts_from_source, extract_routes_from_source
 
 
 def test_extract_routes_basic_app_and_router():
@@ -139,3 +139,39 @@ app.add_api_route("/x", handler, methods=m)
 """
     routes = extract_routes_from_source(src)
     assert routes == []
+
+
+def test_extract_facts_single_pass_collects_structure():
+    src = """
+from fastapi import APIRouter, Depends, FastAPI
+from . import users
+
+app = FastAPI()
+router: APIRouter = APIRouter(prefix="/v1")
+
+def get_db():
+    return None
+
+@router.get("/items")
+def list_items(db=Depends(get_db)):
+    return []
+
+app.include_router(router, prefix="/api")
+app.include_router(users.router)
+"""
+    facts = extract_facts_from_source(src)
+    assert [(r.method, r.path) for r in facts.routes] == [("GET", "/items")]
+    assert [(i.from_expr, i.router, i.prefix) for i in facts.includes] == [
+        ("app", "router", "/api"),
+        ("app", "users.router", ""),
+    ]
+    assert [d.name for d in facts.depends] == ["get_db"]
+    assert sorted((a.kind, a.target, a.prefix) for a in facts.apps) == [
+        ("APIRouter", "router", "/v1"),
+        ("FastAPI", "app", ""),
+    ]
+
+
+def test_extract_facts_syntax_error_is_empty():
+    facts = extract_facts_from_source("def broken(:\n")
+    assert facts.routes == [] and facts.includes == [] and facts.depends == [] and facts.apps == []
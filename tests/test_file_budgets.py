@@ -0,0 +1,129 @@
+from pathlib import Path
+import textwrap
+import time
+
+import pytest
+
+from sydes.orchestrator.pipeline import iter_analyze, run_analyze
+from sydes.orchestrator.workers import KillablePool, TaskFailed, TaskTimeout
+from sydes.store.sqlite_store import SydesSQLiteStore
+
+
+def write(p: Path, s: str) -> None:
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(textwrap.dedent(s), encoding="utf-8")
+
+
+ROUTER = """
+from fastapi import APIRouter
+router = APIRouter()
+
+@router.get("/items")
+def list_items(): return []
+"""
+
+
+def drain(events):
+    out = []
+    while True:
+        try:
+            out.append(next(events))
+        except StopIteration as done:
+            return out, done.value
+
+
+def test_oversized_file_is_skipped_recorded_and_not_retried(tmp_path: Path):
+    repo = tmp_path / "repo"
+    write(repo / "small.py", ROUTER)
+    write(repo / "big.py", ROUTER + "\n# padding\n" * 400)
+
+    events, result = drain(iter_analyze(repo, max_file_bytes=1000))
+    by_path = {e.rel_path: e for e in events}
+    assert by_path["big.py"].status == "skipped" and by_path["big.py"].routes == []
+    assert by_path["small.py"].status == "changed"
+    assert result.skipped_files == 1
+    assert result.routes_found == 1
+
+    store = SydesSQLiteStore(SydesSQLiteStore.db_path_for_repo(repo), repo_root=repo)
+    skipped = store.list_skipped_files()
+    assert [r["rel_path"] for r in skipped] == ["big.py"]
+    assert skipped[0]["skip_reason"].startswith("too large")
+
+    # same content: not retried, even with a larger budget
+    events, result = drain(iter_analyze(repo, max_file_bytes=1_000_000))
+    assert events == [] and result.skipped_files == 0
+
+    # new content: retried under the new budget
+    write(repo / "big.py", ROUTER + "\n# padding\n" * 401)
+    events, result = drain(iter_analyze(repo, max_file_bytes=1_000_000))
+    assert [(e.rel_path, e.status, len(e.routes)) for e in events] == [("big.py", "changed", 1)]
+    assert store.list_skipped_files() == []
+
+
+def test_files_beyond_the_read_buffer_are_parsed_whole(tmp_path: Path):
+    repo = tmp_path / "repo"
+    tail = '\n@router.get("/tail")\ndef tail(): return []\n'
+    write(repo / "app.py", ROUTER + "# x\n" * 600_000 + tail)  # 2.4MB
+
+    result = run_analyze(repo, max_file_bytes=4_000_000)
+    assert sorted(r.path for r in result.routes) == ["/items", "/tail"]
+    assert result.skipped_files == 0
+
+
+def test_fingerprint_covers_the_whole_file(tmp_path: Path):
+    prefix = b"#" * 3_000_000
+    a, b = tmp_path / "a.py", tmp_path / "b.py"
+    a.write_bytes(prefix + b"a")
+    b.write_bytes(prefix + b"b")
+
+    store = SydesSQLiteStore(tmp_path / "db.sqlite", repo_root=tmp_path)
+    assert store.compute_file_fingerprint(a)[0] != store.compute_file_fingerprint(b)[0]
+
+
+def test_killable_pool_enforces_the_time_budget():
+    pool = KillablePool(workers=1, timeout_s=0.5)
+    try:
+        t0 = time.perf_counter()
+        slow = pool.submit(time.sleep, 30)
+        with pytest.raises(TaskTimeout):
+            slow.result()
+        assert time.perf_counter() - t0 < 10
+
+        # the killed worker is replaced; task errors are reported, not fatal
+        with pytest.raises(TaskFailed, match="ValueError"):
+            pool.submit(int, "x").result()
+        assert pool.submit(pow, 2, 10).result() == 1024
+    finally:
+        pool.shutdown()
+
+
+def test_killable_pool_starts_the_deadline_once_the_worker_is_ready():
+    # a slow initializer stands in for interpreter boot and imports
+    pool = KillablePool(workers=1, timeout_s=0.5, initializer=time.sleep, initargs=(1,))
+    try:
+        assert pool.submit(pow, 2, 10).result() == 1024
+        with pytest.raises(TaskTimeout):
+            pool.submit(time.sleep, 30).result()
+        assert pool.submit(pow, 3, 2).result() == 9  # the replacement boots outside the budget too
+    finally:
+        pool.shutdown()
+
+
+def test_analyze_with_time_budget_uses_killable_workers(tmp_path: Path):
+    repo = tmp_path / "repo"
+    write(repo / "r.py", ROUTER)
+
+    result = run_analyze(repo, file_timeout_s=30)
+    assert [r.path for r in result.routes] == ["/items"]
+    assert result.skipped_files == 0
+
+
+def test_worker_start_up_is_not_charged_to_the_time_budget(tmp_path: Path):
+    repo = tmp_path / "repo"
+    for name in ("a", "b", "c"):
+        write(repo / f"{name}.py", ROUTER.replace("/items", f"/{name}"))
+
+    # less than booting a spawn worker and importing sydes takes
+    result = run_analyze(repo, file_timeout_s=0.05)
+    assert sorted(r.path for r in result.routes) == ["/a", "/b", "/c"]
+    assert result.skipped_files == 0
@@ -0,0 +1,134 @@
+from pathlib import Path
+import os
+import textwrap
+
+from sydes.orchestrator.pipeline import run_analyze
+from sydes.repo.config import load_repo_config
+from sydes.repo.generated import GeneratedFileDetector
+from sydes.store.sqlite_store import SydesSQLiteStore
+
+
+def write(p: Path, s: str) -> None:
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(textwrap.dedent(s), encoding="utf-8")
+
+
+ROUTER = """
+from fastapi import APIRouter
+router = APIRouter()
+
+@router.get("/items")
+def list_items(): return []
+"""
+
+
+def test_detector_rules():
+    d = GeneratedFileDetector()
+    assert d.reason("/r/api/service_pb2.py", b"") == "name matches *_pb2.py"
+    assert d.reason("/r/api/service_pb2_grpc.py", b"") == "name matches *_pb2_grpc.py"
+    assert d.reason(
+        "/r/client.py", b"# coding: utf-8\n\n# Generated by the protocol buffer compiler.  DO NOT EDIT!\n"
+    ) == "header: generated by the protocol buffer compiler"
+    grpc = b"# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!\nimport grpc\n"
+    assert d.reason("/r/stubs.py", grpc) == "header: generated by the grpc python protocol compiler plugin"
+    assert d.reason("/r/blob.py", b"x = '" + b"a" * 5000 + b"'\n") == "line longer than 1000 bytes"
+    assert d.reason("/r/routes.py", ROUTER.encode()) == ""
+
+    # markers count only in the header, never after the first line of code
+    late = ROUTER.encode() + b"# @generated\n"
+    assert d.reason("/r/routes.py", late) == ""
+    docstring = b'"""\nUsers API.\n\n@generated by tools/gen.py\n"""\n' + ROUTER.encode()
+    assert d.reason("/r/routes.py", docstring) == "header: @generated"
+
+    # prose in a hand-written module's docstring is not a banner
+    prose = b'"""Users API. Interactive docs are auto-generated by FastAPI at /docs."""\n'
+    assert d.reason("/r/routes.py", prose + ROUTER.encode()) == ""
+    assert GeneratedFileDetector(markers=(), max_line_length=0).reason(
+        "/r/x.py", b"# @generated\n" + b"a" * 5000
+    ) == ""
+
+
+def test_generated_modules_are_not_candidates(tmp_path: Path):
+    repo = tmp_path / "repo"
+    write(repo / "api/routes.py", ROUTER)
+    write(repo / "api/service_pb2_grpc.py", ROUTER)
+    write(repo / "clients/openapi.py", '"""\nGenerated by: https://openapi-generator.tech\n"""\n' + ROUTER)
+
+    result = run_analyze(repo)
+    assert result.generated_files == 2
+    assert [Path(p).name for p in result.candidate_files] == ["routes.py"]
+    assert [r.file_path for r in result.routes] == [str(repo.resolve() / "api/routes.py")]
+
+
+def test_generated_detection_is_configurable(tmp_path: Path):
+    repo = tmp_path / "repo"
+    write(
+        repo / "pyproject.toml",
+        """
+        [tool.sydes]
+        generated_patterns = "*_gen.py"
+        generated_markers = []
+        generated_max_line_length = 0
+        """,
+    )
+    write(repo / "routes_gen.py", ROUTER)
+    write(repo / "service_pb2.py", "# DO NOT EDIT\n" + ROUTER)
+
+    config = load_repo_config(repo)
+    assert config.generated_patterns == ("*_gen.py",)
+    assert config.generated_markers == ()
+
+    result = run_analyze(repo)
+    assert result.generated_files == 1
+    assert [Path(p).name for p in result.candidate_files] == ["service_pb2.py"]
+
+    write(repo / "pyproject.toml", "[tool.sydes]\ndetect_generated = false\n")
+    result = run_analyze(repo)
+    assert result.generated_files == 0
+    assert len(result.candidate_files) == 2
+
+
+def age(repo: Path) -> None:
+    # push mtimes into the past so tracked files take the stat fast path (not "racy")
+    for f in repo.glob("*.py"):
+        past = f.stat().st_mtime_ns - 10_000_000_000
+        os.utime(f, ns=(past, past))
+
+
+def test_tracked_files_are_reclassified_when_detection_changes(tmp_path: Path):
+    repo = tmp_path / "repo"
+    write(repo / "routes.py", ROUTER)
+    write(repo / "models_pb2.py", ROUTER)
+    write(repo / "client.py", "# @generated\n" + ROUTER)
+    write(repo / "pyproject.toml", "[tool.sydes]\ndetect_generated = false\n")
+    age(repo)
+
+    result = run_analyze(repo)
+    assert len(result.candidate_files) == 3
+
+    # same bytes and stat: the files are not re-read, but no longer candidates
+    write(repo / "pyproject.toml", "[tool.sydes]\ndetect_generated = true\n")
+    for git_mode in (False, True):
+        result = run_analyze(repo, git_mode=git_mode)
+        assert result.changed_files == 0
+        assert result.generated_files == 2
+        assert [Path(p).name for p in result.candidate_files] == ["routes.py"]
+
+    store = SydesSQLiteStore(SydesSQLiteStore.db_path_for_repo(repo), repo_root=repo)
+    assert [r["rel_path"] for r in store.list_routes()] == ["routes.py"]
+
+
+def test_tracked_generated_files_are_removed_in_git_mode(tmp_path: Path):
+    repo = tmp_path / "repo"
+    write(repo / "routes.py", ROUTER)
+    write(repo / "models_pb2.py", ROUTER)
+    write(repo / "pyproject.toml", "[tool.sydes]\ndetect_generated = false\n")
+    age(repo)
+    run_analyze(repo)
+
+    write(repo / "pyproject.toml", "[tool.sydes]\n")
+    result = run_analyze(repo, git_mode=True)
+    assert result.generated_files == 1 and result.removed_files == 1
+
+    store = SydesSQLiteStore(SydesSQLiteStore.db_path_for_repo(repo), repo_root=repo)
+    assert [r["rel_path"] for r in store.list_routes()] == ["routes.py"]
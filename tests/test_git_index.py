@@ -0,0 +1,147 @@
+from pathlib import Path
+import subprocess
+import textwrap
+
+from sydes.orchestrator.pipeline import run_analyze
+from sydes.repo.git_index import git_blob_id, list_git_files
+
+
+def write(p: Path, s: str) -> None:
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(textwrap.dedent(s), encoding="utf-8")
+
+
+def git(repo: Path, *args: str) -> str:
+    return subprocess.check_output(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", "-C", str(repo), *args], text=True
+    )
+
+
+def test_list_git_files_uses_index_blob_ids(tmp_path: Path):
+    repo = tmp_path / "repo"
+    write(repo / "app.py", "a = 1\n")
+    write(repo / "mod.py", "b = 1\n")
+    git(repo, "init", "-q")
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "init")
+
+    write(repo / "mod.py", "b = 2\n")  # modified, unstaged
+    write(repo / "new.py", "c = 1\n")  # untracked
+
+    entries = {e.rel_path: e.oid for e in list_git_files(repo)}
+    assert entries == {
+        "app.py": git_blob_id(b"a = 1\n"),
+        "mod.py": "",
+        "new.py": "",
+    }
+    assert git_blob_id(b"a = 1\n") == git(repo, "hash-object", "app.py").strip()
+
+
+def test_analyze_with_git_index(tmp_path: Path):
+    repo = tmp_path / "repo"
+    write(
+        repo / "app.py",
+        """
+        from fastapi import FastAPI
+        app = FastAPI()
+
+        @app.get("/a")
+        def a(): return {}
+        """,
+    )
+    git(repo, "init", "-q")
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "init")
+
+    r1 = run_analyze(repo, use_git_index=True)
+    assert r1.changed_files == 1
+    assert r1.candidate_files == ["app.py"]
+
+    r2 = run_analyze(repo, use_git_index=True, trust_stat=False)
+    assert r2.changed_files == 0
+
+    write(
+        repo / "app.py",
+        """
+        from fastapi import FastAPI
+        app = FastAPI()
+
+        @app.get("/b")
+        def b(): return {}
+        """,
+    )
+    r3 = run_analyze(repo, use_git_index=True, trust_stat=False)
+    assert r3.changed_files == 1
+    assert [r.path for r in r3.routes] == ["/b"]
+
+
+def test_git_index_falls_back_to_walk_outside_git(tmp_path: Path):
+    write(tmp_path / "app.py", "from fastapi import FastAPI\napp = FastAPI()\n")
+    assert list_git_files(tmp_path) is None
+    r = run_analyze(tmp_path, use_git_index=True)
+    assert r.candidate_files == ["app.py"]
+
+
+def _route_file(path: str) -> str:
+    name = path.strip("/").replace("/", "_") or "root"
+    return f"""
+    from fastapi import FastAPI
+    app = FastAPI()
+
+    @app.get("{path}")
+    def {name}(): return {{}}
+    """
+
+
+def test_git_mode_diffs_from_last_scanned_commit(tmp_path: Path):
+    from sydes.store.sqlite_store import SydesSQLiteStore
+
+    repo = tmp_path / "repo"
+    write(repo / ".gitignore", ".sydes/\n")
+    write(repo / "app.py", _route_file("/a"))
+    git(repo, "init", "-q")
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "c1")
+    c1 = git(repo, "rev-parse", "HEAD").strip()
+
+    run_analyze(repo)
+
+    # two commits later, plus an uncommitted edit
+    write(repo / "b.py", _route_file("/b"))
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "c2")
+    write(repo / "c.py", _route_file("/c"))
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "c3")
+    write(repo / "app.py", _route_file("/a2"))
+
+    r = run_analyze(repo, git_mode=True)
+    assert r.mode == "git"
+    assert r.git_base == c1
+    assert r.changed_files == 3
+
+    store = SydesSQLiteStore(SydesSQLiteStore.db_path_for_repo(repo), repo_root=repo)
+    assert {x["http_path"] for x in store.list_routes()} == {"/a2", "/b", "/c"}
+
+    # reverting the dirty edit is caught even though HEAD did not move
+    git(repo, "checkout", "--", "app.py")
+    r = run_analyze(repo, git_mode=True)
+    assert r.changed_files == 1
+    assert {x["http_path"] for x in store.list_routes()} == {"/a", "/b", "/c"}
+
+
+def test_git_mode_falls_back_to_full_when_commit_unreachable(tmp_path: Path):
+    from sydes.store.sqlite_store import SydesSQLiteStore
+
+    repo = tmp_path / "repo"
+    write(repo / "app.py", _route_file("/a"))
+    git(repo, "init", "-q")
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "c1")
+
+    store = SydesSQLiteStore(SydesSQLiteStore.db_path_for_repo(repo), repo_root=repo)
+    store.create_scan(git_commit="0" * 40)
+
+    r = run_analyze(repo, git_mode=True)
+    assert r.mode == "full"
+    assert r.changed_files == 1
@@ -0,0 +1,57 @@
+from pathlib import Path
+
+from sydes.repo.config import load_repo_config
+from sydes.repo.ignore import IgnoreMatcher
+from sydes.repo.scanner import scan_repo_files
+
+
+def touch(p: Path, s: str = "x = 1\n") -> None:
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(s, encoding="utf-8")
+
+
+def test_gitignore_pattern_semantics():
+    m = IgnoreMatcher().with_rules(
+        [
+            "# comment",
+            "*_pb2.py",
+            "/top_only.py",
+            "gen/",
+            "docs/**/*.py",
+            "!keep_pb2.py",
+        ]
+    )
+    assert m.is_ignored("a/b/svc_pb2.py", is_dir=False)
+    assert not m.is_ignored("a/b/keep_pb2.py", is_dir=False)
+    assert m.is_ignored("top_only.py", is_dir=False)
+    assert not m.is_ignored("sub/top_only.py", is_dir=False)
+    assert m.is_ignored("x/gen", is_dir=True)
+    assert not m.is_ignored("x/gen", is_dir=False)  # dir-only rule
+    assert m.is_ignored("docs/conf.py", is_dir=False)
+    assert m.is_ignored("docs/a/b/conf.py", is_dir=False)
+    assert not m.is_ignored("src/app.py", is_dir=False)
+
+
+def test_scanner_prunes_nested_gitignore_and_config_globs(tmp_path: Path):
+    touch(tmp_path / "pyproject.toml", '[tool.sydes]\nignore = ["vendor/"]\n')
+    touch(tmp_path / ".gitignore", "client_sdk/\n")
+    touch(tmp_path / "app.py")
+    touch(tmp_path / "client_sdk" / "api.py")
+    touch(tmp_path / "vendor" / "lib.py")
+    touch(tmp_path / "svc" / ".gitignore", "*_generated.py\n")
+    touch(tmp_path / "svc" / "routes.py")
+    touch(tmp_path / "svc" / "models_generated.py")
+    touch(tmp_path / "other" / "models_generated.py")
+    touch(tmp_path / ".git" / "info" / "exclude", "scratch.py\n")
+    touch(tmp_path / "scratch.py")
+
+    config = load_repo_config(tmp_path)
+    assert config.ignore == ("vendor/",)
+    ignore = IgnoreMatcher.for_repo(tmp_path, extra_globs=config.ignore)
+
+    for workers in (1, 4):
+        found = [
+            Path(f.rel_path).as_posix()
+            for f in scan_repo_files(tmp_path, workers=workers, ignore=ignore)
+        ]
+        assert found == ["app.py", "other/models_generated.py", "svc/routes.py"]
@@ -0,0 +1,82 @@
+from pathlib import Path
+import textwrap
+
+from sydes.orchestrator.pipeline import iter_analyze, run_analyze
+from sydes.store.sqlite_store import SydesSQLiteStore
+
+
+def write(p: Path, s: str) -> None:
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(textwrap.dedent(s), encoding="utf-8")
+
+
+def router(i: int) -> str:
+    return f"""
+    from fastapi import APIRouter
+    router = APIRouter()
+
+    @router.get("/items/{i}")
+    def get_{i}(): return {{}}
+
+    @router.post("/items/{i}")
+    def post_{i}(): return {{}}
+    """
+
+
+def drain(events):
+    out = []
+    while True:
+        try:
+            out.append(next(events))
+        except StopIteration as done:
+            return out, done.value
+
+
+def test_iter_analyze_streams_per_file_events(tmp_path: Path):
+    repo = tmp_path / "repo"
+    for i in range(3):
+        write(repo / f"r{i}.py", router(i))
+
+    events, summary = drain(iter_analyze(repo))
+    assert sorted(e.rel_path for e in events) == ["r0.py", "r1.py", "r2.py"]
+    assert all(e.status == "changed" and len(e.routes) == 2 for e in events)
+    assert summary.routes == []
+    assert summary.routes_found == 6
+    assert summary.changed_files == 3
+
+    (repo / "r1.py").unlink()
+    events, summary = drain(iter_analyze(repo))
+    assert [(e.rel_path, e.status) for e in events] == [("r1.py", "removed")]
+    assert summary.removed_files == 1
+
+
+def test_run_analyze_route_limit(tmp_path: Path):
+    repo = tmp_path / "repo"
+    for i in range(3):
+        write(repo / f"r{i}.py", router(i))
+
+    result = run_analyze(repo, route_limit=3)
+    assert len(result.routes) == 3
+    assert result.routes_found == 6
+
+
+def test_timings_are_reported_and_stored_with_the_scan(tmp_path: Path):
+    repo = tmp_path / "repo"
+    for i in range(3):
+        write(repo / f"r{i}.py", router(i))
+
+    result = run_analyze(repo)
+    names = [t.name for t in result.timings]
+    assert names == [
+        "walk", "detect", "index", "select", "read", "parse", "write", "pipeline", "snapshot", "total"
+    ]
+    by_name = {t.name: t for t in result.timings}
+    assert by_name["walk"].files == 3
+    assert by_name["parse"].files == 3
+    assert by_name["total"].bytes_read == result.bytes_read
+    assert all(t.wall_s >= 0 and t.cpu_s >= 0 for t in result.timings)
+
+    store = SydesSQLiteStore(SydesSQLiteStore.db_path_for_repo(repo), repo_root=repo)
+    stored = store.get_scan_timings(result.scan_id)
+    assert [t["name"] for t in stored] == names
+    assert stored[0] == by_name["walk"].to_dict()
@@ -0,0 +1,36 @@
+from sydes.repo.needles import NeedleMatcher, candidate_group, detect_group
+
+
+def _brute(groups: dict[str, list[str]], text: str) -> dict[str, int]:
+    return {g: sum(1 for n in needles if n in text) for g, needles in groups.items()}
+
+
+def test_needle_matcher_matches_per_needle_scan():
+    groups = {
+        "a": ["path(", "re_path(", "urlpatterns"],
+        "b": ["@app.", "@app.route", "route"],
+        "c": ["abc", "bcd"],  # overlapping, neither contains the other
+    }
+    m = NeedleMatcher(groups)
+
+    samples = [
+        "",
+        "urlpatterns = [re_path('x')]",
+        "@app.route('/x')",
+        "@app.get('/x')",
+        "abcd",
+        "xbcd abc",
+        "nothing here",
+    ]
+    for text in samples:
+        assert m.hits(text.encode("utf-8")) == _brute(groups, text), text
+
+
+def test_default_groups_cover_detection_and_candidates():
+    m = NeedleMatcher.for_frameworks()
+    hits = m.hits(b"from fastapi import FastAPI\napp = FastAPI()\n@app.get('/')\n")
+    assert hits[detect_group("fastapi")] == 2
+    assert hits[candidate_group("fastapi")] == 3
+    assert hits[detect_group("flask")] == 0
+    # endpos limits the scan to a prefix
+    assert m.hits(b"x" * 10 + b"APIRouter", endpos=10)[candidate_group("fastapi")] == 0
@@ -0,0 +1,50 @@
+from pathlib import Path
+import json
+import textwrap
+
+from sydes.orchestrator.pipeline import run_analyze
+from sydes.orchestrator.profile import Tracer
+
+
+def write(p: Path, s: str) -> None:
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(textwrap.dedent(s), encoding="utf-8")
+
+
+def test_profile_records_per_file_spans_and_slowest_files(tmp_path: Path):
+    repo = tmp_path / "repo"
+    for i in range(3):
+        write(
+            repo / "routers" / f"r{i}.py",
+            f"""
+            from fastapi import APIRouter
+            router = APIRouter()
+
+            @router.get("/items/{i}")
+            def get_{i}(): return {{}}
+            """,
+        )
+    # a large generated module dominates parse time
+    write(repo / "routers" / "generated.py", "from fastapi import APIRouter\n" + "x = 1\n" * 20000)
+
+    tracer = Tracer(root=repo.resolve())
+    run_analyze(repo, tracer=tracer)
+
+    out = tmp_path / "profile.json"
+    tracer.write(out)
+    trace = json.loads(out.read_text(encoding="utf-8"))
+    spans = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    assert all({"ts", "dur", "pid", "tid"} <= e.keys() for e in spans)
+    assert any(e["ph"] == "M" and e["name"] == "thread_name" for e in trace["traceEvents"])
+
+    per_file = {}
+    for e in spans:
+        if e["cat"] == "file":
+            per_file.setdefault(e["args"]["path"], set()).add(e["name"])
+    rel = str(Path("routers") / "generated.py")
+    assert per_file[rel] == {"sniff", "fingerprint", "parse", "store"}
+    assert any(e["name"] == "walk" and e["cat"] == "dir" for e in spans)
+
+    slowest = tracer.slowest_files(1)
+    assert [c.path for c in slowest] == [rel]
+    assert slowest[0].stages["parse"] > 0
@@ -0,0 +1,63 @@
+from pathlib import Path
+import textwrap
+
+from sydes.orchestrator.pipeline import run_analyze
+from sydes.repo.blobs import BlobCache
+
+
+def write(p: Path, s: str) -> None:
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(textwrap.dedent(s), encoding="utf-8")
+
+
+def test_blob_cache_reads_each_file_once(tmp_path: Path):
+    f = tmp_path / "a.py"
+    write(f, "x = 1\n")
+
+    blobs = BlobCache()
+    assert blobs.read(str(f)) == b"x = 1\n"
+    assert blobs.read(str(f)) == b"x = 1\n"
+    assert blobs.files_read == 1
+    assert blobs.bytes_read == len(b"x = 1\n")
+
+    blobs.discard(str(f))
+    assert len(blobs) == 0
+
+
+def test_analyze_opens_each_file_once(tmp_path: Path):
+    repo = tmp_path / "repo"
+    write(
+        repo / "app.py",
+        """
+        from fastapi import FastAPI
+        app = FastAPI()
+
+        @app.get("/a")
+        def a(): return {}
+        """,
+    )
+    write(repo / "util.py", "def helper():\n    return 1\n")
+
+    r = run_analyze(repo)
+    assert r.files_read == 2
+    assert r.bytes_read == sum(p.stat().st_size for p in repo.glob("*.py"))
+    assert len(r.routes) == 1
+
+
+def test_blob_cache_stops_holding_past_its_budget(tmp_path: Path):
+    a, b = tmp_path / "a.py", tmp_path / "b.py"
+    write(a, "x = 1\n")
+    write(b, "y = 2\n")
+
+    blobs = BlobCache(hold_bytes=8)
+    assert blobs.read(str(a)) == b"x = 1\n"
+    assert blobs.read(str(b)) == b"y = 2\n"  # returned, but not kept
+    assert len(blobs) == 1 and blobs.held_bytes == 6
+
+    assert blobs.read(str(b)) == b"y = 2\n"
+    assert blobs.files_read == 3  # b was read again
+
+    blobs.discard(str(a))
+    assert blobs.held_bytes == 0
+    blobs.read(str(b))
+    assert len(blobs) == 1
@@ -9,3 +9,24 @@ def test_scan_python_files_finds_src_files():
 
     target = (repo_root / "src" / "sydes" / "cli.py").resolve()
     assert any(Path(p).resolve() == target for p in files)
+
+
+def test_scan_repo_files_parallel_matches_serial(tmp_path: Path):
+    from sydes.repo.scanner import scan_repo_files
+
+    for rel in ["a.py", "a/b.py", "a/c/d.py", "b.py", "node_modules/x.py", "z/notes.txt"]:
+        p = tmp_path / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text("x = 1\n", encoding="utf-8")
+
+    parallel = scan_repo_files(tmp_path, workers=4)
+    serial = scan_repo_files(tmp_path, workers=1)
+
+    assert [f.rel_path for f in parallel] == [f.rel_path for f in serial]
+    assert [Path(f.rel_path).as_posix() for f in parallel] == ["a/b.py", "a/c/d.py", "a.py", "b.py"]
+    assert all(f.size_bytes == 6 for f in parallel)
+
+    # max_files yields the prefix of the full walk
+    assert [f.rel_path for f in scan_repo_files(tmp_path, max_files=2)] == [
+        f.rel_path for f in parallel[:2]
+    ]
@@ -1,6 +1,9 @@
 from pathlib import Path
+import sqlite3
 import textwrap
 
+import pytest
+
 from sydes.orchestrator.pipeline import run_analyze
 from sydes.store.sqlite_store import SydesSQLiteStore
 
@@ -50,3 +53,278 @@ def test_scan_snapshots_and_diff(tmp_path: Path):
     d = store.diff_scans(r1.scan_id, r2.scan_id)
     assert {x["http_path"] for x in d["removed"]} == {"/a"}
     assert {x["http_path"] for x in d["added"]} == {"/b"}
+
+
+def test_diff_sections_counts_and_streaming(tmp_path: Path):
+    repo = tmp_path / "repo"
+    header = """
+        from fastapi import APIRouter
+        router = APIRouter()
+    """
+    write(repo / "a.py", header + """
+        @router.get("/x")
+        def hx(): return {}
+
+        @router.get("/y")
+        def hy(): return {}
+    """)
+    write(repo / "b.py", header + """
+        @router.get("/z")
+        def hz(): return {}
+    """)
+    r1 = run_analyze(repo)
+
+    write(repo / "a.py", header + """
+        @router.get("/y")
+        def hy2(): return {}
+    """)
+    write(repo / "b.py", header + """
+        @router.get("/x")
+        def hx(): return {}
+
+        @router.post("/w")
+        def hw(): return {}
+    """)
+    r2 = run_analyze(repo)
+
+    store = SydesSQLiteStore(SydesSQLiteStore.db_path_for_repo(repo), repo_root=repo, read_only=True)
+    d = store.diff_scans(r1.scan_id, r2.scan_id)
+    assert [(x["method"], x["http_path"], x["rel_path"]) for x in d["added"]] == [("POST", "/w", "b.py")]
+    assert [x["http_path"] for x in d["removed"]] == ["/z"]
+    assert [(x["http_path"], x["from_rel_path"], x["to_rel_path"]) for x in d["moved"]] == [
+        ("/x", "a.py", "b.py")
+    ]
+    assert [(x["http_path"], x["from_handler"], x["to_handler"]) for x in d["handler_changed"]] == [
+        ("/y", "hy", "hy2")
+    ]
+    assert store.count_scan_diff(r1.scan_id, r2.scan_id) == {
+        "added": 1, "removed": 1, "moved": 1, "handler_changed": 1
+    }
+    assert store.count_scan_diff(r2.scan_id, r2.scan_id) == {
+        "added": 0, "removed": 0, "moved": 0, "handler_changed": 0
+    }
+
+    reverse = store.iter_scan_diff(r2.scan_id, r1.scan_id, "added")
+    assert next(reverse)["http_path"] == "/z"
+    assert next(reverse, None) is None
+
+    # one diff rebuilds each scan's set once, however many sections are read
+    built = []
+    materialize = store._materialize_set
+    store._materialize_set = lambda con, set_id: built.append(set_id) or materialize(con, set_id)
+    with store.scan_diff(r1.scan_id, r2.scan_id) as diff:
+        assert diff.counts() == {"added": 1, "removed": 1, "moved": 1, "handler_changed": 1}
+        assert {kind: list(diff.iter(kind)) for kind in d} == d
+    assert len(built) == 2
+    store.diff_scans(r1.scan_id, r2.scan_id)
+    assert len(built) == 4
+
+    # an unknown section fails at the call, before any iteration
+    with pytest.raises(ValueError, match="Unknown diff kind"):
+        store.iter_scan_diff(r1.scan_id, r2.scan_id, "renamed")
+    with store.scan_diff(r1.scan_id, r2.scan_id) as diff, pytest.raises(ValueError):
+        diff.iter("renamed")
+
+
+def _count(store: SydesSQLiteStore, table: str) -> int:
+    with store._tx() as con:
+        return con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_unchanged_scans_share_one_snapshot_set(tmp_path: Path):
+    repo = tmp_path / "repo"
+    v1 = """
+        from fastapi import APIRouter
+        router = APIRouter()
+
+        @router.get("/a")
+        def a(): return {}
+    """
+    write(repo / "a.py", v1)
+    write(repo / "b.py", v1.replace('"/a"', '"/b"'))
+    r1 = run_analyze(repo)
+    store = SydesSQLiteStore(SydesSQLiteStore.db_path_for_repo(repo), repo_root=repo)
+    assert (_count(store, "snapshot_sets"), _count(store, "snapshot_endpoints")) == (1, 2)
+
+    r2 = run_analyze(repo)
+    assert (_count(store, "snapshot_sets"), _count(store, "snapshot_endpoints")) == (1, 2)
+    assert store.get_scan_endpoints(r2.scan_id) == store.get_scan_endpoints(r1.scan_id)
+    assert store.count_scan_diff(r1.scan_id, r2.scan_id)["added"] == 0
+
+    write(repo / "a.py", v1.replace("def a()", "def a2()"))
+    r3 = run_analyze(repo)
+    assert _count(store, "snapshot_sets") == 2
+    assert [x["to_handler"] for x in store.diff_scans(r2.scan_id, r3.scan_id)["handler_changed"]] == ["a2"]
+
+    # back to the first content: the first set is reused
+    write(repo / "a.py", v1)
+    r4 = run_analyze(repo)
+    assert _count(store, "snapshot_sets") == 2
+    assert store.count_scan_diff(r1.scan_id, r4.scan_id) == dict.fromkeys(
+        ["added", "removed", "moved", "handler_changed"], 0
+    )
+
+    # the incrementally folded hash matches one recomputed from the routes table
+    (repo / "b.py").unlink()
+    run_analyze(repo)
+    folded = store.get_meta("routes_set_hash")
+    with store._tx() as con:
+        store._rebuild_route_hashes(con)
+    assert store.get_meta("routes_set_hash") == folded
+
+
+def test_migration_folds_per_scan_copies_into_sets(tmp_path: Path):
+    db = tmp_path / "specs.db"
+    SydesSQLiteStore(db, repo_root=tmp_path).close()
+
+    # a 1.6 database: every scan carries its own copy of the endpoints
+    con = sqlite3.connect(db)
+    con.executescript(
+        """
+        DROP TABLE snapshot_endpoints; DROP TABLE snapshot_sets; DROP TABLE route_hashes;
+        CREATE TABLE scan_endpoints (
+            scan_id INTEGER NOT NULL, endpoint_id TEXT NOT NULL, method TEXT NOT NULL,
+            http_path TEXT NOT NULL, rel_path TEXT NOT NULL, handler_name TEXT NOT NULL,
+            decl_line INTEGER NOT NULL, source TEXT NOT NULL,
+            PRIMARY KEY (scan_id, endpoint_id)
+        );
+        INSERT INTO scans(scan_id, created_at) VALUES (1, 0), (2, 0), (3, 0);
+        INSERT INTO scan_endpoints VALUES
+            (1, 'e1', 'GET', '/a', 'a.py', 'a', 3, 'ast'),
+            (2, 'e1', 'GET', '/a', 'a.py', 'a', 3, 'ast'),
+            (3, 'e1', 'GET', '/a', 'a.py', 'a', 3, 'ast'),
+            (3, 'e2', 'GET', '/b', 'b.py', 'b', 3, 'ast');
+        INSERT INTO routes VALUES ('r', 'b.py', 'GET', '/b', 'b', 4, 5, 3, 'ast', 0);
+        UPDATE meta SET value='1.6' WHERE key='schema_version';
+        """
+    )
+    con.close()
+
+    store = SydesSQLiteStore(db, repo_root=tmp_path)
+    assert store.get_meta("schema_version") == SydesSQLiteStore.SCHEMA_VERSION
+    # scans 1 and 2 share a set; scan 3's set is stored as a delta (+/b) on it
+    assert (_count(store, "snapshot_sets"), _count(store, "snapshot_endpoints")) == (2, 2)
+    assert list(store.get_scan_endpoints(3)) == ["e1", "e2"]
+    assert list(store.get_scan_endpoints(2)) == ["e1"]
+    assert [x["http_path"] for x in store.diff_scans(1, 3)["added"]] == ["/b"]
+    assert store.get_meta("routes_set_hash") != "0" * 64
+
+
+def test_first_scan_after_migration_reuses_the_current_set(tmp_path: Path):
+    repo = tmp_path / "repo"
+    header = """
+        from fastapi import APIRouter
+        router = APIRouter()
+    """
+    write(repo / "a.py", header + """
+        @router.get("/a")
+        def a(): return {}
+    """)
+    r1 = run_analyze(repo)
+    write(repo / "b.py", header + """
+        @router.get("/b")
+        def b(): return {}
+    """)
+    r2 = run_analyze(repo)
+
+    # rewrite it as a 1.6 database: per-scan copies of the endpoints
+    db = SydesSQLiteStore.db_path_for_repo(repo)
+    store = SydesSQLiteStore(db, repo_root=repo)
+    copies = {s: list(store.get_scan_endpoints(s).values()) for s in (r1.scan_id, r2.scan_id)}
+    store.close()
+    con = sqlite3.connect(db)
+    con.executescript(
+        """
+        DROP TABLE snapshot_endpoints; DROP TABLE snapshot_sets; DROP TABLE route_hashes;
+        ALTER TABLE scans DROP COLUMN set_id;
+        CREATE TABLE scan_endpoints (
+            scan_id INTEGER NOT NULL, endpoint_id TEXT NOT NULL, method TEXT NOT NULL,
+            http_path TEXT NOT NULL, rel_path TEXT NOT NULL, handler_name TEXT NOT NULL,
+            decl_line INTEGER NOT NULL, source TEXT NOT NULL,
+            PRIMARY KEY (scan_id, endpoint_id)
+        );
+        UPDATE meta SET value='1.6' WHERE key='schema_version';
+        """
+    )
+    con.executemany(
+        "INSERT INTO scan_endpoints VALUES(?,?,?,?,?,?,?,?)",
+        [
+            (scan_id, r["endpoint_id"], r["method"], r["http_path"], r["rel_path"],
+             r["handler_name"], r["decl_line"], r["source"])
+            for scan_id, rows in copies.items()
+            for r in rows
+        ],
+    )
+    con.commit()
+    con.close()
+
+    store = SydesSQLiteStore(db, repo_root=repo)
+    migrated = (_count(store, "snapshot_sets"), _count(store, "snapshot_endpoints"))
+    store.close()
+
+    # nothing changed: the new scan points at the migrated set, storing no rows
+    r3 = run_analyze(repo)
+    assert r3.changed_files == 0
+    store = SydesSQLiteStore(db, repo_root=repo)
+    assert (_count(store, "snapshot_sets"), _count(store, "snapshot_endpoints")) == migrated
+    assert store.count_scan_diff(r2.scan_id, r3.scan_id) == dict.fromkeys(
+        ("added", "removed", "moved", "handler_changed"), 0
+    )
+
+
+class _Route:
+    def __init__(self, path: str, handler: str, line: int):
+        self.method, self.path, self.handler_name = "GET", path, handler
+        self.start_line = self.decorator_line = line
+        self.end_line = line + 1
+
+
+def test_history_is_keyframes_plus_deltas(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(SydesSQLiteStore, "SNAPSHOT_KEYFRAME_EVERY", 3)
+    store = SydesSQLiteStore(tmp_path / "specs.db", repo_root=tmp_path)
+
+    def expected(files: dict[str, list[_Route]]) -> dict[str, tuple]:
+        return {r.path: (rel, r.handler_name, r.decorator_line) for rel, rs in files.items() for r in rs}
+
+    files = {f"f{i}.py": [_Route(f"/f{i}/{j}", f"h{j}", j) for j in range(10)] for i in range(4)}
+    scans: list[tuple[int, dict]] = []
+    for version in range(8):
+        if version == 5:
+            # big change: a keyframe even though the chain is short
+            for rel in files:
+                store.remove_file(rel)
+            files = {"new.py": [_Route(f"/n/{j}", "hn", j) for j in range(40)]}
+        elif version > 5:
+            files["new.py"] = files["new.py"][1:] + [_Route(f"/n/v{version}", "hv", 99)]
+            if version == 7:
+                files["new.py"][9] = _Route("/n/11", "renamed", 11)
+        elif version:
+            rel = f"f{version % 4}.py"
+            files[rel] = files[rel][1:] + [_Route(f"/f{version % 4}/v{version}", "hv", 99)]
+        for rel, routes in files.items():
+            store.replace_routes_for_file(rel, routes, source="ast")
+        scan_id = store.create_scan()
+        store.snapshot_current_endpoints(scan_id)
+        scans.append((scan_id, expected(files)))
+
+    for scan_id, want in scans:
+        got = store.get_scan_endpoints(scan_id)
+        assert {r["http_path"]: (r["rel_path"], r["handler_name"], r["decl_line"]) for r in got.values()} == want
+
+    with store._tx() as con:
+        depths = [r[0] for r in con.execute("SELECT depth FROM snapshot_sets ORDER BY set_id")]
+    assert depths == [0, 1, 2, 0, 1, 0, 1, 2]  # keyframe every 3, and on the big change
+    stored = _count(store, "snapshot_endpoints")
+    assert stored < sum(len(w) for _, w in scans) // 2
+
+    first, last = scans[1][0], scans[4][0]  # across a keyframe
+    d = store.diff_scans(first, last)
+    assert sorted(x["http_path"] for x in d["added"]) == ["/f0/v4", "/f2/v2", "/f3/v3"]
+    assert sorted(x["http_path"] for x in d["removed"]) == ["/f0/0", "/f2/0", "/f3/0"]
+    assert store.count_scan_diff(first, last) == {
+        "added": 3, "removed": 3, "moved": 0, "handler_changed": 0
+    }
+    changed = store.diff_scans(scans[6][0], scans[7][0])["handler_changed"]
+    assert [(x["http_path"], x["from_handler"], x["to_handler"]) for x in changed] == [
+        ("/n/11", "hn", "renamed")
+    ]
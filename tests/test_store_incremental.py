@@ -1,8 +1,15 @@
 from pathlib import Path
+import os
+import sqlite3
 import textwrap
 
+import pytest
+from typer.testing import CliRunner
+
+from sydes.cli import app
+from sydes.domain.errors import SchemaVersionError
 from sydes.orchestrator.pipeline import run_analyze
-from sydes.store.sqlite_store import SydesSQLiteStore
+from sydes.store.sqlite_store import StoreConfig, SydesSQLiteStore
 
 
 def write(p: Path, s: str) -> None:
@@ -69,3 +76,291 @@ def test_incremental_updates_only_changed_files(tmp_path: Path):
 
     rows2 = store.list_routes(limit=50)
     assert {x["http_path"] for x in rows2} == {"/a", "/b2"}
+
+
+def test_stat_unchanged_files_are_not_read(tmp_path: Path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    f = repo / "app.py"
+    write(
+        f,
+        """
+        from fastapi import FastAPI
+        app = FastAPI()
+
+        @app.get("/a")
+        def a(): return {}
+        """,
+    )
+    # push mtime into the past so the entry is not "racy"
+    past = f.stat().st_mtime_ns - 10_000_000_000
+    os.utime(f, ns=(past, past))
+
+    r1 = run_analyze(repo)
+    assert r1.changed_files == 1
+
+    r2 = run_analyze(repo)
+    assert r2.changed_files == 0
+    assert r2.candidate_files == ["app.py"]
+
+    # same size, same mtime, different content: only caught by re-hashing
+    data = f.read_text(encoding="utf-8").replace('"/a"', '"/z"')
+    f.write_text(data, encoding="utf-8")
+    os.utime(f, ns=(past, past))
+    assert run_analyze(repo).changed_files == 0
+    assert run_analyze(repo, paranoid_every=1).changed_files == 1
+
+
+def test_stat_unchanged_non_candidates_are_not_read(tmp_path: Path):
+    repo = tmp_path / "repo"
+    write(
+        repo / "app.py",
+        """
+        from fastapi import FastAPI
+        app = FastAPI()
+
+        @app.get("/a")
+        def a(): return {}
+        """,
+    )
+    write(repo / "util.py", "def helper():\n    return 1\n")
+    write(repo / "models_pb2.py", "from fastapi import APIRouter\nrouter = APIRouter()\n")
+    write(repo / "client.py", "# @generated\nfrom fastapi import APIRouter\nrouter = APIRouter()\n")
+
+    def age(*names: str) -> None:
+        for f in [repo / n for n in names] or repo.glob("*.py"):
+            past = f.stat().st_mtime_ns - 10_000_000_000
+            os.utime(f, ns=(past, past))
+
+    age()
+    r1 = run_analyze(repo)
+    assert r1.candidate_files == ["app.py"]
+    assert r1.generated_files == 2
+
+    # nothing changed: detection, selection and generated-code checks use stored hits
+    r2 = run_analyze(repo)
+    assert r2.bytes_read == 0
+    assert r2.framework == r1.framework
+    assert r2.candidate_files == ["app.py"]
+    assert r2.generated_files == 2
+
+    # a non-candidate that starts declaring routes is re-sniffed
+    write(repo / "util.py", "from fastapi import APIRouter\nrouter = APIRouter()\n")
+    age("util.py")
+    r3 = run_analyze(repo)
+    assert r3.bytes_read == (repo / "util.py").stat().st_size
+    assert r3.candidate_files == ["app.py", "util.py"]
+
+    # different rules: every file is sniffed again
+    write(repo / "pyproject.toml", "[tool.sydes]\ngenerated_patterns = []\n")
+    r4 = run_analyze(repo)
+    assert r4.candidate_files == ["app.py", "models_pb2.py", "util.py"]
+    assert r4.generated_files == 1
+
+
+def test_store_session_batches_and_rolls_back(tmp_path: Path):
+    from sydes.store.sqlite_store import FileStatus
+
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    db = SydesSQLiteStore.db_path_for_repo(repo)
+    store = SydesSQLiteStore(db, repo_root=repo)
+    other = SydesSQLiteStore(db, repo_root=repo)
+
+    def status(rel: str) -> FileStatus:
+        return FileStatus(rel_path=rel, sha256="x", mtime_ns=1, size_bytes=1, last_scanned_at=1)
+
+    store.begin(commit_every=2, commit_interval_ms=60_000)
+    store.upsert_file_status(status("a.py"))
+    store.unit_done()
+    assert store.get_file_status("a.py") is not None
+    assert other.get_file_status("a.py") is None  # not committed yet
+
+    store.upsert_file_status(status("b.py"))
+    store.unit_done()  # batch of 2 -> commit
+    assert set(other.list_tracked_files()) == {"a.py", "b.py"}
+
+    store.upsert_file_status(status("c.py"))
+    store.rollback()
+    store.end()
+    assert set(other.list_tracked_files()) == {"a.py", "b.py"}
+
+
+def test_load_file_index_matches_per_file_status(tmp_path: Path):
+    repo = tmp_path / "repo"
+    write(repo / "a.py", "from fastapi import FastAPI\napp = FastAPI()\n")
+    write(repo / "b.py", "from fastapi import APIRouter\nrouter = APIRouter()\n")
+    run_analyze(repo)
+
+    store = SydesSQLiteStore(SydesSQLiteStore.db_path_for_repo(repo), repo_root=repo)
+    index = store.load_file_index()
+    assert set(index) == {"a.py", "b.py"}
+    for rel, status in index.items():
+        assert store.get_file_status(rel) == status
+
+
+def test_structure_facts_cover_files_without_routes(tmp_path: Path):
+    repo = tmp_path / "repo"
+    write(
+        repo / "users.py",
+        """
+        from fastapi import APIRouter
+        router = APIRouter()
+
+        @router.get("/me")
+        def me(): return {}
+        """,
+    )
+    # no candidate needle: wiring and dependencies declared away from any route
+    write(
+        repo / "wiring.py",
+        """
+        from .main import api
+        from .users import router as users_router
+        api.include_router(users_router, prefix="/users")
+        """,
+    )
+    write(
+        repo / "deps.py",
+        """
+        from fastapi.params import Depends
+
+        def current_user(db=Depends(get_db)): return db
+        """,
+    )
+
+    run_analyze(repo)
+    store = SydesSQLiteStore(SydesSQLiteStore.db_path_for_repo(repo), repo_root=repo)
+    structure = store.get_structure()
+    assert [(i["router"], i["rel_path"]) for i in structure["includes"]] == [
+        ("users_router", "wiring.py")
+    ]
+    assert [(d["name"], d["rel_path"]) for d in structure["depends"]] == [("get_db", "deps.py")]
+
+    # a repo detected as another framework still records them, without routes
+    flask = tmp_path / "flask"
+    write(flask / "app.py", "from flask import Flask\napp = Flask(__name__)\n")
+    write(flask / "deps.py", (repo / "deps.py").read_text())
+    result = run_analyze(flask)
+    assert result.framework == "flask" and result.routes == []
+    store = SydesSQLiteStore(SydesSQLiteStore.db_path_for_repo(flask), repo_root=flask)
+    assert [d["rel_path"] for d in store.get_structure()["depends"]] == ["deps.py"]
+
+
+def test_structure_facts_follow_file_changes(tmp_path: Path):
+    repo = tmp_path / "repo"
+    main = repo / "main.py"
+    deps = repo / "deps.py"
+    write(
+        main,
+        """
+        from fastapi import FastAPI
+        from . import users
+        app = FastAPI()
+        app.include_router(users.router, prefix="/users")
+        """,
+    )
+    write(
+        deps,
+        """
+        from fastapi import APIRouter, Depends
+        router = APIRouter()
+
+        @router.get("/me")
+        def me(db=Depends(get_db)): return {}
+        """,
+    )
+
+    run_analyze(repo)
+    store = SydesSQLiteStore(SydesSQLiteStore.db_path_for_repo(repo), repo_root=repo)
+    structure = store.get_structure()
+    assert [(i["from"], i["router"], i["prefix"], i["rel_path"]) for i in structure["includes"]] == [
+        ("app", "users.router", "/users", "main.py")
+    ]
+    assert [(d["name"], d["rel_path"]) for d in structure["depends"]] == [("get_db", "deps.py")]
+
+    write(
+        main,
+        """
+        from fastapi import FastAPI
+        from . import users
+        app = FastAPI()
+        app.include_router(users.router, prefix="/v2/users")
+        """,
+    )
+    deps.unlink()
+    run_analyze(repo)
+
+    structure = store.get_structure()
+    assert [i["prefix"] for i in structure["includes"]] == ["/v2/users"]
+    assert structure["depends"] == []
+
+
+def test_read_only_store_is_lazy_and_never_writes(tmp_path: Path):
+    repo = tmp_path / "repo"
+    write(
+        repo / "r.py",
+        """
+        from fastapi import APIRouter
+        router = APIRouter()
+
+        @router.get("/items")
+        def list_items(): return []
+        """,
+    )
+    run_analyze(repo)
+    db = SydesSQLiteStore.db_path_for_repo(repo)
+
+    missing = SydesSQLiteStore(tmp_path / "none" / "specs.db", repo_root=tmp_path, read_only=True)
+    assert not (tmp_path / "none").exists()  # nothing created up front
+    with pytest.raises(FileNotFoundError):
+        missing.list_routes()
+
+    ro = SydesSQLiteStore(db, repo_root=repo, read_only=True)
+    assert ro._con is None
+    assert [r["http_path"] for r in ro.list_routes()] == ["/items"]
+    assert ro.list_scans(limit=1)
+    with pytest.raises(sqlite3.OperationalError):
+        ro.set_meta("x", "y")
+    ro.close()
+
+    # an older layout is reported, never migrated from a read path
+    with sqlite3.connect(db) as con:
+        con.execute("UPDATE meta SET value='1.5' WHERE key='schema_version'")
+        con.execute("ALTER TABLE files DROP COLUMN skip_reason")
+    con.close()
+    before = db.read_bytes()
+    ro = SydesSQLiteStore(db, repo_root=repo, read_only=True)
+    with pytest.raises(SchemaVersionError, match="schema 1.5 is older than .*sydes analyze"):
+        ro.list_routes()
+    ro.close()
+    assert db.read_bytes() == before
+
+    result = CliRunner().invoke(app, ["endpoints", "list", str(repo)])
+    assert result.exit_code == 2
+    assert "run `sydes analyze` to upgrade" in result.output
+    assert db.read_bytes() == before
+
+    # analyze upgrades it; then it reads
+    run_analyze(repo)
+    ro = SydesSQLiteStore(db, repo_root=repo, read_only=True)
+    assert ro.get_meta("schema_version") == SydesSQLiteStore.SCHEMA_VERSION
+    assert [f["rel_path"] for f in ro.list_skipped_files()] == []
+    ro.close()
+
+
+def test_store_connection_applies_config(tmp_path: Path):
+    config = StoreConfig(cache_size_kib=1024, mmap_size_bytes=1 << 20, busy_timeout_ms=1234)
+    with SydesSQLiteStore(tmp_path / "specs.db", repo_root=tmp_path, config=config) as store:
+        con = store._conn()
+        assert con.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert con.execute("PRAGMA cache_size").fetchone()[0] == -1024
+        assert con.execute("PRAGMA busy_timeout").fetchone()[0] == 1234
+        assert con.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+        assert con.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        store.set_meta("k", "v")
+        assert store._conn() is con  # one connection for the store's life
+    assert store._con is None
+
+    with pytest.raises(ValueError):
+        StoreConfig(synchronous="OFF; DROP TABLE routes").pragmas()